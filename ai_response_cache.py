@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from settings import (
+    AI_RESPONSE_CACHE_DIR,
+    AI_RESPONSE_CACHE_TTL_SECONDS,
+    AI_RESPONSE_CACHE_MAX_BYTES,
+)
+from ai_usage import get_response_usage
+
+AI_CACHE_FILE_EXT = ".json"
+AI_CACHE_KEY_FIELDS = ("ai_model", "verbosity", "system_prompt", "user_prompt", "response_format")
+
+
+class AIResponseCache:
+    """On-disk, content-addressed cache for OpenAI responses.
+
+    Each successful response is stored in its own JSON file named after a hash of the
+    model, verbosity, system prompt, user prompt and response schema of the request,
+    so re-running a batch with identical prompts skips the paid AI calls.
+    Entries expire when they have not been used for `ttl_seconds`; when the cache grows
+    over `max_bytes` the least recently used entries are evicted. Both go by the file's
+    modification time, which `get` refreshes on every hit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = AI_RESPONSE_CACHE_DIR,
+        ttl_seconds: int = AI_RESPONSE_CACHE_TTL_SECONDS,
+        max_bytes: int = AI_RESPONSE_CACHE_MAX_BYTES,
+        bypass: bool = False,
+        callback=print,
+    ):
+        """
+        Args:
+            cache_dir: Folder the cache entries are stored in (created on first write).
+            ttl_seconds: Lifetime of an unused entry; 0 or less disables expiry.
+            max_bytes: Total size limit of the cache folder; 0 or less disables eviction.
+            bypass: When True, cached entries are never read but fresh responses are still stored.
+            callback: Logging callback.
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.callback = callback
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(prompt_config) -> str:
+        """Return the content hash identifying a prompt configuration."""
+        key_data = {field: getattr(prompt_config, field, None) for field in AI_CACHE_KEY_FIELDS}
+        key_json = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(key_json.encode("utf-8")).hexdigest()
+
+    def get(self, prompt_config) -> Optional[dict]:
+        """Return the cached response for the prompt, or None on a miss, expiry or bypass."""
+        if self.bypass:
+            return None
+
+        path = self._get_entry_path(self.make_key(prompt_config))
+        try:
+            if self._is_expired(os.path.getmtime(path)):
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.callback(f"[WARNING][AIResponseCache.get] Dropping unreadable cache entry '{path}': {e}")
+            self._remove(path)
+            return None
+
+        # Refresh the last use, which both the expiry and the size-based eviction go by
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("response")
+
+    def put(self, prompt_config, response: dict):
+        """Store a successful response. Responses with an error are not cached."""
+        if not response or response.get("error", "") != "":
+            return
+
+        entry = {
+            "created": time.time(),
+            "response": {
+                "message": response.get("message", ""),
+                "error": "",
+            },
+        }
+        # Kept so cache hits are reported with the tokens of the original call
+        usage = get_response_usage(response)
+        if usage:
+            entry["response"]["usage"] = {
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"],
+                "prompt_tokens_details": {"cached_tokens": usage["cached_tokens"]},
+            }
+        path = self._get_entry_path(self.make_key(prompt_config))
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def clear(self):
+        """Remove every cache entry."""
+        with self._lock:
+            for path, _, _ in self._list_entries():
+                self._remove(path)
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + AI_CACHE_FILE_EXT)
+
+    def _is_expired(self, last_used: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - last_used > self.ttl_seconds
+
+    def _list_entries(self) -> list:
+        """Return (path, size, last access time) for every entry in the cache folder."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(AI_CACHE_FILE_EXT):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones until the size limit is met."""
+        entries = self._list_entries()
+        live_entries = []
+        for path, size, last_used in entries:
+            if self._is_expired(last_used):
+                self._remove(path)
+            else:
+                live_entries.append((path, size, last_used))
+
+        if self.max_bytes <= 0:
+            return
+
+        total_size = sum(size for _, size, _ in live_entries)
+        for path, size, _ in sorted(live_entries, key=lambda entry: entry[2]):
+            if total_size <= self.max_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
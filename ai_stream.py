@@ -0,0 +1,138 @@
+import threading
+from typing import Callable
+
+from settings import AI_STREAM_TIMEOUT_SECONDS
+
+AI_STREAM_SCHEMA_NAME = "post_parts"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Return the shared streaming client, with the stream timeout on top of get_openai_client()."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = get_openai_client(timeout=AI_STREAM_TIMEOUT_SECONDS)
+        return _client
+
+
+def get_openai_client(**options):
+    """Return an OpenAI client set up like the one of chatgpt_api.send_prompt_to_openai.
+
+    chatgpt_api's own client is reused when it has one; otherwise a client is built from
+    get_openai_client_config(). `options` (e.g. timeout) are applied on top. The SDK is
+    imported on first use, so starting the app does not pay for it.
+    """
+    import chatgpt_api
+
+    shared_client = getattr(chatgpt_api, "client", None)
+    if shared_client is not None:
+        return shared_client.with_options(**options)
+
+    from openai import OpenAI
+
+    return OpenAI(**get_openai_client_config(), **options)
+
+
+def get_openai_client_config() -> dict:
+    """Return the OpenAI client arguments of chatgpt_api (its ConfigKeeper settings).
+
+    The API key is required, so a renamed setting fails here instead of silently falling
+    back to the OPENAI_API_KEY environment variable; the organization and base URL are optional.
+    """
+    try:
+        from chatgpt_api import OPENAI_API_KEY
+    except ImportError as e:
+        raise ValueError(f"[ERROR][get_openai_client_config] chatgpt_api has no OPENAI_API_KEY to build an OpenAI client with: {e}")
+    if not OPENAI_API_KEY:
+        raise ValueError("[ERROR][get_openai_client_config] The OPENAI_API_KEY of chatgpt_api is empty")
+
+    import chatgpt_api
+
+    config = {
+        "api_key": OPENAI_API_KEY,
+        "organization": getattr(chatgpt_api, "OPENAI_ORG_ID", None),
+        "base_url": getattr(chatgpt_api, "OPENAI_BASE_URL", None),
+    }
+    return {name: value for name, value in config.items() if value}
+
+
+def get_json_schema(response_format: dict) -> dict:
+    """Wrap PostWriter's {field: schema} response format into a strict object schema."""
+    return {
+        "type": "object",
+        "properties": response_format,
+        "required": list(response_format),
+        "additionalProperties": False,
+    }
+
+
+def build_chat_request(prompt_config) -> dict:
+    """Return the Chat Completions request body for a prompt config.
+
+    Prompts with a {field: schema} response format ask for a strict JSON object.
+    """
+    request = {
+        "model": prompt_config.ai_model,
+        "messages": [
+            {"role": "system", "content": prompt_config.system_prompt},
+            {"role": "user", "content": prompt_config.user_prompt},
+        ],
+    }
+    if isinstance(prompt_config.response_format, dict) and prompt_config.response_format:
+        request["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": AI_STREAM_SCHEMA_NAME,
+                "strict": True,
+                "schema": get_json_schema(prompt_config.response_format),
+            },
+        }
+    verbosity = getattr(prompt_config, "verbosity", None)
+    if isinstance(verbosity, str):
+        request["verbosity"] = verbosity
+    return request
+
+
+def build_sdk_chat_request(prompt_config) -> dict:
+    """Return the build_chat_request body as arguments of the SDK's chat.completions.create."""
+    request = build_chat_request(prompt_config)
+    verbosity = request.pop("verbosity", None)
+    if verbosity is not None:
+        # Not a named argument in the pinned SDK version
+        request["extra_body"] = {"verbosity": verbosity}
+    return request
+
+
+def stream_prompt_to_openai(prompt_config, on_delta: Callable[[str], None]) -> dict:
+    """Send a structured prompt with streaming on and pass every text delta to `on_delta`.
+
+    Returns the same {"message", "error"} dict as send_prompt_to_openai, plus the
+    "usage" of the call. An exception raised by `on_delta` (e.g. a StreamingJSONError
+    for a malformed response) closes the stream and propagates, so a bad generation
+    is abandoned at once instead of being paid for until the end.
+    """
+    from openai import OpenAIError
+
+    request = build_sdk_chat_request(prompt_config)
+    request["stream"] = True
+    request["stream_options"] = {"include_usage": True}
+
+    chunks = []
+    usage = None
+    try:
+        with _get_client().chat.completions.create(**request) as stream:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage.model_dump()
+                for choice in chunk.choices:
+                    delta = choice.delta.content
+                    if delta:
+                        chunks.append(delta)
+                        on_delta(delta)
+    except OpenAIError as e:
+        return {"message": str(e), "error": type(e).__name__}
+
+    return {"message": "".join(chunks), "error": "", "usage": usage}
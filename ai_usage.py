@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List
+
+from settings import AI_USAGE_PRICES_PER_1M_TOKENS
+
+# Prompts PostWriter sends, used to group usage per prompt
+AI_USAGE_PROMPT_POST_BODY = "post_body"
+AI_USAGE_PROMPT_TITLE = "title"
+AI_USAGE_PROMPT_TITLE_INTRO_CONCLUSION = "title_intro_conclusion"
+AI_USAGE_PROMPT_MISSING_PARTS = "missing_post_parts"
+
+# Rough chars-per-token ratio used when a response carries no usage data
+AI_USAGE_CHARS_PER_TOKEN = 4
+
+
+def get_response_usage(response: dict) -> Dict:
+    """Return {"prompt_tokens", "completion_tokens", "cached_tokens"} from an OpenAI response, or {} if it has none.
+
+    Accepts both the Chat Completions (prompt/completion_tokens) and the Responses API
+    (input/output_tokens) field names, as a dict or as an object.
+    """
+    usage = response.get("usage") if isinstance(response, dict) else None
+    if usage is None:
+        return {}
+
+    def read(source, *names):
+        for name in names:
+            value = source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+            if value is not None:
+                return value
+        return None
+
+    prompt_tokens = read(usage, "prompt_tokens", "input_tokens")
+    completion_tokens = read(usage, "completion_tokens", "output_tokens")
+    if prompt_tokens is None and completion_tokens is None:
+        return {}
+    details = read(usage, "prompt_tokens_details", "input_tokens_details")
+    cached_tokens = read(details, "cached_tokens") if details is not None else None
+    return {
+        "prompt_tokens": int(prompt_tokens or 0),
+        "completion_tokens": int(completion_tokens or 0),
+        "cached_tokens": int(cached_tokens or 0),
+    }
+
+
+def get_cached_ratio(usage: Dict) -> float:
+    """Share of the prompt tokens OpenAI served from its prompt (prefix) cache."""
+    return usage["cached_tokens"] / usage["prompt_tokens"] if usage.get("prompt_tokens") else 0.0
+
+
+def estimate_tokens(text) -> int:
+    return len(str(text or "")) // AI_USAGE_CHARS_PER_TOKEN
+
+
+class AIUsageTracker:
+    """Records tokens, cost and latency of every OpenAI call of a batch.
+
+    Thread-safe, so concurrent posts can share one tracker. Calls can be aggregated per
+    post, per topic or per prompt, summarized as text and exported as a JSON report.
+    Responses without usage data are counted from the prompt/response length and
+    flagged as estimated. Calls served from the AI response cache spent no tokens: their
+    tokens are totalled separately as saved by the cache.
+    """
+
+    def __init__(self, prices: Dict[str, tuple] = AI_USAGE_PRICES_PER_1M_TOKENS):
+        """
+        Args:
+            prices: {model: (input USD, output USD[, cached input USD])} per 1M tokens; calls to unknown models cost 0.
+        """
+        self.prices = prices
+        self._calls: List[Dict] = []
+        self._primed_keys = set()  # AI cache keys whose answer was recorded when a batch put it in the cache
+        self._lock = threading.Lock()
+
+    def record(self, prompt_config, response: dict, latency: float, notion_url: str = "", topic: str = "",
+               prompt_name: str = "", from_cache: bool = False, price_factor: float = 1.0, primed_key: str = None):
+        """Record one AI call; responses served from the AI response cache count as free.
+
+        `price_factor` scales the cost, e.g. 0.5 for calls made through the Batch API.
+        `primed_key` is the AI cache key of a batch answer put in the cache for a later
+        run to replay; that replay is not recorded again (see take_primed).
+        """
+        usage = get_response_usage(response)
+        estimated = not usage
+        if estimated:
+            prompt_text = f"{getattr(prompt_config, 'system_prompt', '')}{getattr(prompt_config, 'user_prompt', '')}"
+            usage = {
+                "prompt_tokens": estimate_tokens(prompt_text),
+                "completion_tokens": estimate_tokens(response.get("message") if isinstance(response, dict) else ""),
+                "cached_tokens": 0,
+            }
+
+        model = getattr(prompt_config, "ai_model", "") or ""
+        call = {
+            "time": time.time(),
+            "url": notion_url,
+            "topic": topic,
+            "prompt": prompt_name,
+            "model": model,
+            "verbosity": getattr(prompt_config, "verbosity", None),
+            "latency": latency,
+            "from_cache": from_cache,
+            "estimated": estimated,
+            **usage,
+            "cost": 0.0 if from_cache else self._get_cost(model, usage) * price_factor,
+        }
+        with self._lock:
+            self._calls.append(call)
+            if primed_key:
+                self._primed_keys.add(primed_key)
+
+    def take_primed(self, cache_key: str) -> bool:
+        """Return True (once) if the answer of this AI cache key was already recorded by a batch."""
+        with self._lock:
+            if cache_key in self._primed_keys:
+                self._primed_keys.discard(cache_key)
+                return True
+            return False
+
+    def get_calls(self) -> List[Dict]:
+        with self._lock:
+            return [dict(call) for call in self._calls]
+
+    def totals(self) -> Dict:
+        return self._aggregate(self.get_calls())
+
+    def aggregate_by(self, field: str) -> Dict[str, Dict]:
+        """Return {value: totals} grouped by a call field ("url", "topic", "prompt", "model")."""
+        groups: Dict[str, List[Dict]] = {}
+        for call in self.get_calls():
+            groups.setdefault(str(call.get(field) or ""), []).append(call)
+        return {key: self._aggregate(calls) for key, calls in groups.items()}
+
+    def format_summary(self) -> str:
+        totals = self.totals()
+        if totals["calls"] == 0:
+            return "[INFO][AIUsageTracker] No AI calls recorded."
+
+        lines = [
+            "=== AI usage ===",
+            f"Calls: {totals['calls']} ({totals['cached_calls']} from cache)"
+            f"{', token counts partly estimated' if totals['estimated_calls'] else ''}",
+            f"Tokens: {totals['prompt_tokens']} in ({totals['cached_tokens']} cached, "
+            f"{get_cached_ratio(totals):.0%} prefix cache hits) / {totals['completion_tokens']} out",
+            f"Cost: ${totals['cost']:.4f}   AI time: {totals['latency']:.1f}s",
+        ]
+        if totals["cached_calls"]:
+            lines.append(f"Saved by cache: {totals['saved_prompt_tokens']} in / {totals['saved_completion_tokens']} out")
+        for label, field in (("prompt", "prompt"), ("topic", "topic")):
+            groups = self.aggregate_by(field)
+            if len(groups) < 2 and "" in groups:
+                continue
+            lines.append(f"By {label}:")
+            for key, stats in sorted(groups.items(), key=lambda item: item[1]["cost"], reverse=True):
+                lines.append(
+                    f"  {key or '-'}: {stats['calls']} call(s), {stats['prompt_tokens']} in "
+                    f"({stats['cached_tokens']} cached) / {stats['completion_tokens']} out, ${stats['cost']:.4f}, {stats['latency']:.1f}s"
+                )
+        return "\n".join(lines)
+
+    def export_json(self, path: str):
+        """Write totals, the per-post/topic/prompt aggregates and every call to `path`."""
+        report = {
+            "totals": self.totals(),
+            "by_post": self.aggregate_by("url"),
+            "by_topic": self.aggregate_by("topic"),
+            "by_prompt": self.aggregate_by("prompt"),
+            "calls": self.get_calls(),
+        }
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+    def _get_cost(self, model: str, usage: Dict) -> float:
+        input_price, output_price, *cached_price = self.prices.get(model, (0.0, 0.0))
+        cached_input_price = cached_price[0] if cached_price else input_price
+        # prompt_tokens includes the cached tokens, which OpenAI bills at the cached input price
+        cached_tokens = min(usage["cached_tokens"], usage["prompt_tokens"])
+        return (
+            (usage["prompt_tokens"] - cached_tokens) * input_price
+            + cached_tokens * cached_input_price
+            + usage["completion_tokens"] * output_price
+        ) / 1_000_000
+
+    @staticmethod
+    def _aggregate(calls: List[Dict]) -> Dict:
+        spent = [call for call in calls if not call["from_cache"]]
+        saved = [call for call in calls if call["from_cache"]]
+        return {
+            "calls": len(calls),
+            "cached_calls": len(saved),
+            "estimated_calls": sum(1 for call in calls if call["estimated"]),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in spent),
+            "completion_tokens": sum(call["completion_tokens"] for call in spent),
+            "cached_tokens": sum(call["cached_tokens"] for call in spent),
+            "saved_prompt_tokens": sum(call["prompt_tokens"] for call in saved),
+            "saved_completion_tokens": sum(call["completion_tokens"] for call in saved),
+            "cost": sum(call["cost"] for call in calls),
+            "latency": sum(call["latency"] for call in calls),
+        }
@@ -0,0 +1,98 @@
+"""
+Coroutine-based OpenAI and Notion calls of the async pipeline (koala_main.async_write_post).
+
+A URL waiting for OpenAI or Notion holds no thread, so one event loop can keep hundreds of
+requests in flight. The prompts are sent through AsyncOpenAI, configured like the client of
+chatgpt_api (see ai_stream.get_openai_client_config), and the Notion page updates through
+notion_client.AsyncClient with the token of notion_config. Every call goes through the
+shared rate limits (rate_limiter.acall_limited).
+
+The SDK clients keep their connection pools on the event loop they are first used on, so
+each run creates its own AsyncServices and closes it at the end.
+"""
+
+from notion_config import (
+    NOTION_TOKEN,
+    POST_POST_STATUS_PROP,
+    POST_POST_STATUS_PUBLISHED_ID,
+    POST_AI_IMAGE_PROMPT_PROP,
+)
+from ai_stream import build_sdk_chat_request, get_openai_client_config
+from rate_limiter import acall_limited, is_openai_throttled, RATE_LIMIT_NOTION, RATE_LIMIT_OPENAI
+
+# Notion rejects rich text items longer than this
+NOTION_RICH_TEXT_MAX_CHARS = 2000
+
+
+class AsyncServices:
+    """AsyncOpenAI and notion_client.AsyncClient of one event loop, created on first use."""
+
+    def __init__(self, openai_client=None, notion_client=None):
+        """
+        Args:
+            openai_client: openai.AsyncOpenAI (or a stand-in); created on first use if None.
+            notion_client: notion_client.AsyncClient (or a stand-in); created on first use if None.
+        """
+        self._openai = openai_client
+        self._notion = notion_client
+        self._owned = []  # Clients created here, closed by aclose
+
+    @property
+    def openai(self):
+        if self._openai is None:
+            from openai import AsyncOpenAI
+
+            self._openai = AsyncOpenAI(**get_openai_client_config())
+            self._owned.append(self._openai.close)
+        return self._openai
+
+    @property
+    def notion(self):
+        if self._notion is None:
+            from notion_client import AsyncClient
+
+            self._notion = AsyncClient(auth=NOTION_TOKEN)
+            self._owned.append(self._notion.aclose)
+        return self._notion
+
+    async def aclose(self):
+        """Close the clients created by this instance."""
+        owned, self._owned = self._owned, []
+        for close in owned:
+            await close()
+
+    async def send_prompt(self, prompt_config, callback=print) -> dict:
+        """Send a prompt and return the same {"message", "error", "usage"} dict as send_prompt_to_openai."""
+        return await acall_limited(RATE_LIMIT_OPENAI, self._send_prompt, prompt_config, limiter_callback=callback, is_throttled=is_openai_throttled)
+
+    async def update_post_status(self, post: dict, status_id, test=False, callback=print) -> dict:
+        """Set the post status of a Notion page (notion_api.update_post_status) and return the updated page."""
+        if test:
+            return post
+        # The page tells whether the property is a status or a select
+        status_type = (post.get("properties", {}).get(POST_POST_STATUS_PROP) or {}).get("type", "status")
+        return await self._update_page(post, {POST_POST_STATUS_PROP: {status_type: {"id": status_id}}}, callback)
+
+    async def update_post_status_to_published(self, post: dict, test=False, callback=print) -> dict:
+        return await self.update_post_status(post, POST_POST_STATUS_PUBLISHED_ID, test=test, callback=callback)
+
+    async def update_post_ai_img_prompt(self, post: dict, prompt: str, callback=print) -> dict:
+        """Set the AI image prompt of a Notion page (notion_api.update_post_ai_img_prompt) and return the updated page."""
+        rich_text = [
+            {"type": "text", "text": {"content": prompt[start:start + NOTION_RICH_TEXT_MAX_CHARS]}}
+            for start in range(0, len(prompt), NOTION_RICH_TEXT_MAX_CHARS)
+        ]
+        return await self._update_page(post, {POST_AI_IMAGE_PROMPT_PROP: {"rich_text": rich_text}}, callback)
+
+    async def _send_prompt(self, prompt_config) -> dict:
+        from openai import OpenAIError
+
+        try:
+            completion = await self.openai.chat.completions.create(**build_sdk_chat_request(prompt_config))
+        except OpenAIError as e:
+            return {"message": str(e), "error": type(e).__name__}
+        usage = completion.usage.model_dump() if completion.usage is not None else None
+        return {"message": completion.choices[0].message.content or "", "error": "", "usage": usage}
+
+    async def _update_page(self, post: dict, properties: dict, callback=print) -> dict:
+        return await acall_limited(RATE_LIMIT_NOTION, self.notion.pages.update, page_id=post["id"], properties=properties, limiter_callback=callback)
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from typing import List
+
+from settings import BATCH_JOURNAL_PATH, BATCH_JOURNAL_MAX_AGE_SECONDS
+
+# Jobs the journal tracks
+JOURNAL_JOB_WRITE_POST = "write_post"
+JOURNAL_JOB_ADD_WP_IMGS = "add_wp_imgs"
+
+# write_post stages, in pipeline order
+JOURNAL_STAGE_STATUS_SET_UP = "status_set_up"
+JOURNAL_STAGE_TEXT_GENERATED = "text_generated"
+JOURNAL_STAGE_AI_IMG_PROMPT_UPDATED = "ai_img_prompt_updated"
+JOURNAL_STAGE_DRAFT_GENERATED = "draft_generated"
+JOURNAL_STAGE_WP_POST_CREATED = "wp_post_created"
+JOURNAL_STAGE_PUBLISHED = "published"
+
+# add_wp_imgs stages
+JOURNAL_STAGE_IMAGES_ADDED = "images_added"
+
+# Stages that changed WordPress: a URL holding one never expires, since starting it from
+# scratch would create a duplicate post or upload the images again
+JOURNAL_PERMANENT_STAGES = (JOURNAL_STAGE_WP_POST_CREATED, JOURNAL_STAGE_IMAGES_ADDED)
+
+# Marks a URL as finished; its stages are dropped so a later batch starts from scratch
+JOURNAL_STAGE_DONE = "done"
+
+
+class BatchJournal:
+    """Append-only JSONL journal of the stages each Notion URL has completed.
+
+    Every finished stage is written as one line and flushed to disk immediately, so a
+    batch that crashes half-way can be rerun: each URL resumes after its last committed
+    stage instead of regenerating text or creating duplicate WordPress posts.
+    Once a URL is done its stages are forgotten, and so are the stages of a URL that has
+    not advanced for `max_age_seconds` before reaching WordPress: its Notion page may have
+    been edited since, so the stored text and statuses can no longer be trusted, and they
+    are cheap to redo. A URL past a JOURNAL_PERMANENT_STAGES stage always resumes from it.
+    """
+
+    def __init__(self, path: str = BATCH_JOURNAL_PATH, max_age_seconds: float = BATCH_JOURNAL_MAX_AGE_SECONDS, callback=print):
+        """
+        Args:
+            path: JSONL file of the journal.
+            max_age_seconds: Age of the last committed stage after which an unfinished URL
+                that has not reached WordPress starts from scratch; 0 or less keeps unfinished
+                URLs forever.
+            callback: Logging callback.
+        """
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._stages = {}  # (job, notion_url) -> {stage: data}
+        self._updated = {}  # (job, notion_url) -> time of the last committed stage
+        self._load()
+
+    def get_stages(self, job: str, notion_url: str) -> dict:
+        """Return {stage: data} for the stages already committed for the URL."""
+        with self._lock:
+            return dict(self._get_live_stages((job, notion_url)))
+
+    def has_stage(self, job: str, notion_url: str, stage: str) -> bool:
+        with self._lock:
+            return stage in self._get_live_stages((job, notion_url))
+
+    def get_resumable_urls(self, job: str, notion_urls: List[str]) -> List[str]:
+        """Return the URLs (in input order) that a previous run left unfinished."""
+        with self._lock:
+            return [url for url in notion_urls if self._get_live_stages((job, url))]
+
+    def record(self, job: str, notion_url: str, stage: str, data=None):
+        """Commit a finished stage for the URL."""
+        with self._lock:
+            entry = self._append({"job": job, "url": notion_url, "stage": stage, "data": data})
+            self._apply(job, notion_url, stage, data, entry["time"])
+
+    def complete(self, job: str, notion_url: str, stage: str, data=None):
+        """Commit the final stage of the URL and forget its journal entry."""
+        with self._lock:
+            self._append({"job": job, "url": notion_url, "stage": stage, "data": data})
+            self._append({"job": job, "url": notion_url, "stage": JOURNAL_STAGE_DONE, "data": None})
+            self._apply(job, notion_url, JOURNAL_STAGE_DONE, None)
+
+    def forget(self, job: str, notion_url: str):
+        """Drop the URL's entry so the next run starts it from scratch."""
+        with self._lock:
+            if (job, notion_url) not in self._stages:
+                return
+            self._append({"job": job, "url": notion_url, "stage": JOURNAL_STAGE_DONE, "data": None})
+            self._apply(job, notion_url, JOURNAL_STAGE_DONE, None)
+
+    def _get_live_stages(self, key: tuple) -> dict:
+        """Return the stages of the (job, URL), dropping them first if they are too old and regenerable."""
+        stages = self._stages.get(key, {})
+        if stages and self._is_expired(self._updated[key]) and not any(stage in stages for stage in JOURNAL_PERMANENT_STAGES):
+            self.callback(f"[INFO][BatchJournal] Dropping the stages of {key[1]} ({key[0]}): unfinished for too long, it starts from scratch")
+            self._stages.pop(key)
+            self._updated.pop(key)
+        return self._stages.get(key, {})
+
+    def _is_expired(self, updated: float) -> bool:
+        return self.max_age_seconds > 0 and time.time() - updated > self.max_age_seconds
+
+    def _apply(self, job: str, notion_url: str, stage: str, data, recorded_at: float = None):
+        key = (job, notion_url)
+        if stage == JOURNAL_STAGE_DONE:
+            self._stages.pop(key, None)
+            self._updated.pop(key, None)
+        else:
+            self._stages.setdefault(key, {})[stage] = data
+            self._updated[key] = time.time() if recorded_at is None else recorded_at
+
+    def _append(self, entry: dict) -> dict:
+        entry["time"] = time.time()
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return entry
+
+    def _load(self):
+        """Replay the journal file; rewrite it without finished URLs when it has grown stale."""
+        if not os.path.exists(self.path):
+            return
+
+        line_count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                line_count += 1
+                try:
+                    entry = json.loads(line)
+                    self._apply(entry["job"], entry["url"], entry["stage"], entry.get("data"), entry.get("time"))
+                except (ValueError, KeyError) as e:
+                    # A crash can leave a truncated last line behind
+                    self.callback(f"[WARNING][BatchJournal] Skipping unreadable line {line_no} in '{self.path}': {e}")
+
+        for key in [key for key, updated in self._updated.items() if self._is_expired(updated)]:
+            self._get_live_stages(key)
+
+        live_line_count = sum(len(stages) for stages in self._stages.values())
+        if line_count > 2 * live_line_count + 100:
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for (job, notion_url), stages in self._stages.items():
+                for stage, data in stages.items():
+                    # The stage time is kept: it decides when the URL expires
+                    entry = {"job": job, "url": notion_url, "stage": stage, "data": data, "time": self._updated[(job, notion_url)]}
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
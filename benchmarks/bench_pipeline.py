@@ -0,0 +1,225 @@
+"""
+End-to-end throughput benchmark of write_post / add_wp_imgs against local fake services.
+
+Starts fake Notion, OpenAI and WordPress servers (see fake_services.py), points the
+pipeline at them (see stand_ins.py) and runs the real pipeline for 1, 10 and 100 URLs.
+Reports posts/minute, per-stage latency (p50/p95/max from StageTimer), rate limiter waits
+and memory (Python peak from tracemalloc, process max RSS where available).
+
+Run from the repository root, with the sibling repositories the app needs on the path:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --job add_wp_imgs --sizes 1 10 --workers 4
+    python benchmarks/bench_pipeline.py --latency-ms 300 --jitter-ms 100 --error-rate 0.05 --output bench.json
+    python benchmarks/bench_pipeline.py --baseline bench.json --max-regression 0.2
+
+With --baseline, exits with status 1 if posts/minute of any size dropped by more than
+--max-regression compared to the saved results.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_services import FakeNotion, FakeOpenAI, FakeWordPress, FakeServiceConfig
+from stand_ins import install_stand_ins
+
+import koala_main
+from notion_config import PostStatuses, POST_POST_TYPE_ROUNDUP_ID
+from pipeline_timing import StageTimer
+from ai_usage import AIUsageTracker
+from rate_limiter import get_limiter_metrics, reset_limiter_metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_JOB_WRITE_POST = "write_post"
+BENCH_JOB_ADD_WP_IMGS = "add_wp_imgs"
+BENCH_WEBSITE = "bench.example.com"
+
+
+def _make_images(folder: str, count: int, size: int = 256):
+    from PIL import Image
+
+    for idx in range(count):
+        Image.new("RGB", (size, size), ((idx * 40) % 256, 120, 200)).save(os.path.join(folder, f"{idx + 1}.jpg"), quality=80)
+
+
+def _add_pages(notion, notion_service: FakeNotion, wordpress_service: FakeWordPress, url_count: int, job: str, items_per_post: int, images: int) -> list:
+    status = PostStatuses.not_started_id if job == BENCH_JOB_WRITE_POST else PostStatuses().post_done_statuses[0]
+    urls = []
+    for idx in range(url_count):
+        page_id = f"bench{idx:05d}"
+        slug = f"bench-post-{idx}"
+        page = notion.make_page(page_id, f"Bench post {idx}", BENCH_WEBSITE, POST_POST_TYPE_ROUNDUP_ID, status, "Recipes", slug)
+        items = [
+            {
+                koala_main.BLOG_POST_IMAGES_TITLE_PROP: f"Item {item}",
+                koala_main.BLOG_POST_IMAGES_NOTES_PROP: "A quick weeknight dish. It is crispy and golden. Kids love it. Serve it warm.",
+                koala_main.BLOG_POST_IMAGES_DESCRIPTION_PROP: f"https://{BENCH_WEBSITE}/item-{item}/",
+            }
+            for item in range(items_per_post)
+        ]
+        notion_service.add_page(page_id, page, items)
+        if job == BENCH_JOB_ADD_WP_IMGS:
+            # The post add_wp_imgs inserts the images into, with one H2 per image
+            content = "".join(f"<h2>Item {item}</h2><p>Text</p>" for item in range(images))
+            wordpress_service.handle("POST", "/wp-json/wp/v2/posts", {}, json.dumps({"slug": slug, "content": content}).encode("utf-8"))
+        urls.append(notion.page_url(page_id))
+    return urls
+
+
+def run_scenario(url_count: int, args, log=lambda msg: None) -> dict:
+    """Run one job for `url_count` fresh URLs and return its measurements."""
+    def config(service_offset: int, latency_ms: float) -> FakeServiceConfig:
+        return FakeServiceConfig(
+            latency=latency_ms / 1000,
+            jitter=args.jitter_ms / 1000,
+            error_rate=args.error_rate,
+            retry_after=args.retry_after,
+            seed=args.seed + service_offset,
+        )
+
+    reset_limiter_metrics()
+    with FakeNotion(config(0, args.notion_latency_ms)) as notion_service, \
+            FakeOpenAI(config(1, args.openai_latency_ms)) as openai_service, \
+            FakeWordPress(config(2, args.wp_latency_ms)) as wordpress_service, \
+            tempfile.TemporaryDirectory() as image_folder:
+        if args.job == BENCH_JOB_ADD_WP_IMGS:
+            _make_images(image_folder, args.images)
+
+        with install_stand_ins(notion_service.base_url, openai_service.base_url, wordpress_service.base_url, image_folder) as notion:
+            urls = _add_pages(notion, notion_service, wordpress_service, url_count, args.job, args.items, args.images)
+            timer = StageTimer()
+            usage = AIUsageTracker()
+            failures = []
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            if args.job == BENCH_JOB_WRITE_POST:
+                results = koala_main.write_post(urls, callback=log, max_workers=args.workers, failures=failures, timer=timer, usage=usage)
+            else:
+                results = koala_main.add_wp_imgs(urls, callback=log, max_workers=args.workers, failures=failures)
+            elapsed = time.perf_counter() - start
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        requests = {service.name: {"requests": service.request_count, "errors": service.error_count}
+                    for service in (notion_service, openai_service, wordpress_service)}
+
+    return {
+        "urls": url_count,
+        "done": len(results),
+        "failed": len(failures),
+        "seconds": elapsed,
+        "posts_per_minute": len(results) / elapsed * 60 if elapsed else 0.0,
+        "stages": timer.summarize(),
+        "ai_calls": usage.totals()["calls"],
+        "limiters": get_limiter_metrics(),
+        "requests": requests,
+        "python_peak_mb": peak_bytes / 1024 / 1024,
+        "max_rss_mb": _get_max_rss_mb(),
+    }
+
+
+def format_report(results: list, args) -> str:
+    lines = [
+        f"=== {args.job} benchmark: {args.workers} worker(s), latency notion/openai/wp "
+        f"{args.notion_latency_ms}/{args.openai_latency_ms}/{args.wp_latency_ms} ms ±{args.jitter_ms} ms, "
+        f"error rate {args.error_rate:.0%} ===",
+        f"{'URLs':>6} {'done':>6} {'failed':>6} {'seconds':>9} {'posts/min':>10} {'py peak MB':>11} {'max RSS MB':>11}",
+    ]
+    for result in results:
+        rss = f"{result['max_rss_mb']:.1f}" if result["max_rss_mb"] is not None else "-"
+        lines.append(
+            f"{result['urls']:>6} {result['done']:>6} {result['failed']:>6} {result['seconds']:>9.2f} "
+            f"{result['posts_per_minute']:>10.1f} {result['python_peak_mb']:>11.1f} {rss:>11}"
+        )
+    for result in results:
+        if not result["stages"]:
+            continue
+        lines.append(f"Stages at {result['urls']} URL(s):")
+        for stage, stats in result["stages"].items():
+            lines.append(f"  {stage:<16} n={stats['count']:<5} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s max={stats['max']:.3f}s")
+        waits = ", ".join(f"{name} {stats['wait_total']:.1f}s/{stats['throttles']} throttled" for name, stats in sorted(result["limiters"].items()) if stats["calls"])
+        if waits:
+            lines.append(f"  limiter waits: {waits}")
+    return "\n".join(lines)
+
+
+def check_regression(results: list, baseline_path: str, max_regression: float) -> list:
+    """Return one message per size whose posts/minute fell more than `max_regression` below the baseline."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result["urls"]: result for result in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["urls"])
+        if previous is None or not previous["posts_per_minute"]:
+            continue
+        change = result["posts_per_minute"] / previous["posts_per_minute"] - 1
+        if change < -max_regression:
+            regressions.append(
+                f"{result['urls']} URL(s): {result['posts_per_minute']:.1f} posts/min vs {previous['posts_per_minute']:.1f} in the baseline ({change:+.0%})"
+            )
+    return regressions
+
+
+def _get_max_rss_mb():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against local fake Notion, OpenAI and WordPress services")
+    parser.add_argument("--job", choices=[BENCH_JOB_WRITE_POST, BENCH_JOB_ADD_WP_IMGS], default=BENCH_JOB_WRITE_POST)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="Numbers of URLs to run")
+    parser.add_argument("--workers", type=int, default=4, help="max_workers of the pipeline")
+    parser.add_argument("--notion-latency-ms", type=float, default=150)
+    parser.add_argument("--openai-latency-ms", type=float, default=2000)
+    parser.add_argument("--wp-latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Random latency added or removed per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds of the injected 429s")
+    parser.add_argument("--items", type=int, default=10, help="Roundup items per post")
+    parser.add_argument("--images", type=int, default=5, help="Images per post (add_wp_imgs)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Print the pipeline log")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare posts/minute with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed posts/minute drop against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    log = print if args.verbose else (lambda msg: None)
+    results = []
+    for url_count in args.sizes:
+        print(f"[INFO][bench_pipeline] Running {args.job} for {url_count} URL(s)...")
+        results.append(run_scenario(url_count, args, log=log))
+    print(format_report(results, args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2, default=str)
+        print(f"[INFO][bench_pipeline] Results written to {args.output}")
+
+    if args.baseline:
+        regressions = check_regression(results, args.baseline, args.max_regression)
+        for regression in regressions:
+            print(f"[ERROR][bench_pipeline] Throughput regression at {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of text_segmentation against the previous PostWriter._split_into_paragraphs.
+
+Run from the repository root:
+    python benchmarks/bench_text_segmentation.py [--items 10000] [--repeat 5]
+Exits with status 1 if the new splitter is slower than the old one.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_segmentation import split_into_paragraphs, split_into_paragraphs_batch
+
+_SAMPLE_SENTENCES = [
+    "Baked salmon is a healthy and delicious option for dinner.",
+    "It's packed with omega-3 fatty acids and protein!",
+    "Add 1 tsp. salt and 2.5 cups of flour.",
+    "Why not try it tonight?",
+    "Dr. Smith swears by it... and so do we.",
+    "Serve it with your favorite vegetables for a complete meal.",
+]
+
+
+def legacy_split_into_paragraphs(text: str, sentences_per_paragraph: int = 2) -> str:
+    """PostWriter._split_into_paragraphs before text_segmentation, kept as the baseline."""
+    if not text or not text.strip():
+        return text
+    import re
+    sentences = re.split(r'([.!?]+\s+)', text)
+    reconstructed = []
+    for i in range(0, len(sentences) - 1, 2):
+        if i + 1 < len(sentences):
+            reconstructed.append(sentences[i] + sentences[i + 1].rstrip())
+    if len(sentences) % 2 == 1 and sentences[-1].strip():
+        reconstructed.append(sentences[-1].strip())
+    paragraphs = []
+    for i in range(0, len(reconstructed), sentences_per_paragraph):
+        paragraph = ' '.join(reconstructed[i:i + sentences_per_paragraph])
+        if paragraph.strip():
+            paragraphs.append(paragraph.strip())
+    return '\n'.join(paragraphs)
+
+
+def make_items(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(_SAMPLE_SENTENCES) for _ in range(rng.randint(2, 8))) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the paragraph splitter")
+    parser.add_argument("--items", type=int, default=10000, help="Number of roundup item bodies")
+    parser.add_argument("--repeat", type=int, default=5, help="Best-of repeats")
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    cases = {
+        "legacy (per item)": lambda: [legacy_split_into_paragraphs(text) for text in items],
+        "split_into_paragraphs (per item)": lambda: [split_into_paragraphs(text) for text in items],
+        "split_into_paragraphs_batch": lambda: split_into_paragraphs_batch(items),
+    }
+    best = {name: min(timeit.repeat(func, number=1, repeat=args.repeat)) for name, func in cases.items()}
+
+    print(f"{args.items} items, best of {args.repeat}:")
+    for name, seconds in best.items():
+        print(f"  {name:<34} {seconds * 1000:8.1f} ms  ({seconds / args.items * 1e6:.2f} us/item)")
+
+    new_best = min(best["split_into_paragraphs (per item)"], best["split_into_paragraphs_batch"])
+    if new_best > best["legacy (per item)"]:
+        print("[ERROR][bench_text_segmentation] New splitter is slower than the legacy one")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Local HTTP stand-ins for the Notion, OpenAI and WordPress APIs used by the benchmarks.
+
+Each service runs a ThreadingHTTPServer on 127.0.0.1 in a background thread and adds a
+configurable latency (with jitter) to every request. A configurable share of the requests
+fails with a throttling status (429 with Retry-After by default), so the retry and rate
+limiting paths are exercised too. The servers keep their data in memory only.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FAKE_AI_WORDS = (
+    "crispy golden tender creamy zesty smoky savory fresh cozy easy weeknight family "
+    "garlic lemon herb butter honey spicy roasted baked grilled salad soup pasta"
+).split()
+
+
+class FakeServiceConfig:
+    """Latency and failure profile of one fake service."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 429, retry_after: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency: Seconds added to every request.
+            jitter: Up to this many seconds are added or removed at random.
+            error_rate: Share of requests (0-1) answered with `error_status` instead.
+            error_status: HTTP status of the injected failures.
+            retry_after: Retry-After seconds sent with the injected failures.
+            seed: Seed of the latency/failure random generator, for repeatable runs.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+class FakeService:
+    """Base class: a fake HTTP API with latency, jitter and injected failures.
+
+    Subclasses implement `handle(method, path, query, body)` returning (status, payload).
+    """
+
+    name = "service"
+
+    def __init__(self, config: FakeServiceConfig = None):
+        self.config = config or FakeServiceConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.request_count = 0
+        self.error_count = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                service._serve(self, "GET")
+
+            def do_POST(self):
+                service._serve(self, "POST")
+
+            def do_PATCH(self):
+                service._serve(self, "PATCH")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes):
+        raise NotImplementedError
+
+    def _serve(self, handler: BaseHTTPRequestHandler, method: str):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        with self._lock:
+            self.request_count += 1
+            delay = self.config.latency + self._random.uniform(-self.config.jitter, self.config.jitter)
+            fail = self._random.random() < self.config.error_rate
+            if fail:
+                self.error_count += 1
+        if delay > 0:
+            time.sleep(delay)
+
+        headers = {}
+        if fail:
+            status, payload = self.config.error_status, {"error": {"message": f"Injected {self.config.error_status} from fake {self.name}", "type": "rate_limit_exceeded"}}
+            headers["Retry-After"] = str(self.config.retry_after)
+        else:
+            url = urlparse(handler.path)
+            try:
+                status, payload = self.handle(method, url.path, parse_qs(url.query), body)
+            except KeyError as e:
+                status, payload = 404, {"error": {"message": f"Not found: {e}"}}
+
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class FakeNotion(FakeService):
+    """Notion pages and their roundup items.
+
+    GET   /pages/<id>        -> page
+    PATCH /pages/<id>        -> page with the given properties/status applied
+    GET   /pages/<id>/items  -> roundup items of the page
+    """
+
+    name = "notion"
+
+    def __init__(self, config: FakeServiceConfig = None):
+        super().__init__(config)
+        self.pages: Dict[str, dict] = {}
+        self.items: Dict[str, List[dict]] = {}
+
+    def add_page(self, page_id: str, page: dict, items: List[dict] = None):
+        with self._lock:
+            self.pages[page_id] = page
+            self.items[page_id] = items or []
+
+    def handle(self, method, path, query, body):
+        parts = path.strip("/").split("/")
+        if parts[0] != "pages" or len(parts) < 2:
+            raise KeyError(path)
+        page_id = parts[1]
+        with self._lock:
+            if len(parts) == 3 and parts[2] == "items":
+                return 200, {"results": self.items[page_id]}
+            page = self.pages[page_id]
+            if method == "PATCH":
+                update = json.loads(body or b"{}")
+                page = dict(page, **{key: value for key, value in update.items() if key != "properties"})
+                page["properties"] = dict(page.get("properties", {}), **update.get("properties", {}))
+                self.pages[page_id] = page
+            return 200, page
+
+
+class FakeOpenAI(FakeService):
+    """OpenAI Chat Completions endpoint (non-streaming).
+
+    Answers a json_schema response_format with a JSON object filling every property of the
+    schema, and any other request with a short plain-text answer. Usage numbers are
+    derived from the message lengths.
+    """
+
+    name = "openai"
+
+    def __init__(self, config: FakeServiceConfig = None, words_per_string: int = 40):
+        super().__init__(config)
+        self.words_per_string = words_per_string
+
+    def handle(self, method, path, query, body):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            raise KeyError(path)
+        request = json.loads(body or b"{}")
+        response_format = request.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema")
+        content = json.dumps(self._fill_schema(schema)) if schema else self._sentence(8)
+
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in request.get("messages", []))
+        prompt_tokens = prompt_chars // 4
+        return 200, {
+            "id": f"chatcmpl-fake-{self.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        }
+
+    def _fill_schema(self, schema: dict):
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            return {key: self._fill_schema(value) for key, value in schema.get("properties", {}).items()}
+        if schema_type == "array":
+            return [self._fill_schema(schema.get("items", {"type": "string"})) for _ in range(5)]
+        return self._sentence(self.words_per_string)
+
+    def _sentence(self, word_count: int) -> str:
+        with self._lock:
+            words = [self._random.choice(FAKE_AI_WORDS) for _ in range(word_count)]
+        sentences = [" ".join(words[i:i + 10]).capitalize() + "." for i in range(0, len(words), 10)]
+        return " ".join(sentences)
+
+
+class FakeWordPress(FakeService):
+    """WordPress REST API subset: site info, posts and media.
+
+    GET  /wp-json                      -> site info
+    POST /wp-json/wp/v2/posts          -> created post
+    GET  /wp-json/wp/v2/posts?slug=... -> matching posts
+    GET  /wp-json/wp/v2/posts/<id>     -> post
+    POST /wp-json/wp/v2/posts/<id>     -> updated post
+    POST /wp-json/wp/v2/media          -> uploaded media
+    """
+
+    name = "wordpress"
+
+    def __init__(self, config: FakeServiceConfig = None):
+        super().__init__(config)
+        self.posts: Dict[int, dict] = {}
+        self.media: Dict[int, dict] = {}
+        self._next_id = 1
+
+    def handle(self, method, path, query, body):
+        if path.rstrip("/") == "/wp-json":
+            return 200, {"name": "Fake WordPress", "url": self.base_url}
+
+        match = re.fullmatch(r"/wp-json/wp/v2/(posts|media)(?:/(\d+))?/?", path)
+        if match is None:
+            raise KeyError(path)
+        collection, item_id = match.group(1), match.group(2)
+
+        with self._lock:
+            if collection == "media":
+                media_id = self._new_id()
+                media = {"id": media_id, "source_url": f"{self.base_url}/media/{media_id}.jpg", "bytes": len(body)}
+                self.media[media_id] = media
+                return 201, media
+
+            if item_id is not None:
+                post = self.posts[int(item_id)]
+                if method == "POST":
+                    post.update(json.loads(body or b"{}"))
+                return 200, post
+
+            if method == "GET":
+                slug = (query.get("slug") or [""])[0]
+                return 200, [post for post in self.posts.values() if post["slug"] == slug]
+
+            data = json.loads(body or b"{}")
+            post_id = self._new_id()
+            slug = data.get("slug") or f"post-{post_id}"
+            post = {"id": post_id, "slug": slug, "link": f"{self.base_url}/{slug}/", **data}
+            self.posts[post_id] = post
+            return 201, post
+
+    def _new_id(self) -> int:
+        new_id = self._next_id
+        self._next_id += 1
+        return new_id
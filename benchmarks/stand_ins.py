@@ -0,0 +1,287 @@
+"""
+Client-side stand-ins that point the pipeline at the fake services of fake_services.py.
+
+The pipeline talks to Notion, OpenAI and WordPress through a few library functions
+(notion_api, chatgpt_api.send_prompt_to_openai, wp_client.WordPressClient,
+wp_utils.test_wp_connection), the AsyncServices of the async core, plus the ConfigKeeper
+lookups that depend on the user's setup. `install_stand_ins` swaps exactly those names, in the modules that imported them,
+for thin HTTP clients of the fake services. Everything else (checks, PostWriter,
+formatting, rate limiting, journaling, timing) is the real code.
+
+HTTP errors are raised as urllib HTTPErrors (httpx HTTPStatusErrors on the event loop),
+which carry the status and the Retry-After header, so the shared rate limiter retries the
+injected 429s like real ones.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from openai import AsyncOpenAI, OpenAI, OpenAIError
+
+from ai_stream import build_chat_request
+from async_services import AsyncServices
+from rate_limiter import acall_limited, RATE_LIMIT_NOTION
+from ai_gen_config import POST_TOPIC_RECIPES
+from notion_config import (
+    POST_WP_CATEGORY_PROP,
+    POST_SLUG_PROP,
+    POST_AI_IMAGE_PROMPT_PROP,
+    POST_POST_STATUS_PUBLISHED_ID,
+)
+
+# Modules whose imported names are swapped
+_PIPELINE_MODULES = ("koala_main", "checks", "post_writer", "wp_post_gen", "update_wp_content", "wp_client_pool")
+
+
+def http_json(method: str, url: str, payload=None, data: bytes = None, timeout: float = 60):
+    """Send a request and return the decoded JSON answer; raises urllib.error.HTTPError on 4xx/5xx."""
+    headers = {}
+    if payload is not None:
+        data = json.dumps(payload).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, method=method, headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"null")
+
+
+class NotionStandIn:
+    """notion_api functions backed by FakeNotion. Pages are plain dicts (see make_page)."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    @staticmethod
+    def make_page(page_id: str, title: str, website: str, post_type: str, status: str, categories, slug: str) -> dict:
+        return {
+            "id": page_id,
+            "title": title,
+            "website": website,
+            "post_type": post_type,
+            "status": status,
+            "properties": {POST_WP_CATEGORY_PROP: categories, POST_SLUG_PROP: slug, POST_AI_IMAGE_PROMPT_PROP: ""},
+        }
+
+    def page_url(self, page_id: str) -> str:
+        return f"https://www.notion.so/bench/{page_id}"
+
+    def get_post_title_website_from_url(self, notion_url: str):
+        page = http_json("GET", f"{self.base_url}/pages/{self._page_id(notion_url)}")
+        return page, page["title"], page["website"]
+
+    def get_post_images_for_blog_url(self, notion_url: str):
+        return http_json("GET", f"{self.base_url}/pages/{self._page_id(notion_url)}/items")["results"]
+
+    def update_post_status(self, post: dict, status_id, test=False):
+        return post if test else self._patch(post, {"status": status_id})
+
+    def update_post_status_to_published(self, post: dict, test=False):
+        return self.update_post_status(post, POST_POST_STATUS_PUBLISHED_ID, test=test)
+
+    def update_post_ai_img_prompt(self, post: dict, prompt: str):
+        return self._patch(post, {"properties": {POST_AI_IMAGE_PROMPT_PROP: prompt}})
+
+    @staticmethod
+    def get_page_property(post: dict, prop: str):
+        return post["properties"].get(prop)
+
+    @staticmethod
+    def get_post_type(post: dict):
+        return post["post_type"]
+
+    @staticmethod
+    def get_post_title(post: dict):
+        return post["title"]
+
+    @staticmethod
+    def get_post_slug(post: dict):
+        return post["properties"].get(POST_SLUG_PROP)
+
+    @staticmethod
+    def get_post_status(post: dict):
+        return post["status"]
+
+    def _patch(self, post: dict, update: dict) -> dict:
+        return http_json("PATCH", f"{self.base_url}/pages/{post['id']}", payload=update)
+
+    @staticmethod
+    def _page_id(notion_url: str) -> str:
+        return notion_url.rstrip("/").rsplit("/", 1)[-1]
+
+
+class OpenAIStandIn:
+    """send_prompt_to_openai sending the request PostWriter builds to FakeOpenAI through the OpenAI SDK."""
+
+    def __init__(self, base_url: str):
+        self.client = OpenAI(base_url=f"{base_url}/v1", api_key="bench", max_retries=0)
+
+    def send_prompt_to_openai(self, prompt_config, test=False) -> dict:
+        request = build_chat_request(prompt_config)
+        verbosity = request.pop("verbosity", None)
+        if verbosity is not None:
+            request["extra_body"] = {"verbosity": verbosity}
+        try:
+            completion = self.client.chat.completions.create(**request)
+        except OpenAIError as e:
+            return {"message": str(e), "error": type(e).__name__}
+        return {"message": completion.choices[0].message.content, "error": "", "usage": completion.usage.model_dump()}
+
+
+class AsyncServicesStandIn(AsyncServices):
+    """AsyncServices whose OpenAI client points at FakeOpenAI and whose Notion updates PATCH FakeNotion."""
+
+    openai_url = ""
+    notion_url = ""
+
+    def __init__(self, openai_client=None, notion_client=None):
+        super().__init__(
+            openai_client=AsyncOpenAI(base_url=f"{self.openai_url}/v1", api_key="bench", max_retries=0),
+            notion_client=httpx.AsyncClient(base_url=self.notion_url, timeout=60),
+        )
+
+    async def aclose(self):
+        await self.openai.close()
+        await self.notion.aclose()
+
+    async def update_post_status(self, post: dict, status_id, test=False, callback=print) -> dict:
+        return post if test else await self._patch(post, {"status": status_id}, callback)
+
+    async def update_post_ai_img_prompt(self, post: dict, prompt: str, callback=print) -> dict:
+        return await self._patch(post, {"properties": {POST_AI_IMAGE_PROMPT_PROP: prompt}}, callback)
+
+    async def _patch(self, post: dict, update: dict, callback=print) -> dict:
+        return await acall_limited(RATE_LIMIT_NOTION, self._send_patch, post["id"], update, limiter_callback=callback)
+
+    async def _send_patch(self, page_id: str, update: dict) -> dict:
+        response = await self.notion.patch(f"/pages/{page_id}", json=update)
+        response.raise_for_status()
+        return response.json()
+
+
+class _PostsEndpoint:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def get(self, id: int):
+        return http_json("GET", f"{self.base_url}/wp-json/wp/v2/posts/{id}")
+
+
+class _RestClient:
+    def __init__(self, base_url: str):
+        self.posts = _PostsEndpoint(base_url)
+
+
+class WordPressStandIn:
+    """WordPressClient subset used by the pipeline, backed by FakeWordPress.
+
+    Content updates fetch and re-save the post; the image formatter itself is not run.
+    """
+
+    base_url = ""  # Set by install_stand_ins
+
+    def __init__(self, website: str, callback=print):
+        self.website = website
+        self.callback = callback
+        self.media_for_post = []
+        info = http_json("GET", f"{self.base_url}/wp-json")
+        self.settings = {"base_url": info["url"]}
+        self.client = _RestClient(self.base_url)
+
+    def create_post(self, title, content, featured_image_path="", category_name="", slug=""):
+        return http_json("POST", f"{self.base_url}/wp-json/wp/v2/posts", payload={
+            "title": title,
+            "content": content,
+            "categories": category_name,
+            "slug": slug,
+            "status": "draft",
+        })
+
+    def upload_media(self, img_path: str, title: str = ""):
+        with open(img_path, "rb") as f:
+            return http_json("POST", f"{self.base_url}/wp-json/wp/v2/media", data=f.read())
+
+    def get_post_id_by_slug(self, slug: str):
+        posts = http_json("GET", f"{self.base_url}/wp-json/wp/v2/posts?slug={slug}")
+        return posts[0]["id"] if posts else None
+
+    def get_h2_headings(self, post_id: int):
+        post = self.client.posts.get(id=post_id)
+        return [(heading, "") for heading in str(post.get("content", "")).split("<h2>")[1:]]
+
+    def set_featured_image_from_media(self, post_id: int, media: dict):
+        return http_json("POST", f"{self.base_url}/wp-json/wp/v2/posts/{post_id}", payload={"featured_media": media["id"]})
+
+    def update_post_content(self, post_id: int, modify_content_func, callback=print):
+        post = self.client.posts.get(id=post_id)
+        return http_json("POST", f"{self.base_url}/wp-json/wp/v2/posts/{post_id}", payload={"content": post.get("content", "")})
+
+
+def test_wp_connection(website: str, tested_websites: dict, issues: list, callback=print):
+    """wp_utils.test_wp_connection against FakeWordPress."""
+    if website in tested_websites:
+        return
+    try:
+        http_json("GET", f"{WordPressStandIn.base_url}/wp-json")
+        tested_websites[website] = True
+    except Exception as e:
+        tested_websites[website] = False
+        issues.append(f"Exception while connecting to WordPress: {e}")
+
+
+@contextlib.contextmanager
+def install_stand_ins(notion_url: str, openai_url: str, wordpress_url: str, image_folder: str = None):
+    """Point the pipeline modules at the fake services for the duration of the block.
+
+    Args:
+        notion_url, openai_url, wordpress_url: Base URLs of the running fake services.
+        image_folder: Folder add_wp_imgs takes the images of every post from.
+
+    Yields:
+        NotionStandIn: used to build the pages and URLs of the benchmark.
+    """
+    import importlib
+
+    notion = NotionStandIn(notion_url)
+    ai = OpenAIStandIn(openai_url)
+    WordPressStandIn.base_url = wordpress_url
+    AsyncServicesStandIn.openai_url, AsyncServicesStandIn.notion_url = openai_url, notion_url
+
+    replacements = {
+        "get_post_title_website_from_url": notion.get_post_title_website_from_url,
+        "get_post_images_for_blog_url": notion.get_post_images_for_blog_url,
+        "update_post_status": notion.update_post_status,
+        "update_post_status_to_published": notion.update_post_status_to_published,
+        "update_post_ai_img_prompt": notion.update_post_ai_img_prompt,
+        "get_page_property": notion.get_page_property,
+        "get_post_type": notion.get_post_type,
+        "get_post_title": notion.get_post_title,
+        "get_post_slug": notion.get_post_slug,
+        "get_post_status": notion.get_post_status,
+        "send_prompt_to_openai": ai.send_prompt_to_openai,
+        "WordPressClient": WordPressStandIn,
+        "AsyncServices": AsyncServicesStandIn,
+        "test_wp_connection": test_wp_connection,
+        "get_post_topic_from_cats": lambda categories=None, callback=print: POST_TOPIC_RECIPES,
+        "get_post_topic_by_cat": lambda notion_post, callback=print: POST_TOPIC_RECIPES,
+        "load_generic_input_folder": lambda: image_folder,
+        "get_post_folder": lambda generic_input_folder, notion_post, for_pins=False: image_folder,
+        "get_ims_in_folder": lambda folder, doSort=False: sorted(os.listdir(folder)),
+    }
+
+    originals = []
+    try:
+        for module_name in _PIPELINE_MODULES:
+            module = importlib.import_module(module_name)
+            for name, replacement in replacements.items():
+                if hasattr(module, name):
+                    originals.append((module, name, getattr(module, name)))
+                    setattr(module, name, replacement)
+        yield notion
+    finally:
+        for module, name, original in reversed(originals):
+            setattr(module, name, original)
@@ -1,10 +1,12 @@
 
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NotionUtils')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'WordPress')))
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 # Use helper utilities from the project (these should be available in the project path)
 from gen_utils import (
@@ -46,8 +48,11 @@ from ai_gen_config import (
     POST_TOPIC_AI_PROMPT_NOUNS,
 )
 from wp_client import WordPressClient
+from wp_client_pool import WPClientPool
 from wp_utils import test_wp_connection
 from post_writer import PostWriter
+from prefetch_store import PrefetchStore
+from rate_limiter import call_limited, RATE_LIMIT_NOTION, RATE_LIMIT_WORDPRESS
 
 MY_KOALA_POST_STATUSES_ALLOWED = [
     PostStatuses.not_started_id,
@@ -60,35 +65,99 @@ MY_KOALA_POST_TYPES_ALLOWED = {
     POST_TOPIC_OUTFITS: [POST_POST_TYPE_SINGLE_ITEM_ID, POST_POST_TYPE_ROUNDUP_ID],
 }
 
-def _resolve_notion_url(notion_url: str, idx: int, url_count: int, results: List[Dict], callback=print):
+class _WPConnectionTests:
+    """Tests each website's WordPress connection once per check run, also across worker threads.
+
+    With a WPClientPool, the shared client of every website that passed is created right
+    away so the writing steps find it ready.
+    """
+
+    def __init__(self, wp_pool: WPClientPool = None):
+        self.wp_pool = wp_pool
+        self.tested_websites: Dict[str, bool] = {}  # Track WP connection test results by website
+        self._website_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def test(self, website: str, issues: List[str], callback=print):
+        with self._lock:
+            website_lock = self._website_locks.setdefault(website, threading.Lock())
+        # Workers checking other websites are not blocked; the same website is only tested once
+        with website_lock:
+            issue_count = len(issues)
+            call_limited(RATE_LIMIT_WORDPRESS, test_wp_connection, website, self.tested_websites, issues, callback, limiter_key=website, limiter_callback=callback)
+            if self.wp_pool is not None and len(issues) == issue_count and website not in self.wp_pool:
+                try:
+                    self.wp_pool.get(website, callback)
+                except Exception as e:
+                    issues.append(f"Exception while connecting to WordPress: {e}")
+
+def prefix_callback(callback, prefix: str):
+    """Tag string log lines with a prefix (e.g. the URL) so parallel logs stay readable."""
+    def prefixed(msg):
+        if isinstance(msg, str) and msg.strip():
+            text = msg.lstrip("\n")
+            msg = f"{msg[:len(msg) - len(text)]}{prefix} {text}"
+        callback(msg)
+    return prefixed
+
+def _run_url_checks(notion_urls: List[str], check_url, max_workers: int = 1, callback=print) -> List[Dict]:
+    """Run `check_url(notion_url, callback)` for every URL, on a thread pool when max_workers > 1.
+
+    Concurrent checks log through a callback that prefixes every line with the URL.
+
+    Args:
+        notion_urls: Deduplicated Notion URLs.
+        check_url: Callable returning the result dict of a URL with issues, or None.
+        max_workers: Number of URLs checked at the same time.
+        callback: Logging callback.
+
+    Returns:
+        list: The result dicts of the URLs with issues, in input order.
+    """
+    url_count = len(notion_urls)
+    slots: List[Optional[Dict]] = [None] * url_count
+
+    if max_workers <= 1 or url_count <= 1:
+        for idx, notion_url in enumerate(notion_urls):
+            slots[idx] = check_url(notion_url, callback)
+            report_progress(idx, url_count, callback)
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, url_count)) as executor:
+            futures = {
+                executor.submit(check_url, notion_url, prefix_callback(callback, f"[{notion_url}]")): idx
+                for idx, notion_url in enumerate(notion_urls)
+            }
+            for done_count, future in enumerate(as_completed(futures)):
+                slots[futures[future]] = future.result()
+                report_progress(done_count, url_count, callback)
+
+    return [result for result in slots if result is not None]
+
+def _resolve_notion_url(notion_url: str):
     """Resolve a Notion URL and handle early-exit errors.
     
     Returns:
-        tuple: (post, title, website) if successful, (None, None, None) if error occurred
+        tuple: (post, title, website, None) if successful, (None, None, None, error_result) if error occurred
     """
     try:
-        post, title, website = get_post_title_website_from_url(notion_url)
+        post, title, website = call_limited(RATE_LIMIT_NOTION, get_post_title_website_from_url, notion_url)
     except Exception as e:
-        results.append({
+        return None, None, None, {
             "url": notion_url,
             "title": None,
             "website": None,
             "issues": [f"Exception resolving URL: {e}"],
-        })
-        report_progress(idx, url_count, callback)
-        return None, None, None
+        }
 
     if website is None:
-        results.append({
+        return None, None, None, {
             "url": notion_url,
             "title": title,
             "website": None,
             "issues": ["Could not determine website (Page is missing Notion template?)"],
-        })
-        report_progress(idx, url_count, callback)
-        return None, None, None
+        }
     
-    return post, title, website
+    return post, title, website, None
 
 def _validate_post_title(post, issues: List[str]):
     """Validate post title and append issues if invalid.
@@ -198,7 +267,7 @@ def _validate_post_status(post, allowed_statuses: List[str], issues: List[str]):
 
     return post_status
 
-def run_checks(notion_urls: List[str], callback=print) -> List[Dict]:
+def run_checks(notion_urls: List[str], callback=print, prefetch: PrefetchStore = None, max_workers: int = 1, wp_pool: WPClientPool = None) -> List[Dict]:
     """
     Run a set of basic checks for each Notion URL and return a structured
     list of results. Each result is a dict with keys:
@@ -207,24 +276,28 @@ def run_checks(notion_urls: List[str], callback=print) -> List[Dict]:
       - website
       - status: 'ok' | 'error' | 'warning'
       - issues: list of issue strings
+
+    When a PrefetchStore is passed, the resolved page, categories, post type and
+    roundup items are recorded in it so the writing steps do not fetch them again.
+    With max_workers > 1 the URLs are checked concurrently; results keep the input order.
+    A WPClientPool is warmed with the client of every website that passed the connection test.
     """
-    results: List[Dict] = []
-    tested_websites: Dict[str, bool] = {}  # Track WP connection test results by website
+    wp_connection_tests = _WPConnectionTests(wp_pool)
 
     notion_urls = dedup_and_trim(notion_urls, callback=callback)
     url_count = len(notion_urls)
     reset_report_progress(url_count, callback)
 
-    for idx, notion_url in enumerate(notion_urls):
+    def check_url(notion_url: str, callback) -> Optional[Dict]:
         callback(f"\n[INFO][run_checks] Starting checks for Notion URL: {notion_url}")
 
-        post, title, website = _resolve_notion_url(notion_url, idx, url_count, results, callback)
+        post, title, website, error_result = _resolve_notion_url(notion_url)
         if post is None:
-            continue
+            return error_result
 
         issues = []
 
-        test_wp_connection(website, tested_websites, issues, callback)
+        wp_connection_tests.test(website, issues, callback)
 
         # Basic property reads and validations
         post_title = _validate_post_title(post, issues)
@@ -235,10 +308,10 @@ def run_checks(notion_urls: List[str], callback=print) -> List[Dict]:
         
         post_status = _validate_post_status(post, MY_KOALA_POST_STATUSES_ALLOWED, issues)
 
+        roundup_items = None
         if post_type == POST_POST_TYPE_ROUNDUP_ID:
             try:
-                # TODO: Return roundup items to use for the post creation to speed up the process
-                roundup_items = get_post_images_for_blog_url(notion_url)
+                roundup_items = call_limited(RATE_LIMIT_NOTION, get_post_images_for_blog_url, notion_url, limiter_callback=callback)
                 if not roundup_items or len(roundup_items) == 0:
                     issues.append("No roundup items found for roundup post")
             except Exception as e:
@@ -252,58 +325,58 @@ def run_checks(notion_urls: List[str], callback=print) -> List[Dict]:
         if post_topic not in POST_TOPIC_AI_PROMPT_NOUNS:
             issues.append(f"No AI prompt nouns defined for post topic '{post_topic}'")
 
+        if prefetch is not None:
+            prefetch.put(notion_url, post, title, website)
+            prefetch.update(notion_url, categories=categories, post_type=post_type, roundup_items=roundup_items)
 
-        if issues:
-            result = {
-                "url": notion_url,
-                "title": title,
-                "website": website,
-                "issues": issues,
-                "meta": {
-                    "post_type": post_type,
-                    "categories": categories,
-                    "post_status": post_status,
-                    "post_pinterest_status": ""
-                },
-            }
-            results.append(result)
-
-        report_progress(idx, url_count, callback)
-
-    return results
-
-def run_wp_img_add_checks(notion_urls: List[str], callback=print) -> List[Dict]:
+        if not issues:
+            return None
+        return {
+            "url": notion_url,
+            "title": title,
+            "website": website,
+            "issues": issues,
+            "meta": {
+                "post_type": post_type,
+                "categories": categories,
+                "post_status": post_status,
+                "post_pinterest_status": ""
+            },
+        }
+
+    return _run_url_checks(notion_urls, check_url, max_workers=max_workers, callback=callback)
+
+def run_wp_img_add_checks(notion_urls: List[str], callback=print, prefetch: PrefetchStore = None, max_workers: int = 1, wp_pool: WPClientPool = None) -> List[Dict]:
     """
     Run checks specific to adding images to WordPress posts.
-    Returns a list of issues found.
-    """
-    """
-    Run a set of basic checks for each Notion URL and return a structured
-    list of results. Each result is a dict with keys:
+    When a PrefetchStore is passed, the resolved pages are recorded in it.
+    With max_workers > 1 the URLs are checked concurrently and their log lines are prefixed
+    with the URL; results keep the input order.
+    A WPClientPool is warmed with the client of every website that passed the connection test.
+    Returns the URLs with issues, each as a dict with keys:
       - url
       - title
       - website
-      - status: 'ok' | 'error' | 'warning'
       - issues: list of issue strings
+      - meta: post type, categories and statuses read from Notion
     """
-    results: List[Dict] = []
-    tested_websites: Dict[str, bool] = {}  # Track WP connection test results by website
+    wp_connection_tests = _WPConnectionTests(wp_pool)
 
     notion_urls = dedup_and_trim(notion_urls, callback=callback)
     url_count = len(notion_urls)
     reset_report_progress(url_count, callback)
     generic_input_folder = load_generic_input_folder()
 
-    for idx, notion_url in enumerate(notion_urls):
+    def check_url(notion_url: str, callback) -> Optional[Dict]:
         callback(f"\n[INFO][run_checks] Starting checks for Notion URL: {notion_url}")
 
-        post, title, website = _resolve_notion_url(notion_url, idx, url_count, results, callback)
+        post, title, website, error_result = _resolve_notion_url(notion_url)
         if post is None:
-            continue
+            return error_result
 
         issues = []
 
-        test_wp_connection(website, tested_websites, issues, callback)
+        wp_connection_tests.test(website, issues, callback)
 
         # Basic property reads and validations
         post_title = _validate_post_title(post, issues)
@@ -332,24 +405,26 @@ def run_wp_img_add_checks(notion_urls: List[str], callback=print) -> List[Dict]:
             imgs = None
             issues.append(f"Exception while retrieving images from post folder: {e}")
 
-        if issues:
-            result = {
-                "url": notion_url,
-                "title": title,
-                "website": website,
-                "issues": issues,
-                "meta": {
-                    "post_type": post_type,
-                    "categories": categories,
-                    "post_status": post_status,
-                    "post_pinterest_status": ""
-                },
-            }
-            results.append(result)
+        if prefetch is not None:
+            prefetch.put(notion_url, post, title, website)
+            prefetch.update(notion_url, categories=categories, post_type=post_type, post_slug=slug)
 
-        report_progress(idx, url_count, callback)
-
-    return results
+        if not issues:
+            return None
+        return {
+            "url": notion_url,
+            "title": title,
+            "website": website,
+            "issues": issues,
+            "meta": {
+                "post_type": post_type,
+                "categories": categories,
+                "post_status": post_status,
+                "post_pinterest_status": ""
+            },
+        }
+
+    return _run_url_checks(notion_urls, check_url, max_workers=max_workers, callback=callback)
 
 
 def format_check_res(check_res: List[Dict]) -> str:
@@ -0,0 +1,191 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from wp_media_index import hash_file
+from settings import (
+    IMG_PREPROCESS_MAX_EDGE,
+    IMG_PREPROCESS_FORMAT,
+    IMG_PREPROCESS_QUALITY,
+    IMG_PREPROCESS_MAX_WORKERS,
+    IMG_PREPROCESS_CACHE_DIR,
+    IMG_PREPROCESS_CACHE_MAX_AGE_SECONDS,
+)
+
+# format setting -> (Pillow format, file extension)
+IMG_PREPROCESS_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+# Other files (e.g. animated GIFs) are uploaded untouched
+IMG_PREPROCESS_INPUT_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+
+def preprocess_images(
+    img_paths: List[str],
+    max_edge: int = IMG_PREPROCESS_MAX_EDGE,
+    img_format: str = IMG_PREPROCESS_FORMAT,
+    quality: int = IMG_PREPROCESS_QUALITY,
+    cache_dir: str = IMG_PREPROCESS_CACHE_DIR,
+    max_workers: int = IMG_PREPROCESS_MAX_WORKERS,
+    callback=print,
+) -> List[str]:
+    """Downscale, strip metadata from and re-encode images ahead of the WordPress upload.
+
+    Processed copies are kept in `cache_dir` under a key made of the file content hash and
+    the processing settings, so an image is only processed once per settings combination.
+    The copy keeps the original file name (with the new extension), since WordPress derives
+    the media slug from it. When the copy is not smaller than the original (e.g. an already
+    well-compressed small image), the original is uploaded instead.
+
+    Args:
+        img_paths: Paths of the original images.
+        max_edge: Longest side of the result in pixels; smaller images are not upscaled.
+        img_format: "webp" or "jpeg".
+        quality: Encoder quality (1-100).
+        cache_dir: Folder holding the processed copies.
+        max_workers: Number of worker processes.
+        callback: Logging callback.
+
+    Returns:
+        Paths to upload, in the order of `img_paths`. Unsupported files and images whose
+        copy is not smaller are returned as is.
+    """
+    if img_format not in IMG_PREPROCESS_FORMATS:
+        raise ValueError(
+            f"[ERROR][preprocess_images] Unsupported image format '{img_format}'; use one of {list(IMG_PREPROCESS_FORMATS)}"
+        )
+
+    _prune_cache(cache_dir)
+
+    jobs = []  # (index in img_paths, source path, target path)
+    processed = []  # (index in img_paths, target path) of every supported image
+    for idx, img_path in enumerate(img_paths):
+        if not img_path.lower().endswith(IMG_PREPROCESS_INPUT_EXTS):
+            continue
+        target_path = get_processed_path(img_path, max_edge, img_format, quality, cache_dir)
+        processed.append((idx, target_path))
+        if not os.path.exists(target_path):
+            jobs.append((idx, img_path, target_path))
+
+    callback(f"[INFO][preprocess_images] Processing {len(jobs)} image(s), {len(processed) - len(jobs)} reused from the cache.")
+    job_args = [(img_path, target_path, max_edge, img_format, quality) for _, img_path, target_path in jobs]
+    if max_workers <= 1 or len(jobs) <= 1:
+        for args in job_args:
+            _process_image(args)
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            # list() surfaces the first worker error
+            list(executor.map(_process_image, job_args))
+
+    result_paths = list(img_paths)
+    saved_bytes = 0
+    kept_originals = 0
+    for idx, target_path in processed:
+        size_diff = os.path.getsize(img_paths[idx]) - os.path.getsize(target_path)
+        if size_diff > 0:
+            result_paths[idx] = target_path
+            saved_bytes += size_diff
+        else:
+            kept_originals += 1
+
+    if jobs or kept_originals:
+        callback(
+            f"[INFO][preprocess_images] Saved {saved_bytes / (1024 * 1024):.1f} MB of upload size; "
+            f"{kept_originals} original(s) kept as they were smaller than the processed copy."
+        )
+    return result_paths
+
+
+def get_processed_path(img_path: str, max_edge: int, img_format: str, quality: int, cache_dir: str) -> str:
+    """Return the cache path of the processed copy of an image for the given settings."""
+    key_data = json.dumps([hash_file(img_path), max_edge, img_format, quality])
+    key = hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    _, ext = IMG_PREPROCESS_FORMATS[img_format]
+    name = os.path.splitext(os.path.basename(img_path))[0] + ext
+    return os.path.join(cache_dir, key[:32], name)
+
+
+def _process_image(args) -> str:
+    """Worker: write the processed copy of one image. Module-level so it can be pickled."""
+    # Pillow is only needed by add_wp_imgs: imported here to keep it out of the app start
+    from PIL import Image, ImageOps
+
+    img_path, target_path, max_edge, img_format, quality = args
+    pil_format, _ = IMG_PREPROCESS_FORMATS[img_format]
+
+    with Image.open(img_path) as img:
+        icc_profile = img.info.get("icc_profile")
+        # Apply the EXIF rotation before the metadata is dropped
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        if icc_profile:
+            img, icc_profile = _convert_to_srgb(img, icc_profile)
+
+        has_alpha = img.has_transparency_data
+        if pil_format == "JPEG":
+            if has_alpha:
+                # JPEG has no alpha channel: flatten onto white
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            save_kwargs = {"quality": quality, "optimize": True, "progressive": True}
+        else:
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if has_alpha else "RGB")
+            save_kwargs = {"quality": quality, "method": 4}
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # Unique per call: worker processes and the threads of add_wp_imgs/the job server may process the same image
+        tmp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+        if icc_profile:
+            # Could not convert to sRGB: keep the colour profile so browsers still render it right
+            save_kwargs["icc_profile"] = icc_profile
+        # No exif argument: the copy is written without the other metadata
+        img.save(tmp_path, format=pil_format, **save_kwargs)
+    os.replace(tmp_path, target_path)
+    return target_path
+
+
+def _convert_to_srgb(img, icc_profile: bytes):
+    """Convert an image with an embedded colour profile (e.g. Display P3 from phones) to sRGB.
+
+    Returns (image, profile still to embed): the profile is None after a conversion, since
+    browsers assume sRGB for untagged images, and the original one when the conversion failed.
+    """
+    try:
+        from PIL import ImageCms
+    except ImportError:  # Pillow built without littlecms
+        return img, icc_profile
+
+    output_mode = "RGBA" if img.has_transparency_data else "RGB"
+    try:
+        src_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        srgb_profile = ImageCms.createProfile("sRGB")
+        return ImageCms.profileToProfile(img, src_profile, srgb_profile, outputMode=output_mode), None
+    except (ImageCms.PyCMSError, OSError, ValueError):
+        return img, icc_profile
+
+
+def _prune_cache(cache_dir: str, max_age_seconds: int = IMG_PREPROCESS_CACHE_MAX_AGE_SECONDS):
+    """Remove processed copies older than `max_age_seconds`."""
+    if max_age_seconds <= 0 or not os.path.isdir(cache_dir):
+        return
+    now = time.time()
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        try:
+            if now - os.path.getmtime(entry_dir) > max_age_seconds:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+        except OSError:
+            pass
@@ -0,0 +1,537 @@
+"""
+Headless job server: a long-running worker process with a local HTTP API.
+
+`main.py --serve` starts it. Jobs (write posts, add WordPress images, run the checks) are
+submitted over HTTP on 127.0.0.1 and stored in a persistent JobQueue, so a job accepted
+before a crash or restart is still run. A few worker threads process the queue while the
+AI response cache, batch journal, media index and WordPress clients stay warm in memory
+for every job, instead of being rebuilt by every CLI run.
+
+    POST /jobs             {"type": "write_post", "urls": [...], "test": false} -> job
+    GET  /jobs             -> all jobs (without their log)
+    GET  /jobs/<id>        -> job with the tail of its log
+    POST /jobs/<id>/cancel -> cancels a job that has not started yet
+    GET  /health           -> queue counts
+
+JobClient talks to a running server, e.g. from the GUI or a script.
+
+Every request must carry the install's token (JOB_SERVER_TOKEN_HEADER, generated into
+JOB_SERVER_TOKEN_PATH on the first start) and a Host of 127.0.0.1/localhost, and a POST
+must be sent as application/json. A web page open in the operator's browser therefore
+cannot queue jobs (a JSON POST needs a CORS preflight the server never answers) or read
+them through DNS rebinding.
+"""
+
+import collections
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from settings import (
+    JOB_SERVER_HOST,
+    JOB_SERVER_PORT,
+    JOB_SERVER_WORKERS,
+    JOB_QUEUE_PATH,
+    JOB_QUEUE_KEEP_FINISHED,
+    JOB_LOG_LINES,
+    JOB_SERVER_TOKEN_PATH,
+)
+
+# Job types
+JOB_TYPE_WRITE_POST = "write_post"
+JOB_TYPE_ADD_WP_IMGS = "add_wp_imgs"
+JOB_TYPE_CHECK = "check"
+JOB_TYPES = (JOB_TYPE_WRITE_POST, JOB_TYPE_ADD_WP_IMGS, JOB_TYPE_CHECK)
+
+# Job statuses
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_CANCELLED = "cancelled"
+JOB_FINISHED_STATUSES = (JOB_STATUS_DONE, JOB_STATUS_FAILED, JOB_STATUS_CANCELLED)
+
+JOB_SERVER_TOKEN_HEADER = "X-Job-Token"
+JOB_SERVER_LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def load_job_token(path: str = JOB_SERVER_TOKEN_PATH, create: bool = False) -> Optional[str]:
+    """Return the API token of this install; with create, generate it if it does not exist yet."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    if not create:
+        return None
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    # Readable by the operator only
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+class JobQueue:
+    """Persistent FIFO of jobs, stored as a JSONL file with one line per job change.
+
+    Replaying the file gives the last state of every job. Jobs that were running when the
+    process stopped are queued again; the batch journal lets them resume where they stopped.
+    `next` never hands out a job sharing a URL with a running job, so the journal, the
+    Notion statuses and the WordPress posts of a URL are only ever touched by one job.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, keep_finished: int = JOB_QUEUE_KEEP_FINISHED, callback=print):
+        """
+        Args:
+            path: JSONL file of the queue; None keeps the queue in memory only.
+            keep_finished: Finished jobs kept (the most recent ones) when the file is reloaded.
+            callback: Logging callback.
+        """
+        self.path = path
+        self.keep_finished = keep_finished
+        self.callback = callback
+        self._jobs: Dict[str, dict] = {}  # In submission order
+        self._closed = False
+        self._condition = threading.Condition()
+        self._load()
+
+    def submit(self, job_type: str, urls: List[str], test: bool = False) -> dict:
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type '{job_type}'; expected one of {', '.join(JOB_TYPES)}")
+        if not isinstance(urls, (list, tuple)):
+            raise ValueError("'urls' must be a list of Notion URLs")
+        urls = [url.strip() for url in urls if isinstance(url, str) and url.strip()]
+        if not urls:
+            raise ValueError("A job needs at least one Notion URL")
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "type": job_type,
+            "urls": urls,
+            "test": bool(test),
+            "status": JOB_STATUS_QUEUED,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._condition:
+            self._save(job)
+            self._condition.notify_all()
+        return dict(job)
+
+    def next(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Mark the oldest runnable job as running and return it; None on timeout or close."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while not self._closed:
+                job = self._next_runnable()
+                if job is not None:
+                    job = dict(job, status=JOB_STATUS_RUNNING, started_at=time.time())
+                    self._save(job)
+                    return dict(job)
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            return None
+
+    def finish(self, job_id: str, result=None, error: str = None):
+        with self._condition:
+            job = dict(self._jobs[job_id])
+            job.update(
+                status=JOB_STATUS_FAILED if error else JOB_STATUS_DONE,
+                finished_at=time.time(),
+                result=result,
+                error=error,
+            )
+            self._save(job)
+            # Jobs waiting for this job's URLs can start now
+            self._condition.notify_all()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; returns False if it has already started."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job["status"] != JOB_STATUS_QUEUED:
+                return False
+            self._save(dict(job, status=JOB_STATUS_CANCELLED, finished_at=time.time()))
+            return True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> List[dict]:
+        with self._condition:
+            return [dict(job) for job in self._jobs.values()]
+
+    def active_urls(self, job_type: str) -> set:
+        """URLs of the queued and running jobs of a type."""
+        with self._condition:
+            return {url for job in self._jobs.values()
+                    if job["type"] == job_type and job["status"] in (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING)
+                    for url in job["urls"]}
+
+    def counts(self) -> Dict[str, int]:
+        with self._condition:
+            return dict(collections.Counter(job["status"] for job in self._jobs.values()))
+
+    def close(self):
+        """Wake up the workers waiting in `next`; they return None from now on."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _next_runnable(self) -> Optional[dict]:
+        busy_urls = {url for job in self._jobs.values() if job["status"] == JOB_STATUS_RUNNING for url in job["urls"]}
+        for job in self._jobs.values():
+            if job["status"] == JOB_STATUS_QUEUED and busy_urls.isdisjoint(job["urls"]):
+                return job
+        return None
+
+    def _save(self, job: dict):
+        self._jobs[job["id"]] = job
+        if self.path is None:
+            return
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(job, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load(self):
+        """Replay the queue file, requeue interrupted jobs and rewrite it without old finished jobs."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    job = json.loads(line)
+                    self._jobs[job["id"]] = job
+                except (ValueError, KeyError, TypeError) as e:
+                    # A crash can leave a truncated last line behind
+                    self.callback(f"[WARNING][JobQueue] Skipping unreadable line {line_no} in '{self.path}': {e}")
+
+        jobs = sorted(self._jobs.values(), key=lambda job: job.get("submitted_at") or 0)
+        finished = [job for job in jobs if job["status"] in JOB_FINISHED_STATUSES]
+        dropped = {job["id"] for job in finished[:max(0, len(finished) - self.keep_finished)]}
+        self._jobs = {job["id"]: job for job in jobs if job["id"] not in dropped}
+
+        interrupted = [job for job in self._jobs.values() if job["status"] == JOB_STATUS_RUNNING]
+        for job in interrupted:
+            job.update(status=JOB_STATUS_QUEUED, started_at=None)
+        if interrupted:
+            self.callback(f"[INFO][JobQueue] Queued {len(interrupted)} job(s) interrupted by the last shutdown again")
+        self._compact()
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for job in self._jobs.values():
+                f.write(json.dumps(job, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+def create_job_handlers(test: bool = False, callback=print) -> Dict[str, Callable]:
+    """Return {job type: handler(urls, test, callback) -> result} running the real pipeline.
+
+    The caches, the journal, the media index and the WordPress clients are created here
+    once and shared by every job the handlers run. With test=True every job runs in test mode.
+    """
+    server_test = test
+    from settings import (
+        AI_RESPONSE_CACHE_ENABLED,
+        BATCH_JOURNAL_ENABLED,
+        WP_MEDIA_INDEX_ENABLED,
+        WP_CLIENT_POOL_ENABLED,
+        WRITE_POST_MAX_WORKERS,
+        CHECKS_MAX_WORKERS,
+    )
+    from koala_main import write_post, add_wp_imgs
+    from checks import run_checks, format_check_res
+    from ai_response_cache import AIResponseCache
+    from batch_journal import BatchJournal
+    from wp_media_index import WPMediaIndex
+    from wp_client_pool import WPClientPool
+    from pipeline_timing import StageTimer
+    from ai_usage import AIUsageTracker
+
+    ai_cache = AIResponseCache(callback=callback) if AI_RESPONSE_CACHE_ENABLED else None
+    journal = BatchJournal(callback=callback) if BATCH_JOURNAL_ENABLED and not test else None
+    media_index = WPMediaIndex(callback=callback) if WP_MEDIA_INDEX_ENABLED else None
+    wp_pool = WPClientPool() if WP_CLIENT_POOL_ENABLED else None
+
+    def run_write_post(urls, test, callback):
+        test = test or server_test
+        failures = []
+        timer = StageTimer()
+        usage = AIUsageTracker()
+        results = write_post(urls, test=test, callback=callback, max_workers=WRITE_POST_MAX_WORKERS, failures=failures, ai_cache=ai_cache, journal=journal, wp_pool=wp_pool, timer=timer, usage=usage)
+        return {"results": results, "failures": failures, "stages": timer.summarize(), "ai_usage": usage.totals()}
+
+    def run_add_wp_imgs(urls, test, callback):
+        test = test or server_test
+        failures = []
+        results = add_wp_imgs(urls, test=test, callback=callback, journal=journal, media_index=media_index, wp_pool=wp_pool, failures=failures)
+        return {"results": results, "failures": failures}
+
+    def run_check(urls, test, callback):
+        problems = run_checks(urls, callback=callback, max_workers=CHECKS_MAX_WORKERS, wp_pool=wp_pool)
+        return {"problems": problems, "report": format_check_res(problems)}
+
+    return {
+        JOB_TYPE_WRITE_POST: run_write_post,
+        JOB_TYPE_ADD_WP_IMGS: run_add_wp_imgs,
+        JOB_TYPE_CHECK: run_check,
+    }
+
+
+class JobServer:
+    """Runs the jobs of a JobQueue on worker threads and serves the HTTP API."""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable], workers: int = JOB_SERVER_WORKERS,
+                 host: str = JOB_SERVER_HOST, port: int = JOB_SERVER_PORT, token: str = None, callback=print):
+        """
+        Args:
+            queue: Queue the jobs are stored in.
+            handlers: {job type: handler(urls, test, callback) -> JSON-serializable result},
+                see create_job_handlers.
+            workers: Jobs processed at the same time.
+            host, port: Address of the HTTP API; port 0 picks a free port.
+            token: Token the requests must carry; None uses the install's token (see load_job_token).
+            callback: Logging callback; job log lines are passed on with the job id.
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.host = host
+        self.port = port
+        self.token = token if token is not None else load_job_token(create=True)
+        self.callback = callback
+        self._logs: Dict[str, collections.deque] = {}
+        self._logs_lock = threading.Lock()
+        self._threads = []
+        self._http = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._http = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._http.daemon_threads = True
+        self._threads = [threading.Thread(target=self._http.serve_forever, name="job-server-http", daemon=True)]
+        self._threads += [threading.Thread(target=self._work, name=f"job-worker-{idx + 1}", daemon=True) for idx in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        self.callback(f"[INFO][JobServer] Listening on {self.base_url} with {self.workers} worker(s)")
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stop accepting requests and wait for the running jobs to finish."""
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+        self.queue.close()
+        for thread in self._threads[1:]:
+            thread.join(timeout)
+        self.callback(f"[INFO][JobServer] Stopped")
+
+    def serve_forever(self):
+        """Start the server and block until Ctrl+C."""
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.callback(f"[INFO][JobServer] Shutting down after the running job(s)...")
+        finally:
+            self.stop()
+
+    def get_log(self, job_id: str) -> List[str]:
+        with self._logs_lock:
+            return list(self._logs.get(job_id, ()))
+
+    def _work(self):
+        while True:
+            job = self.queue.next()
+            if job is None:
+                return
+            self._run_job(job)
+
+    def _run_job(self, job: dict):
+        job_id = job["id"]
+        with self._logs_lock:
+            log = self._logs[job_id] = collections.deque(maxlen=JOB_LOG_LINES)
+
+        def job_callback(msg):
+            if isinstance(msg, str):
+                with self._logs_lock:
+                    log.append(msg)
+                self.callback(f"[job {job_id}] {msg}" if msg.strip() else msg)
+
+        self.callback(f"[INFO][JobServer] Starting {job['type']} job {job_id} with {len(job['urls'])} URL(s)")
+        try:
+            result = self.handlers[job["type"]](job["urls"], job["test"], job_callback)
+        except Exception as e:
+            self.callback(f"[ERROR][JobServer] Job {job_id} failed: {e}")
+            self.queue.finish(job_id, error=f"{type(e).__name__}: {e}")
+            return
+        # Round-trip through JSON so the stored result matches what the API returns
+        self.queue.finish(job_id, result=json.loads(json.dumps(result, default=str)))
+        self.callback(f"[INFO][JobServer] Job {job_id} done")
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._serve(self, "GET")
+
+            def do_POST(self):
+                server._serve(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _serve(self, handler: BaseHTTPRequestHandler, method: str):
+        parts = handler.path.split("?", 1)[0].strip("/").split("/")
+        try:
+            status, payload = self._check_request(handler, method) or self._route(method, parts, handler)
+        except KeyError as e:
+            status, payload = 404, {"error": f"Not found: {e}"}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            self.callback(f"[ERROR][JobServer] {method} {handler.path} failed: {e}")
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _check_request(self, handler: BaseHTTPRequestHandler, method: str):
+        """Return (status, payload) of the rejection of a request that is not from a local client of this install; None if accepted."""
+        try:
+            hostname = urllib.parse.urlsplit("//" + (handler.headers.get("Host") or "").strip()).hostname
+        except ValueError:
+            hostname = None
+        if hostname not in JOB_SERVER_LOCAL_HOSTS and hostname != self.host:
+            return 403, {"error": "Only local requests are accepted"}
+        if not hmac.compare_digest(handler.headers.get(JOB_SERVER_TOKEN_HEADER) or "", self.token):
+            return 401, {"error": f"Missing or wrong {JOB_SERVER_TOKEN_HEADER} header"}
+        content_type = (handler.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+        if method == "POST" and content_type != "application/json":
+            return 415, {"error": "Expected Content-Type: application/json"}
+        return None
+
+    def _route(self, method: str, parts: List[str], handler: BaseHTTPRequestHandler):
+        if method == "GET" and parts == ["health"]:
+            return 200, {"status": "ok", "workers": self.workers, "jobs": self.queue.counts()}
+
+        if parts[0] != "jobs" or len(parts) > 3:
+            raise KeyError("/" + "/".join(parts))
+
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, self.queue.list()
+            length = int(handler.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(handler.rfile.read(length) or b"{}")
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON: {e}")
+            if not isinstance(request, dict):
+                raise ValueError("Expected a JSON object")
+            job = self.queue.submit(request.get("type"), request.get("urls"), test=request.get("test", False))
+            self.callback(f"[INFO][JobServer] Queued {job['type']} job {job['id']} with {len(job['urls'])} URL(s)")
+            return 201, job
+
+        job_id = parts[1]
+        job = self.queue.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if len(parts) == 3 and parts[2] == "cancel" and method == "POST":
+            cancelled = self.queue.cancel(job_id)
+            return 200, dict(self.queue.get(job_id), cancelled=cancelled)
+        if len(parts) == 2 and method == "GET":
+            return 200, dict(job, log=self.get_log(job_id))
+        raise KeyError(handler.path)
+
+
+class JobClient:
+    """Client of a running JobServer."""
+
+    def __init__(self, base_url: str = f"http://{JOB_SERVER_HOST}:{JOB_SERVER_PORT}", timeout: float = 30, token: str = None):
+        """
+        Args:
+            base_url: Address of the server.
+            timeout: Seconds per request.
+            token: API token; None reads the install's token written by the server.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token if token is not None else load_job_token()
+
+    def submit(self, job_type: str, urls: List[str], test: bool = False) -> dict:
+        return self._request("POST", "/jobs", {"type": job_type, "urls": urls, "test": test})
+
+    def get(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def list(self) -> List[dict]:
+        return self._request("GET", "/jobs")
+
+    def cancel(self, job_id: str) -> bool:
+        return self._request("POST", f"/jobs/{job_id}/cancel")["cancelled"]
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def wait(self, job_id: str, poll_seconds: float = 2, timeout: float = None) -> dict:
+        """Poll the job until it is finished and return it; raises TimeoutError."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = self.get(job_id)
+            if job["status"] in JOB_FINISHED_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} is still {job['status']}")
+            time.sleep(poll_seconds)
+
+    def _request(self, method: str, path: str, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json", JOB_SERVER_TOKEN_HEADER: self.token or ""}
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, method=method, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
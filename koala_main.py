@@ -1,5 +1,7 @@
+import asyncio
 import os
 import sys
+import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NotionAutomator')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ConfigKeeper')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NotionUtils')))
@@ -11,9 +13,6 @@ from notion_api import (
     get_post_title_website_from_url,
     get_post_type,
     get_page_property,
-    update_post_status,
-    update_post_status_to_published,
-    update_post_ai_img_prompt,
 )
 from notion_config import (
     POST_WP_CATEGORY_PROP,
@@ -40,113 +39,502 @@ from ai_gen_config import POST_TOPIC_RECIPES
 from checks import *
 from update_wp_content import (
     add_images_to_wp_post,
+    async_set_post_status_imgs_added,
 )
 from wp_formatter import WPFormatter
 from post_part_constants import *
+from prefetch_store import PrefetchStore
+from batch_journal import *
+from pipeline_timing import *
+from ai_response_cache import AIResponseCache
+from openai_batch import OpenAIBatchRunner
+from ai_stream import get_openai_client
+from rate_limiter import call_limited, RATE_LIMIT_NOTION
+from notion_write_buffer import NotionWriteBuffer
+from async_services import AsyncServices
 
-def write_post(notion_urls: list, do_run_checks=True, test=False, callback=print):
+def write_post(notion_urls: list, do_run_checks=True, test=False, callback=print, max_workers=1, failures=None, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, write_buffer=None, services=None):
+    """Write WordPress posts for the given Notion URLs.
+
+    Blocking wrapper around async_write_post, for callers that do not run an event loop.
+
+    Args:
+        notion_urls: Notion page URLs to process.
+        do_run_checks: Run the validation checks before writing.
+        test: When True, no AI calls or WordPress/Notion writes are made.
+        callback: Logging callback.
+        max_workers: Number of URLs processed in parallel. With 1 (default) the URLs are
+            processed one by one and the first failure aborts the batch; with more workers
+            a failing URL is recorded and the rest of the batch continues.
+        failures: Optional list that receives a {"url": ..., "error": ...} dict per failed URL
+            (concurrent mode only).
+        ai_cache: Optional AIResponseCache; identical prompts from earlier runs are served from it.
+        prefetch: Optional PrefetchStore filled by run_checks; Notion data found there is not fetched again.
+        journal: Optional BatchJournal. URLs an interrupted run left unfinished resume after their
+            last committed stage and skip the checks (their Notion status has already moved on).
+            Ignored in test mode.
+        wp_pool: Optional WPClientPool; one WordPress client per website is shared by the checks and all posts.
+        timer: Optional StageTimer receiving a span per pipeline stage and URL.
+        usage: Optional AIUsageTracker receiving the tokens, cost and latency of every AI call.
+        write_buffer: Optional NotionWriteBuffer; a default one is created if None. With its
+            defer_publish on, the "Published" statuses are sent together at the end of the run;
+            a post whose status fails is recorded in `failures` and left out of the results.
+        services: Optional AsyncServices sending the AI prompts and Notion updates; a new one
+            is created (and closed at the end) if None.
+
+    Returns:
+        list: [{title: wp_link}, ...] in the order of the input URLs.
+    """
+    return asyncio.run(async_write_post(
+        notion_urls,
+        do_run_checks=do_run_checks,
+        test=test,
+        callback=callback,
+        max_workers=max_workers,
+        failures=failures,
+        ai_cache=ai_cache,
+        prefetch=prefetch,
+        journal=journal,
+        wp_pool=wp_pool,
+        timer=timer,
+        usage=usage,
+        write_buffer=write_buffer,
+        services=services,
+    ))
+
+async def async_write_post(notion_urls: list, do_run_checks=True, test=False, callback=print, max_workers=1, failures=None, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, write_buffer=None, services=None):
+    """Coroutine version of write_post; one event loop drives every URL of the batch.
+
+    The AI prompts and the Notion page updates are awaited through AsyncServices, so a URL
+    waiting for OpenAI or Notion holds no thread. The checks, the Notion pages they did not
+    prefetch, PostWriter's text assembly and the WordPress calls (wp_client holds the
+    per-website credentials) run in worker threads for the duration of each call.
+    See write_post for the arguments.
+    """
     if test:
         callback(f"\n[INFO][write_post] Running in TEST mode!\n")
+        journal = None
 
     notion_urls = dedup_and_trim(notion_urls)
     url_count = len(notion_urls)
     reset_report_progress(url_count, callback)
 
     results = []
+    if prefetch is None:
+        prefetch = PrefetchStore()
+    if write_buffer is None:
+        write_buffer = NotionWriteBuffer(callback=callback)
     
     if do_run_checks:
-        problems = run_checks(notion_urls, callback=callback)
+        check_urls = notion_urls
+        if journal is not None:
+            resumed_urls = journal.get_resumable_urls(JOURNAL_JOB_WRITE_POST, notion_urls)
+            if resumed_urls:
+                callback(f"\n[INFO][write_post] Resuming {len(resumed_urls)} URL(s) left unfinished by a previous run; they skip the checks")
+                check_urls = [url for url in notion_urls if url not in resumed_urls]
+        with timed(timer, TIMING_STAGE_CHECKS):
+            problems = await asyncio.to_thread(run_checks, check_urls, callback=callback, prefetch=prefetch, max_workers=CHECKS_MAX_WORKERS, wp_pool=wp_pool)
         callback(format_check_res(problems))
         if len(problems) > 0:
             callback(f"\n\n[ERROR][write_post] Cannot proceed due to the issues found ☝️")
             return results
 
-    post_writer = PostWriter(test=test, callback=callback)
+    owns_services = services is None
+    if owns_services:
+        services = AsyncServices()
+    written = {}  # notion_url -> result, so posts whose deferred "Published" failed can be dropped
 
-    for idx, post_writer.notion_url in enumerate(notion_urls):
-        
-        callback(f"\nStarting writing text for Notion URL: {post_writer.notion_url}")
+    async def process_url(notion_url, url_callback):
+        result = await _write_single_post(notion_url, services, test=test, callback=url_callback, ai_cache=ai_cache, prefetch=prefetch, journal=journal, wp_pool=wp_pool, timer=timer, usage=usage, write_buffer=write_buffer)
+        written[notion_url] = result
+        return result
 
-        post, post_writer.post_title, post_writer.website = get_post_title_website_from_url(post_writer.notion_url)
-        if post is None:
-            raise ValueError(f"[ERROR][write_post] Could not resolve Notion URL: {post_writer.notion_url}")
-        if post_writer.website is None:
-            raise ValueError(f"[ERROR][write_post] Could not determine website! Did you forget to apply the Notion template?")
-        
-        callback(f"\n\n[INFO][write_post] WEBSITE: {post_writer.website}")
-        callback(f"[INFO][write_post] Title: {post_writer.post_title}")
-        
-        post_writer.post_type = get_post_type(post)
-        callback(f"[INFO][write_post] Type: {post_writer.post_type}")
-        
-        categories = get_page_property(post, POST_WP_CATEGORY_PROP)
-        callback(f"[INFO][write_post] Categories: {categories}")
-        
-        post_writer.post_topic = get_post_topic_from_cats(categories)
-        callback(f"[INFO][write_post] Post topic: {post_writer.post_topic}")
-        
-        post_slug = get_page_property(post, POST_SLUG_PROP)
-        callback(f"[INFO][write_post] Post slug: {post_slug}\n")
+    unpublished_urls = []
+    try:
+        if max_workers > 1 and url_count > 1:
+            await _run_concurrently(
+                process_url,
+                notion_urls,
+                max_workers=max_workers,
+                callback=callback,
+                failures=failures,
+                func_name="write_post",
+            )
+        else:
+            for idx, notion_url in enumerate(notion_urls):
+                await process_url(notion_url, callback)
+                report_progress(idx, url_count, callback)
+    finally:
+        try:
+            # Also after a failure: the posts finished before it still get their deferred status
+            if write_buffer.pending_deferred():
+                unpublished_urls = await write_buffer.flush_deferred(failures)
+        finally:
+            if owns_services:
+                await services.aclose()
+    return [written[url] for url in notion_urls if url in written and url not in unpublished_urls]
+
+async def _write_single_post(notion_url: str, services: AsyncServices, test=False, callback=print, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, write_buffer=None) -> dict:
+    """Run the whole write pipeline for one Notion URL and return {title: wp_link}.
+
+    With a journal, stages committed by an earlier run are skipped and each newly
+    finished stage is committed before the next one starts. With a StageTimer, every
+    Notion, OpenAI and WordPress step is recorded as a span. With `write_buffer` deferring
+    publishing, the "Published" status is left to its flush_deferred at the end of the run.
+    """
+    if write_buffer is None:
+        write_buffer = NotionWriteBuffer(callback=callback)
+    done_stages = journal.get_stages(JOURNAL_JOB_WRITE_POST, notion_url) if journal is not None else {}
+
+    def commit_stage(stage, data=None):
+        if journal is not None:
+            journal.record(JOURNAL_JOB_WRITE_POST, notion_url, stage, data)
+
+    post_writer = PostWriter(test=test, callback=callback, ai_cache=ai_cache, timer=timer, usage=usage)
+    post_writer.notion_url = notion_url
+
+    callback(f"\nStarting writing text for Notion URL: {post_writer.notion_url}")
 
-        post = update_post_status(post, POST_POST_STATUS_SETTING_UP_ID, test=test)
+    with timed(timer, TIMING_STAGE_RESOLVE_URL, notion_url):
+        post, categories, post_slug = await asyncio.to_thread(_resolve_post, post_writer, prefetch, callback)
+    callback(f"[INFO][write_post] Post slug: {post_slug}\n")
+
+    if done_stages:
+        callback(f"[INFO][write_post] Resuming after completed stage(s): {', '.join(done_stages)}")
+
+    if JOURNAL_STAGE_STATUS_SET_UP not in done_stages:
+        with timed(timer, TIMING_STAGE_STATUS_UPDATE, notion_url):
+            post = await services.update_post_status(post, POST_POST_STATUS_SETTING_UP_ID, test=test, callback=callback)
         if post is None:
             raise ValueError(f"[ERROR][write_post] Post status #1 was not updated!")
-        
-        post_parts = post_writer.write_post()
+        commit_stage(JOURNAL_STAGE_STATUS_SET_UP)
+    
+    if JOURNAL_STAGE_TEXT_GENERATED in done_stages:
+        post_parts = done_stages[JOURNAL_STAGE_TEXT_GENERATED]
+        callback(f"[INFO][write_post] Reusing the post text generated by the previous run")
+    else:
+        post_parts = await post_writer.async_write_post(lambda prompt_config: services.send_prompt(prompt_config, callback=callback))
+        commit_stage(JOURNAL_STAGE_TEXT_GENERATED, post_parts)
 
-        # Diabling this for now until it stabilizes
-        # search_res = send_web_search_prompt_to_openai(f"Find 5 youtube videos that are related to '{title}' - verify they are real and if not, redo the search. If needed, broaden the search as much as needed to find less relevant matches. Only output the URLs and nothing else and if you cannot find any, output the word 'nothing'", test=False)
-        # callback(f"\n[AI Response] Web search results:\n{search_res}\n")
+    # Diabling this for now until it stabilizes
+    # search_res = send_web_search_prompt_to_openai(f"Find 5 youtube videos that are related to '{title}' - verify they are real and if not, redo the search. If needed, broaden the search as much as needed to find less relevant matches. Only output the URLs and nothing else and if you cannot find any, output the word 'nothing'", test=False)
+    # callback(f"\n[AI Response] Web search results:\n{search_res}\n")
 
-        _update_page_ai_img_prompt(post, post_parts.get(POST_PART_INGREDIENTS, ""), test=test, callback=callback)
-        
-        post = update_post_status(post, POST_POST_STATUS_DRAFT_GENERATED_ID, test=test)
+    if JOURNAL_STAGE_AI_IMG_PROMPT_UPDATED not in done_stages:
+        with timed(timer, TIMING_STAGE_AI_IMG_PROMPT, notion_url):
+            await _update_page_ai_img_prompt(services, post, post_parts.get(POST_PART_INGREDIENTS, ""), test=test, callback=callback)
+        commit_stage(JOURNAL_STAGE_AI_IMG_PROMPT_UPDATED)
+
+    if JOURNAL_STAGE_DRAFT_GENERATED not in done_stages:
+        with timed(timer, TIMING_STAGE_STATUS_UPDATE, notion_url):
+            post = await services.update_post_status(post, POST_POST_STATUS_DRAFT_GENERATED_ID, test=test, callback=callback)
         if post is None:
             raise ValueError(f"[ERROR][write_post] Post status #2 was not updated!")
-            
-        wp_post = create_wp_post(
-            notion_post=post,
-            website=post_writer.website,
-            post_parts=post_parts,
-            post_slug=post_slug,
-            categories=categories,
+        commit_stage(JOURNAL_STAGE_DRAFT_GENERATED)
+        
+    if JOURNAL_STAGE_WP_POST_CREATED in done_stages:
+        wp_post = done_stages[JOURNAL_STAGE_WP_POST_CREATED]
+        callback(f"[INFO][write_post] WordPress post was already created by the previous run")
+    else:
+        with timed(timer, TIMING_STAGE_WP_CREATE, notion_url):
+            wp_post = await asyncio.to_thread(
+                create_wp_post,
+                notion_post=post,
+                website=post_writer.website,
+                post_parts=post_parts,
+                post_slug=post_slug,
+                categories=categories,
+                callback=callback,
+                test=test,
+                post_type=post_writer.post_type,
+                wp_pool=wp_pool
+            )
+
+    wp_link = wp_post.get('link')
+    if wp_link is None:
+        raise ValueError(f"[ERROR][write_post] WordPress post was not created!")
+    if JOURNAL_STAGE_WP_POST_CREATED not in done_stages:
+        commit_stage(JOURNAL_STAGE_WP_POST_CREATED, {"id": wp_post.get('id'), "link": wp_link, "slug": wp_post.get('slug')})
+    callback(f"\n[INFO][write_post] Post created on WordPress: {wp_link}\n")
+
+    #TODO: Based on the slug in wp_post, update the Notion title accordingly - it may have a number at the end
+
+    # Extract title from post_parts for results
+    final_title = post_parts.get(POST_PART_TITLE, post_writer.post_title)
+
+    async def publish(page=post):
+        with timed(timer, TIMING_STAGE_PUBLISH, notion_url):
+            published = await services.update_post_status_to_published(page, test=test, callback=callback)
+        if published is None:
+            raise ValueError(f"[ERROR][write_post] Post status #3 was not updated!")
+        return published
+
+    def complete(published):
+        if journal is not None:
+            journal.complete(JOURNAL_JOB_WRITE_POST, notion_url, JOURNAL_STAGE_PUBLISHED, {"title": final_title, "link": wp_link})
+
+    if write_buffer.defer_publish:
+        write_buffer.defer(post, publish, on_done=complete, label=notion_url)
+        callback(f"[INFO][write_post] Publishing status deferred to the end of the run")
+    else:
+        post = await publish()
+        complete(post)
+    return {f"{final_title}": f"{wp_link}"}
+
+def _resolve_post(post_writer: PostWriter, prefetch, callback=print):
+    """Read the Notion page of post_writer.notion_url and set the writer's website, title, type and topic.
+
+    Returns:
+        tuple: (notion post, categories, post slug)
+    """
+    notion_url = post_writer.notion_url
+    prefetched = prefetch.get(notion_url) if prefetch is not None else None
+    if prefetched is not None:
+        post, post_writer.post_title, post_writer.website = prefetched.post, prefetched.title, prefetched.website
+        post_writer.roundup_items = prefetched.roundup_items
+    else:
+        post, post_writer.post_title, post_writer.website = call_limited(RATE_LIMIT_NOTION, get_post_title_website_from_url, notion_url, limiter_callback=callback)
+    if post is None:
+        raise ValueError(f"[ERROR][write_post] Could not resolve Notion URL: {post_writer.notion_url}")
+    if post_writer.website is None:
+        raise ValueError(f"[ERROR][write_post] Could not determine website! Did you forget to apply the Notion template?")
+
+    callback(f"\n\n[INFO][write_post] WEBSITE: {post_writer.website}")
+    callback(f"[INFO][write_post] Title: {post_writer.post_title}")
+
+    post_writer.post_type = _get_prefetched(prefetched, "post_type", lambda: get_post_type(post))
+    callback(f"[INFO][write_post] Type: {post_writer.post_type}")
+
+    categories = _get_prefetched(prefetched, "categories", lambda: get_page_property(post, POST_WP_CATEGORY_PROP))
+    callback(f"[INFO][write_post] Categories: {categories}")
+
+    post_writer.post_topic = get_post_topic_from_cats(categories)
+    callback(f"[INFO][write_post] Post topic: {post_writer.post_topic}")
+
+    post_slug = _get_prefetched(prefetched, "post_slug", lambda: get_page_property(post, POST_SLUG_PROP))
+    return post, categories, post_slug
+
+def _get_prefetched(prefetched, field_name: str, fetch):
+    """Return a field the checks already fetched for this URL, or fetch it now."""
+    value = getattr(prefetched, field_name) if prefetched is not None else None
+    return value if value is not None else fetch()
+
+async def _run_concurrently(process_url, notion_urls: list, max_workers: int, callback=print, failures=None, func_name="write_post") -> list:
+    """Process independent Notion URLs concurrently on the running event loop.
+
+    Each URL still goes through its own steps in order; only different URLs overlap.
+    A failing URL is logged and recorded in `failures` instead of aborting the batch.
+
+    Args:
+        process_url: Coroutine function (notion_url, callback) -> result dict for a single URL.
+        notion_urls: Deduplicated Notion URLs.
+        max_workers: Maximum number of URLs processed at the same time.
+        callback: Logging callback.
+        failures: Optional list that receives {"url": ..., "error": ...} per failed URL.
+        func_name: Name used in the log lines.
+
+    Returns:
+        list: Results of the successful URLs, in input order.
+    """
+    url_count = len(notion_urls)
+    callback(f"\n[INFO][{func_name}] Processing {url_count} URLs with up to {max_workers} in parallel")
+
+    slots = [None] * url_count
+    failed = []
+    semaphore = asyncio.Semaphore(max_workers)
+    done_count = 0
+
+    async def run(idx, notion_url):
+        nonlocal done_count
+        async with semaphore:
+            try:
+                slots[idx] = await process_url(notion_url, prefix_callback(callback, f"[{idx + 1}/{url_count}]"))
+            except Exception as e:
+                callback(f"\n[ERROR][{func_name}] Failed for Notion URL {notion_url}: {e}")
+                failed.append({"url": notion_url, "error": str(e)})
+        report_progress(done_count, url_count, callback)
+        done_count += 1
+
+    await asyncio.gather(*(run(idx, notion_url) for idx, notion_url in enumerate(notion_urls)))
+
+    if failed:
+        callback(f"\n[WARNING][{func_name}] {len(failed)} of {url_count} URL(s) failed:")
+        for failure in failed:
+            callback(f"  - {failure['url']}: {failure['error']}")
+        if failures is not None:
+            failures.extend(failed)
+
+    return [result for result in slots if result is not None]
+
+def write_post_batch(notion_urls: list, do_run_checks=True, test=False, callback=print, max_workers=1, failures=None, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, batch_runner=None, write_buffer=None):
+    """Write posts with their AI text generated through the OpenAI Batch API (half the token price).
+
+    Every prompt PostWriter would send for the queue is collected and submitted as one
+    batch, and the answers are stored in the AI response cache. Prompts that need an earlier
+    answer (e.g. the separate title step, which is written from the body) are collected
+    in the next round. The normal write_post pipeline then runs and gets its AI answers
+    from the cache; a prompt the batch could not answer is sent interactively as usual.
+
+    Args:
+        batch_runner: OpenAIBatchRunner to submit the batches with. If None, a default one with a client
+            configured like chatgpt_api's is created before the checks, so a missing OpenAI key fails early.
+        See write_post for the other arguments.
+
+    Returns:
+        list: [{title: wp_link}, ...] as returned by write_post.
+    """
+    notion_urls = dedup_and_trim(notion_urls)
+    if prefetch is None:
+        prefetch = PrefetchStore()
+    if ai_cache is None:
+        ai_cache = AIResponseCache(callback=callback)
+    if batch_runner is None and not test:
+        # Created before the checks, so a missing OpenAI configuration fails before any Notion call
+        batch_runner = OpenAIBatchRunner(client=get_openai_client(), callback=callback)
+
+    if do_run_checks:
+        resumed_urls = journal.get_resumable_urls(JOURNAL_JOB_WRITE_POST, notion_urls) if journal is not None and not test else []
+        problems = run_checks([url for url in notion_urls if url not in resumed_urls], callback=callback, prefetch=prefetch, max_workers=CHECKS_MAX_WORKERS, wp_pool=wp_pool)
+        callback(format_check_res(problems))
+        if len(problems) > 0:
+            callback(f"\n\n[ERROR][write_post_batch] Cannot proceed due to the issues found ☝️")
+            return []
+
+    if test:
+        callback(f"[INFO][write_post_batch] TEST mode: no AI prompts are sent, skipping the batch step")
+    else:
+        _prime_ai_cache_with_batches(
+            notion_urls,
+            ai_cache=ai_cache,
+            prefetch=prefetch,
+            journal=journal,
+            batch_runner=batch_runner,
+            usage=usage,
             callback=callback,
-            test=test
         )
 
-        wp_link = wp_post.get('link')
-        if wp_link is None:
-            raise ValueError(f"[ERROR][write_post] WordPress post was not created!")
-        callback(f"\n[INFO][write_post] Post created on WordPress: {wp_link}\n")
+    return write_post(
+        notion_urls,
+        do_run_checks=False,
+        test=test,
+        callback=callback,
+        max_workers=max_workers,
+        failures=failures,
+        ai_cache=ai_cache,
+        prefetch=prefetch,
+        journal=journal,
+        wp_pool=wp_pool,
+        timer=timer,
+        usage=usage,
+        write_buffer=write_buffer,
+    )
 
-        #TODO: Based on the slug in wp_post, update the Notion title accordingly - it may have a number at the end
+def _prime_ai_cache_with_batches(notion_urls: list, ai_cache, prefetch, journal, batch_runner, usage=None, callback=print, max_rounds=AI_BATCH_MAX_ROUNDS):
+    """Answer the uncached prompts of the queue through batches, one round per prompt dependency level."""
+    failed_keys = set()
+    for round_no in range(1, max_rounds + 1):
+        pending = {}
+        for notion_url in notion_urls:
+            if journal is not None and journal.has_stage(JOURNAL_JOB_WRITE_POST, notion_url, JOURNAL_STAGE_TEXT_GENERATED):
+                continue
+            for key, prompt in _collect_post_prompts(notion_url, ai_cache, prefetch, callback).items():
+                if key not in failed_keys:
+                    pending[key] = prompt
+        if not pending:
+            callback(f"[INFO][write_post_batch] All AI answers are ready after {round_no - 1} batch round(s)")
+            return
 
-        post = update_post_status_to_published(post, test=test)
-        if post is None:
-            raise ValueError(f"[ERROR][write_post] Post status #3 was not updated!")
+        callback(f"\n[INFO][write_post_batch] Batch round {round_no}: submitting {len(pending)} prompt(s)")
+        start = time.monotonic()
+        responses = batch_runner.run({key: prompt["config"] for key, prompt in pending.items()})
+        elapsed = time.monotonic() - start
+        for key, response in responses.items():
+            prompt = pending[key]
+            if response["error"] != "":
+                failed_keys.add(key)
+                callback(f"[WARNING][write_post_batch] Batch could not answer the '{prompt['name']}' prompt of {prompt['url']} ({response['error']}: {response['message']}); it will be sent interactively")
+                continue
+            ai_cache.put(prompt["config"], response)
+            if usage is not None:
+                # The batch's wall time is shared by its prompts; write_post replays the answer from the cache without recording it again
+                usage.record(prompt["config"], response, elapsed / len(pending), notion_url=prompt["url"], topic=prompt["topic"], prompt_name=prompt["name"], price_factor=AI_BATCH_PRICE_FACTOR, primed_key=key)
 
-        # Extract title from post_parts for results
-        final_title = post_parts.get(POST_PART_TITLE, post_writer.post_title)
-        results.append({f"{final_title}": f"{wp_link}"})
+    callback(f"[WARNING][write_post_batch] Prompts still unanswered after {max_rounds} batch round(s) are sent interactively")
 
-        report_progress(idx, url_count, callback)
-    return results
+def _collect_post_prompts(notion_url: str, ai_cache, prefetch, callback=print) -> dict:
+    """Run PostWriter for the URL until it needs an uncached AI answer and return that prompt.
+
+    Nothing is written to Notion or WordPress. Returns {cache key: {"config", "name", "url", "topic"}},
+    empty when all the URL's AI answers are cached already.
+    """
+    collected = {}
+    quiet = lambda msg: None
+    post_writer = PostWriter(callback=quiet, ai_cache=ai_cache)
+    post_writer.notion_url = notion_url
+
+    def collect(prompt_config, prompt_name):
+        collected[AIResponseCache.make_key(prompt_config)] = {
+            "config": prompt_config,
+            "name": prompt_name,
+            "url": notion_url,
+            "topic": post_writer.post_topic,
+        }
+
+    post_writer.prompt_collector = collect
+    try:
+        _resolve_post(post_writer, prefetch, callback=quiet)
+        post_writer.write_post()
+    except PromptDeferred:
+        pass
+    except Exception as e:
+        callback(f"[WARNING][write_post_batch] Could not collect the AI prompts of {notion_url}; it will be written interactively: {e}")
+    return collected
 
-def print_results_pretty(results):
+def print_results_pretty(results, usage=None):
     print("\n=== Koala Writer Results ===")
     for idx, result in enumerate(results, 1):
         for title, link in result.items():
             print(f"{idx}. {title}\n   → {link}")
+    if usage is not None:
+        print(usage.format_summary())
     print("============================\n")
 
-def add_wp_imgs(notion_urls: list, do_run_checks=True, test=False, callback=print):
+def add_wp_imgs(notion_urls: list, do_run_checks=True, test=False, callback=print, prefetch=None, journal=None, media_index=None, wp_pool=None, max_workers=1, failures=None, services=None):
+    """Upload and insert the images of already published posts.
+
+    Blocking wrapper around async_add_wp_imgs. With max_workers > 1 several posts are
+    processed at the same time and a failing URL is recorded in `failures` instead of
+    aborting the batch (same as write_post).
+
+    Returns:
+        list: [{title: wp_link}, ...] in the order of the input URLs.
+    """
+    return asyncio.run(async_add_wp_imgs(
+        notion_urls,
+        do_run_checks=do_run_checks,
+        test=test,
+        callback=callback,
+        prefetch=prefetch,
+        journal=journal,
+        media_index=media_index,
+        wp_pool=wp_pool,
+        max_workers=max_workers,
+        failures=failures,
+        services=services,
+    ))
+
+async def async_add_wp_imgs(notion_urls: list, do_run_checks=True, test=False, callback=print, prefetch=None, journal=None, media_index=None, wp_pool=None, max_workers=1, failures=None, services=None):
+    """Coroutine version of add_wp_imgs; see write_post/async_write_post for the threading split."""
     if test:
         callback(f"\n[INFO][add_wp_img] Running in TEST mode!\n")
+        journal = None
 
     results = []
+    if prefetch is None:
+        prefetch = PrefetchStore()
     
     if do_run_checks:
-        problems = run_wp_img_add_checks(notion_urls, callback=callback)
+        problems = await asyncio.to_thread(run_wp_img_add_checks, notion_urls, callback=callback, prefetch=prefetch, max_workers=CHECKS_MAX_WORKERS, wp_pool=wp_pool)
         callback(format_check_res(problems))
         if len(problems) > 0:
             callback(f"\n\n[ERROR][add_wp_imgs] Cannot proceed due to the issues found ☝️")
@@ -157,34 +545,78 @@ def add_wp_imgs(notion_urls: list, do_run_checks=True, test=False, callback=prin
 
     notion_urls = dedup_and_trim(notion_urls)
 
-    for idx, notion_url in enumerate(notion_urls):
-        callback(f"\nStarting adding images to the WP post for Notion URL: {notion_url}")
+    owns_services = services is None
+    if owns_services:
+        services = AsyncServices()
+    process_url = lambda notion_url, url_callback: _add_single_wp_imgs(notion_url, services, test=test, callback=url_callback, prefetch=prefetch, journal=journal, media_index=media_index, wp_pool=wp_pool)
+    try:
+        if max_workers > 1 and len(notion_urls) > 1:
+            return await _run_concurrently(
+                process_url,
+                notion_urls,
+                max_workers=max_workers,
+                callback=callback,
+                failures=failures,
+                func_name="add_wp_imgs",
+            )
 
-        post, post_title, website = get_post_title_website_from_url(notion_url)
-        if post is None:
-            raise ValueError(f"[ERROR][add_wp_img] Could not resolve Notion URL: {notion_url}")
-        if website is None:
-            raise ValueError(f"[ERROR][add_wp_img] Could not determine website! Did you forget to apply the Notion template?")
-        
-        callback(f"\n\n[INFO][add_wp_img] WEBSITE: {website}")
-        callback(f"[INFO][add_wp_img] Title: {post_title}\n")
+        for idx, notion_url in enumerate(notion_urls):
+            results.append(await process_url(notion_url, callback))
+            report_progress(idx, url_count, callback)
+    finally:
+        if owns_services:
+            await services.aclose()
 
-        wp_link = add_images_to_wp_post(
+    return results
+
+async def _add_single_wp_imgs(notion_url: str, services: AsyncServices, test=False, callback=print, prefetch=None, journal=None, media_index=None, wp_pool=None) -> dict:
+    """Add the images of one Notion URL to its WordPress post and return {title: wp_link}."""
+    callback(f"\nStarting adding images to the WP post for Notion URL: {notion_url}")
+
+    prefetched = prefetch.get(notion_url) if prefetch is not None else None
+    if prefetched is not None:
+        post, post_title, website = prefetched.post, prefetched.title, prefetched.website
+    else:
+        post, post_title, website = await asyncio.to_thread(call_limited, RATE_LIMIT_NOTION, get_post_title_website_from_url, notion_url, limiter_callback=callback)
+    if post is None:
+        raise ValueError(f"[ERROR][add_wp_img] Could not resolve Notion URL: {notion_url}")
+    if website is None:
+        raise ValueError(f"[ERROR][add_wp_img] Could not determine website! Did you forget to apply the Notion template?")
+    
+    callback(f"\n\n[INFO][add_wp_img] WEBSITE: {website}")
+    callback(f"[INFO][add_wp_img] Title: {post_title}\n")
+
+    if journal is not None and journal.has_stage(JOURNAL_JOB_ADD_WP_IMGS, notion_url, JOURNAL_STAGE_IMAGES_ADDED):
+        # Inserting again would duplicate the images in the post content
+        wp_link = journal.get_stages(JOURNAL_JOB_ADD_WP_IMGS, notion_url)[JOURNAL_STAGE_IMAGES_ADDED]["link"]
+        callback(f"[INFO][add_wp_img] Images were already inserted by the previous run")
+    else:
+        # The Notion status is set below through the event loop instead of from the worker thread
+        wp_link = await asyncio.to_thread(
+            add_images_to_wp_post,
             notion_post=post,
             website=website,
             post_title=post_title,
             callback=callback,
-            test=test
+            test=test,
+            update_notion_status=False,
+            media_index=media_index,
+            wp_pool=wp_pool
         )
-        
-        callback(f"\n[INFO][add_wp_img] Post updated on WordPress with images: {wp_link}\n")
+        if journal is not None:
+            journal.record(JOURNAL_JOB_ADD_WP_IMGS, notion_url, JOURNAL_STAGE_IMAGES_ADDED, {"link": wp_link})
 
-        results.append({f"{post_title}": f"{wp_link}"})
-        report_progress(idx, url_count, callback)
+    if wp_link is not None:
+        slug = _get_prefetched(prefetched, "post_slug", lambda: get_page_property(post, POST_SLUG_PROP))
+        await async_set_post_status_imgs_added(services, post, slug, callback=callback, test=test)
+    if journal is not None:
+        journal.forget(JOURNAL_JOB_ADD_WP_IMGS, notion_url)
+    
+    callback(f"\n[INFO][add_wp_img] Post updated on WordPress with images: {wp_link}\n")
 
-    return results
+    return {f"{post_title}": f"{wp_link}"}
 
-def _update_page_ai_img_prompt(notion_post, new_prompt: str, test=False, callback=print):
+async def _update_page_ai_img_prompt(services: AsyncServices, notion_post, new_prompt: str, test=False, callback=print):
     """Update the AI Image Prompt property of a Notion page."""
     callback(f"\n[INFO][_update_page_ai_img_prompt] Updating '{POST_AI_IMAGE_PROMPT_PROP}' property...")
     
@@ -202,8 +634,8 @@ def _update_page_ai_img_prompt(notion_post, new_prompt: str, test=False, callbac
     if test:
         callback(f"[TEST][_update_page_ai_img_prompt] No update is made. Would set to: {new_prompt}")
     else:
-        updated_post = update_post_ai_img_prompt(notion_post, new_prompt)
+        updated_post = await services.update_post_ai_img_prompt(notion_post, new_prompt, callback=callback)
         if updated_post is None:
             raise ValueError(f"[ERROR][_update_page_ai_img_prompt] Failed to update '{POST_AI_IMAGE_PROMPT_PROP}' property!")
     callback(f"[INFO][_update_page_ai_img_prompt] '{POST_AI_IMAGE_PROMPT_PROP}' updated successfully.")
-    return updated_post
\ No newline at end of file
+    return updated_post
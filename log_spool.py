@@ -0,0 +1,136 @@
+"""
+Batched, bounded log output for the GUI log view.
+
+The workers put log messages on a queue. On every GUI tick, `LogSpool.drain` takes
+everything queued (up to a cap) and returns it as one text block, so the view needs a
+single insert per tick instead of one per message. The view keeps at most `max_lines`
+lines: drain also says how many of the oldest lines to delete. Every message is written
+in full to a log file for the session, so nothing is lost by trimming the view or by
+cutting very long messages (e.g. the full post dumps of test mode) in the view.
+"""
+
+import glob
+import os
+import queue
+import time
+from typing import Optional, Tuple
+
+from settings import (
+    GUI_LOG_MAX_LINES,
+    GUI_LOG_MAX_MESSAGE_CHARS,
+    GUI_LOG_MAX_MESSAGES_PER_TICK,
+    GUI_LOG_DIR,
+    GUI_LOG_KEEP_FILES,
+)
+
+GUI_LOG_FILE_PREFIX = "gui_"
+
+
+class LogSpool:
+    """Turns queued log messages into view updates and a session log file. Not thread-safe: drain from the GUI thread."""
+
+    def __init__(
+        self,
+        max_lines: int = GUI_LOG_MAX_LINES,
+        max_message_chars: int = GUI_LOG_MAX_MESSAGE_CHARS,
+        max_messages_per_tick: int = GUI_LOG_MAX_MESSAGES_PER_TICK,
+        log_dir: Optional[str] = GUI_LOG_DIR,
+        keep_files: int = GUI_LOG_KEEP_FILES,
+    ):
+        """
+        Args:
+            max_lines: Lines kept in the view.
+            max_message_chars: Longer messages are cut in the view (the log file gets them in full).
+            max_messages_per_tick: Messages taken per drain; the rest waits for the next tick.
+            log_dir: Folder of the session log files; None writes no file.
+            keep_files: Session log files kept in log_dir, the newest ones.
+        """
+        self.max_lines = max(1, max_lines)
+        self.max_message_chars = max_message_chars
+        self.max_messages_per_tick = max_messages_per_tick
+        self.log_dir = log_dir
+        self.keep_files = keep_files
+        self.log_path = None
+        self.visible_lines = 0
+        self._file = None
+        self._file_failed = False
+        self._trim_noted = False
+
+    def drain(self, log_queue: queue.Queue) -> Tuple[str, int]:
+        """Take the queued messages and return (text to append, number of oldest lines to delete)."""
+        messages = []
+        try:
+            while len(messages) < self.max_messages_per_tick:
+                messages.append(self.format_message(log_queue.get_nowait()))
+        except queue.Empty:
+            pass
+        if not messages:
+            return "", 0
+
+        self._spill(messages)
+
+        view_messages = [self._cut(msg) for msg in messages]
+        if not self._trim_noted and self.visible_lines + sum(msg.count("\n") + 1 for msg in view_messages) > self.max_lines:
+            self._trim_noted = True
+            where = f"; the full log is in {self.log_path}" if self.log_path else ""
+            view_messages.insert(0, f"[INFO][log] Only the last {self.max_lines} lines are shown{where}")
+
+        text = "\n".join(view_messages) + "\n"
+        self.visible_lines += text.count("\n")
+        trim_lines = max(0, self.visible_lines - self.max_lines)
+        self.visible_lines -= trim_lines
+        return text, trim_lines
+
+    def clear(self):
+        """The view was cleared; the log file keeps everything."""
+        self.visible_lines = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def format_message(msg) -> str:
+        if isinstance(msg, list):
+            return "\n".join(str(m) for m in msg)
+        return str(msg)
+
+    def _cut(self, msg: str) -> str:
+        if self.max_message_chars <= 0 or len(msg) <= self.max_message_chars:
+            return msg
+        where = "in the log file" if self._file is not None else "not shown"
+        return f"{msg[:self.max_message_chars]}… ({len(msg) - self.max_message_chars} more characters {where})"
+
+    def _spill(self, messages: list):
+        if self._file is None and not self._open_file():
+            return
+        try:
+            self._file.write("\n".join(messages) + "\n")
+            self._file.flush()
+        except OSError:
+            self._file_failed = True
+            self.close()
+
+    def _open_file(self) -> bool:
+        if self.log_dir is None or self._file_failed:
+            return False
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._remove_old_files()
+            self.log_path = os.path.join(self.log_dir, f"{GUI_LOG_FILE_PREFIX}{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.log")
+            self._file = open(self.log_path, "a", encoding="utf-8")
+            return True
+        except OSError:
+            # The view still works without the file
+            self._file_failed = True
+            self.log_path = None
+            return False
+
+    def _remove_old_files(self):
+        files = sorted(glob.glob(os.path.join(self.log_dir, f"{GUI_LOG_FILE_PREFIX}*.log")), key=os.path.getmtime)
+        for path in files[:max(0, len(files) - self.keep_files + 1)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
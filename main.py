@@ -1,21 +1,29 @@
-import argparse
 import sys
-from settings import APP_NAME, APP_DESCR
-from koala_main import (
-    write_post,
-    print_results_pretty,
-)
-from my_koala_writer_app import MyKoalaWriterApp
-from post_writer import PostWriter
+
+# Installed before any other import so the report covers the whole start
+from startup_profile import ImportProfiler, IMPORT_REPORT_FLAG
+import_profiler = ImportProfiler().start() if IMPORT_REPORT_FLAG in sys.argv else None
+
+import argparse
+import multiprocessing
+from settings import APP_NAME, APP_DESCR, WRITE_POST_MAX_WORKERS, AI_RESPONSE_CACHE_ENABLED, BATCH_JOURNAL_ENABLED, WP_CLIENT_POOL_ENABLED, JOB_SERVER_PORT, JOB_SERVER_WORKERS
+
+# The GUI (tkinter) and the pipeline modules (Notion, WordPress and OpenAI clients) are
+# imported by the code paths that use them, so the CLI modes start without loading them.
+
+def print_import_report():
+    """Print the slowest imports so far if the run was started with --import-report."""
+    if import_profiler is not None:
+        print(import_profiler.format_report())
 
 def test_split_into_paragraphs():
-    """Test the PostWriter._split_into_paragraphs method."""
+    """Test the splitter behind PostWriter._split_into_paragraphs without loading the pipeline."""
+    from text_segmentation import split_into_paragraphs
+
     print("\n" + "=" * 80)
     print("Testing PostWriter._split_into_paragraphs()")
     print("=" * 80 + "\n")
     
-    post_writer = PostWriter(test=True)
-    
     test_cases = [
         {
             "name": "Simple 4-sentence text",
@@ -57,7 +65,7 @@ def test_split_into_paragraphs():
         print(f"Input: {test_case['input'][:truncated_input]}{'...' if len(test_case['input']) > truncated_input else ''}")
         print(f"Sentences per paragraph: {test_case['sentences_per_paragraph']}\n")
         
-        result = post_writer._split_into_paragraphs(
+        result = split_into_paragraphs(
             test_case['input'],
             sentences_per_paragraph=test_case['sentences_per_paragraph']
         )
@@ -102,6 +110,8 @@ def test_post_writer(notion_urls: list, test_mode: bool = False):
     print(f"Test Mode: {'ENABLED (no AI calls)' if test_mode else 'DISABLED (real AI calls)'}")
     print("=" * 80 + "\n")
     
+    from post_writer import PostWriter
+
     post_writer = PostWriter(test=test_mode, callback=print)
     
     for idx, notion_url in enumerate(notion_urls, 1):
@@ -191,37 +201,149 @@ def main():
         nargs='+',
         metavar='URL'
     )
+    parser.add_argument(
+        "-w", "--workers",
+        help="Number of Notion URLs to process in parallel (default: %(default)s)",
+        type=int,
+        default=WRITE_POST_MAX_WORKERS
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Do not reuse cached AI responses (fresh responses are still cached)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--batch",
+        help="Generate the AI text of all the URLs through the OpenAI Batch API (cheaper, but can take hours)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--defer-publish",
+        help="Send the 'Published' Notion statuses of all the URLs together at the end of the run",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--timings",
+        help="Write per-stage timing spans of the run to this JSON lines file",
+        metavar='PATH'
+    )
+    parser.add_argument(
+        "--usage-report",
+        help="Write the AI token/cost report of the run (per post, topic and prompt) to this JSON file",
+        metavar='PATH'
+    )
     parser.add_argument(
         "--test-split", "-ts",
         help="Test PostWriter._split_into_paragraphs() method with various test cases",
         action="store_true"
     )
+    parser.add_argument(
+        "--serve",
+        help="Run as a headless job server: accept write/images/check jobs over a local HTTP API and process them from a persistent queue",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--watch",
+        help="With the job server: poll the Notion posts database and queue the posts that are ready (implies --serve)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--serve-port",
+        help="Port of the job server API (default: %(default)s)",
+        type=int,
+        default=JOB_SERVER_PORT
+    )
+    parser.add_argument(
+        "--serve-workers",
+        help="Jobs the job server processes at the same time (default: %(default)s)",
+        type=int,
+        default=JOB_SERVER_WORKERS
+    )
+    parser.add_argument(
+        IMPORT_REPORT_FLAG,
+        help="Print the slowest module imports of the start (like python -X importtime); with the GUI, before its window opens",
+        action="store_true"
+    )
 
     # detect test flag early so the GUI can receive it before args are parsed
     test_mode = ("-t" in sys.argv) or ("--test" in sys.argv)
-    if len(sys.argv) == 1 or len(sys.argv) == 2 and test_mode:
+    gui_args = [arg for arg in sys.argv[1:] if arg not in ("-t", "--test", IMPORT_REPORT_FLAG)]
+    if not gui_args:
         import tkinter as tk
+        from my_koala_writer_app import MyKoalaWriterApp
         root = tk.Tk()
         app = MyKoalaWriterApp(root, test_mode=test_mode)
+        print_import_report()
         root.mainloop()
         sys.exit(0)
 
     args = parser.parse_args()
+    if args.batch and args.no_cache:
+        parser.error("--batch stores its answers in the AI response cache and cannot be combined with --no-cache")
+
+    # Handle --serve argument
+    if args.serve or args.watch:
+        from job_server import JobQueue, JobServer, create_job_handlers
+        queue = JobQueue()
+        server = JobServer(queue, create_job_handlers(test=args.test), workers=args.serve_workers, port=args.serve_port)
+        watcher = None
+        if args.watch:
+            from notion_watcher import create_notion_watcher
+            watcher = create_notion_watcher(queue).start()
+        print_import_report()
+        try:
+            server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.stop()
+        sys.exit(0)
 
     # Handle --test-split argument
     if args.test_split:
         test_split_into_paragraphs()
+        print_import_report()
         sys.exit(0)
 
     # Handle --test-writer argument
     if args.test_writer:
         test_post_writer(args.test_writer, test_mode=args.test)
+        print_import_report()
         sys.exit(0)
 
     # Handle --notion argument
     if args.notion:
-        print_results_pretty(write_post(args.notion))
+        from koala_main import write_post, write_post_batch, print_results_pretty
+        from ai_response_cache import AIResponseCache
+        from batch_journal import BatchJournal
+        from wp_client_pool import WPClientPool
+        from pipeline_timing import StageTimer
+        from ai_usage import AIUsageTracker
+        from rate_limiter import format_limiter_metrics, reset_limiter_metrics
+        from notion_write_buffer import NotionWriteBuffer
+
+        ai_cache = AIResponseCache(bypass=args.no_cache) if AI_RESPONSE_CACHE_ENABLED else None
+        journal = BatchJournal() if BATCH_JOURNAL_ENABLED else None
+        wp_pool = WPClientPool() if WP_CLIENT_POOL_ENABLED else None
+        timer = StageTimer()
+        usage = AIUsageTracker()
+        write_buffer = NotionWriteBuffer(defer_publish=True) if args.defer_publish else None
+        reset_limiter_metrics()
+        run_write_post = write_post_batch if args.batch else write_post
+        results = run_write_post(args.notion, max_workers=args.workers, ai_cache=ai_cache, journal=journal, wp_pool=wp_pool, timer=timer, usage=usage, write_buffer=write_buffer)
+        print_results_pretty(results, usage=usage)
+        print(timer.format_summary())
+        print(format_limiter_metrics())
+        if args.timings:
+            timer.export_jsonl(args.timings)
+            print(f"[INFO][main] Stage timings written to {args.timings}")
+        if args.usage_report:
+            usage.export_json(args.usage_report)
+            print(f"[INFO][main] AI usage report written to {args.usage_report}")
+
+    print_import_report()
 
 
 if __name__ == "__main__":
+    # Image pre-processing uses worker processes; needed for the frozen Windows build
+    multiprocessing.freeze_support()
     main()
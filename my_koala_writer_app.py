@@ -3,18 +3,22 @@ from tkinter import scrolledtext, messagebox, filedialog
 import threading
 import queue
 import webbrowser
+import os
+import time
 
-from koala_main import *
 from settings import *
-from settings import ENABLE_ADD_WP_IMGS_BUTTON
-from checks import (
-    run_checks,
-    run_wp_img_add_checks,
-    format_check_res,
-)
-from gen_utils import (
-    reset_report_progress,
-)
+from settings import ENABLE_ADD_WP_IMGS_BUTTON, WRITE_POST_MAX_WORKERS, CHECKS_MAX_WORKERS, AI_RESPONSE_CACHE_ENABLED, BATCH_JOURNAL_ENABLED, WP_MEDIA_INDEX_ENABLED, WP_CLIENT_POOL_ENABLED, PIPELINE_TIMING_ENABLED, PIPELINE_TIMING_DIR, AI_USAGE_TRACKING_ENABLED, AI_USAGE_REPORT_DIR, GUI_LOG_POLL_MS
+# The pipeline (koala_main, checks, gen_utils and with them the Notion, WordPress and OpenAI
+# clients) is imported by the button handlers, so the window opens without loading it.
+from ai_response_cache import AIResponseCache
+from prefetch_store import PrefetchStore
+from batch_journal import BatchJournal, JOURNAL_JOB_WRITE_POST
+from wp_media_index import WPMediaIndex
+from wp_client_pool import WPClientPool
+from pipeline_timing import StageTimer, timed, TIMING_STAGE_CHECKS
+from ai_usage import AIUsageTracker
+from rate_limiter import format_limiter_metrics, reset_limiter_metrics
+from log_spool import LogSpool
 
 class MyKoalaWriterApp:
     def __init__(self, master, test_mode=False):
@@ -132,8 +136,9 @@ class MyKoalaWriterApp:
         master.grid_columnconfigure(2, weight=0)
         master.grid_columnconfigure(3, weight=1)
 
-        # Logging queue and poller
+        # Logging queue and poller; the view keeps the last lines and the full log goes to a file
         self.log_queue = queue.Queue()
+        self.log_spool = LogSpool()
         self.poll_log_queue()
 
         # For thread-safe WP URL output
@@ -143,6 +148,18 @@ class MyKoalaWriterApp:
         self._progress_total = 0
         self._progress_count = 0
 
+        # AI responses are reused across runs, e.g. when retrying a batch after a WordPress failure
+        self.ai_cache = AIResponseCache(callback=self.log) if AI_RESPONSE_CACHE_ENABLED else None
+
+        # Lets a batch interrupted by a crash or a closed window resume where it stopped
+        self.journal = BatchJournal(callback=self.log) if BATCH_JOURNAL_ENABLED and not test_mode else None
+
+        # Images already uploaded to WordPress are reused when adding images again
+        self.media_index = WPMediaIndex(callback=self.log) if WP_MEDIA_INDEX_ENABLED else None
+
+        # One WordPress client per website for the whole session: checks, post creation and image insertion
+        self.wp_pool = WPClientPool() if WP_CLIENT_POOL_ENABLED else None
+
     def update_line_count(self, event=None):
         raw = self.url_text.get("1.0", tk.END)
         lines = [line.strip() for line in raw.splitlines() if line.strip()]
@@ -168,23 +185,22 @@ class MyKoalaWriterApp:
         self.log_queue.put(msg)
 
     def poll_log_queue(self):
-        try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                self.log_text.config(state=tk.NORMAL)
-                if isinstance(msg, list):
-                    msg = '\n'.join(str(m) for m in msg)
-                self.log_text.insert(tk.END, msg + '\n')
-                self.log_text.see(tk.END)
-                self.log_text.config(state=tk.DISABLED)
-        except queue.Empty:
-            pass
-        self.master.after(100, self.poll_log_queue)
+        # One insert per tick for everything queued, then the oldest lines over the cap are dropped
+        text, trim_lines = self.log_spool.drain(self.log_queue)
+        if text:
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert(tk.END, text)
+            if trim_lines:
+                self.log_text.delete('1.0', f'{trim_lines + 1}.0')
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
+        self.master.after(GUI_LOG_POLL_MS, self.poll_log_queue)
 
     def clear_log(self):
         self.log_text.config(state=tk.NORMAL)
         self.log_text.delete('1.0', tk.END)
         self.log_text.config(state=tk.DISABLED)
+        self.log_spool.clear()
         self._progress_count = 0
         self.processed_var.set(f"0/{self._progress_total} processed")
 
@@ -214,9 +230,9 @@ class MyKoalaWriterApp:
         self.disable_all_buttons()
         def do_work():
             try:
-                # Placeholder for actual checks function
-                import time
-                problems = run_checks(urls, callback=self.log)
+                from checks import run_checks, format_check_res
+
+                problems = run_checks(urls, callback=self.log, max_workers=CHECKS_MAX_WORKERS, wp_pool=self.wp_pool)
                 self.log(format_check_res(problems))
             except Exception as e:
                 self.log(f"Error during checks: {e}")
@@ -240,14 +256,29 @@ class MyKoalaWriterApp:
         self._progress_count = 0
         self.processed_var.set(f"0/{self._progress_total} processed")
         self.disable_all_buttons()
-        reset_report_progress(len(urls), self.log)
         def do_work():
             nonlocal urls
             try:
+                from koala_main import write_post
+                from checks import run_checks, format_check_res
+                from gen_utils import reset_report_progress
+
+                reset_report_progress(len(urls), self.log)
+                # Notion data read by the checks is reused while writing
+                prefetch = PrefetchStore()
+                timer = StageTimer() if PIPELINE_TIMING_ENABLED else None
+                usage = AIUsageTracker() if AI_USAGE_TRACKING_ENABLED else None
+                reset_limiter_metrics()
+                
+                # URLs left unfinished by a previous run have already moved past the statuses the checks expect
+                resumed_urls = self.journal.get_resumable_urls(JOURNAL_JOB_WRITE_POST, urls) if self.journal is not None else []
+                if resumed_urls:
+                    self.log(f"\nResuming {len(resumed_urls)} URL(s) left unfinished by a previous run; they skip the checks.\n")
                 
                 # Run validation checks
                 self.log("\nRunning checks to see if any data is missing...\n")
-                missing_data = run_checks(urls, callback=self.log)
+                with timed(timer, TIMING_STAGE_CHECKS):
+                    missing_data = run_checks([u for u in urls if u not in resumed_urls], callback=self.log, prefetch=prefetch, max_workers=CHECKS_MAX_WORKERS, wp_pool=self.wp_pool)
                 
                 if missing_data:
                     error_message = format_check_res(missing_data)
@@ -280,8 +311,13 @@ class MyKoalaWriterApp:
                 else:
                     self.log("\n✅ All URLs have essential data. Proceeding with processing...\n")
 
-                results = write_post(urls, do_run_checks=False, test=self.test_mode, callback=self.log)
+                results = write_post(urls, do_run_checks=False, test=self.test_mode, callback=self.log, max_workers=WRITE_POST_MAX_WORKERS, ai_cache=self.ai_cache, prefetch=prefetch, journal=self.journal, wp_pool=self.wp_pool, timer=timer, usage=usage)
                 self.log("Execution completed.")
+                if timer is not None:
+                    self.log_timings(timer)
+                if usage is not None:
+                    self.log_ai_usage(usage)
+                self.log(format_limiter_metrics())
                 self.display_wp_urls(results)
             except Exception as e:
                 self.log(f"Error: {e}")
@@ -289,6 +325,26 @@ class MyKoalaWriterApp:
                 self.enable_all_buttons()
         threading.Thread(target=do_work, daemon=True).start()
 
+    def log_timings(self, timer: StageTimer):
+        """Log the per-stage summary of a run and save its spans under PIPELINE_TIMING_DIR."""
+        self.log("\n" + timer.format_summary())
+        path = os.path.join(PIPELINE_TIMING_DIR, f"write_post_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+        try:
+            timer.export_jsonl(path)
+            self.log(f"[INFO][log_timings] Stage timings saved to {path}")
+        except OSError as e:
+            self.log(f"[ERROR][log_timings] Could not save stage timings to {path}: {e}")
+
+    def log_ai_usage(self, usage: AIUsageTracker):
+        """Log the AI token/cost totals of a run and save the full report under AI_USAGE_REPORT_DIR."""
+        self.log("\n" + usage.format_summary())
+        path = os.path.join(AI_USAGE_REPORT_DIR, f"write_post_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            usage.export_json(path)
+            self.log(f"[INFO][log_ai_usage] AI usage report saved to {path}")
+        except OSError as e:
+            self.log(f"[ERROR][log_ai_usage] Could not save AI usage report to {path}: {e}")
+
     def run_add_wp_imgs(self):
         urls = self.get_urls()
         if not urls:
@@ -308,10 +364,15 @@ class MyKoalaWriterApp:
         def do_work():
             nonlocal urls
             try:
+                from koala_main import add_wp_imgs
+                from checks import run_wp_img_add_checks, format_check_res
+
+                # Notion data read by the checks is reused while adding images
+                prefetch = PrefetchStore()
                 
                 # Run validation checks
                 self.log("\nRunning checks to see if any data is missing...\n")
-                missing_data = run_wp_img_add_checks(urls, callback=self.log)
+                missing_data = run_wp_img_add_checks(urls, callback=self.log, prefetch=prefetch, max_workers=CHECKS_MAX_WORKERS, wp_pool=self.wp_pool)
                 
                 if missing_data:
                     error_message = format_check_res(missing_data)
@@ -343,7 +404,7 @@ class MyKoalaWriterApp:
                 else:
                     self.log("\n✅ All URLs have essential data. Proceeding with processing...\n")
 
-                results = add_wp_imgs(urls, do_run_checks=False, test=self.test_mode, callback=self.log)
+                results = add_wp_imgs(urls, do_run_checks=False, test=self.test_mode, callback=self.log, prefetch=prefetch, journal=self.journal, media_index=self.media_index, wp_pool=self.wp_pool)
                 self.log("Execution completed.")
                 self.display_wp_urls(results)
             except Exception as e:
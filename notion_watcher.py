@@ -0,0 +1,237 @@
+"""
+Polls the Notion posts database and queues the posts that are ready on the job server.
+
+Each poll asks Notion only for the pages edited since the last poll, using a
+`last_edited_time` cursor that is saved to disk so a restart continues where it stopped.
+Pages in a write-ready status go to one write_post job per poll and pages in an
+image-ready status go to one add_wp_imgs job, so new posts flow into the pipeline
+without anyone pasting URLs. The job server's checks still run on every job.
+
+Notion rounds `last_edited_time` to the minute, so the cursor is inclusive and the pages
+already handled at the cursor time are remembered. Pages edited less than
+`settle_seconds` ago are left for a later poll: an operator may still be filling them in.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from settings import (
+    NOTION_WATCH_POLL_SECONDS,
+    NOTION_WATCH_SETTLE_SECONDS,
+    NOTION_WATCH_ADD_WP_IMGS,
+    NOTION_WATCH_STATE_PATH,
+)
+from job_server import JobQueue, JOB_TYPE_WRITE_POST, JOB_TYPE_ADD_WP_IMGS
+from rate_limiter import call_limited, RATE_LIMIT_NOTION
+
+NOTION_WATCH_PAGE_SIZE = 100
+
+
+def parse_notion_time(value: str) -> float:
+    """Return the epoch seconds of a Notion timestamp like '2024-01-01T10:00:00.000Z'."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def format_notion_time(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class NotionDatabaseQuery:
+    """query_pages(edited_after) for NotionWatcher: pages of a database edited on or after a time, oldest first."""
+
+    def __init__(self, database_id: str, token: str, client=None):
+        """
+        Args:
+            database_id: Id of the Notion posts database.
+            token: Notion integration token.
+            client: notion_client.Client (or a stand-in); created on first use if None.
+        """
+        self.database_id = database_id
+        self.token = token
+        self.client = client
+
+    def __call__(self, edited_after: Optional[str]) -> List[dict]:
+        if self.client is None:
+            from notion_client import Client
+
+            self.client = Client(auth=self.token)
+
+        query = {
+            "database_id": self.database_id,
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+            "page_size": NOTION_WATCH_PAGE_SIZE,
+        }
+        if edited_after:
+            query["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": edited_after}}
+
+        pages = []
+        while True:
+            response = self.client.databases.query(**query)
+            pages.extend(response.get("results", []))
+            if not response.get("has_more"):
+                return pages
+            query["start_cursor"] = response["next_cursor"]
+
+
+class NotionWatcher:
+    """Turns the changes of the posts database into write_post and add_wp_imgs jobs."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        query_pages: Callable[[Optional[str]], Iterable[dict]],
+        read_status: Callable[[dict], str],
+        write_statuses: List[str],
+        img_statuses: List[str] = (),
+        state_path: Optional[str] = NOTION_WATCH_STATE_PATH,
+        poll_seconds: float = NOTION_WATCH_POLL_SECONDS,
+        settle_seconds: float = NOTION_WATCH_SETTLE_SECONDS,
+        callback=print,
+    ):
+        """
+        Args:
+            queue: Job queue the jobs are submitted to.
+            query_pages: Returns the pages edited on or after a Notion timestamp (all pages for
+                None), oldest first; see NotionDatabaseQuery.
+            read_status: Returns the post status id of a page, e.g. notion_api.get_post_status.
+            write_statuses: Statuses queued as write_post jobs.
+            img_statuses: Statuses queued as add_wp_imgs jobs; empty to not queue images.
+            state_path: JSON file of the cursor; None keeps it in memory only.
+            poll_seconds: Delay between two polls.
+            settle_seconds: Minimum age of a page edit before the page is queued.
+            callback: Logging callback.
+        """
+        self.queue = queue
+        self.query_pages = query_pages
+        self.read_status = read_status
+        self.write_statuses = set(write_statuses)
+        self.img_statuses = set(img_statuses)
+        self.state_path = state_path
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.callback = callback
+        self.cursor: Optional[str] = None
+        self._seen: Dict[str, str] = {}  # page id -> last_edited_time handled
+        self._stop = threading.Event()
+        self._thread = None
+        self._load()
+
+    def poll_once(self, now: float = None) -> Dict[str, dict]:
+        """Query the changes since the cursor, queue the ready pages and return {job type: job}."""
+        now = time.time() if now is None else now
+        if self.cursor is None:
+            # First start: only changes from now on, not the whole history of the database
+            self.cursor = format_notion_time(now)
+            self.callback(f"[INFO][NotionWatcher] Watching the posts database for pages edited from {self.cursor}")
+            self._save()
+            return {}
+
+        pages = call_limited(RATE_LIMIT_NOTION, self.query_pages, self.cursor, limiter_callback=self.callback)
+
+        urls = {JOB_TYPE_WRITE_POST: [], JOB_TYPE_ADD_WP_IMGS: []}
+        newest = self.cursor
+        oldest_pending = None  # Oldest edit of the pages left for a later poll
+        for page in pages:
+            page_id, edited = page.get("id"), page.get("last_edited_time")
+            if not page_id or not edited or self._seen.get(page_id) == edited:
+                continue
+            if now - parse_notion_time(edited) < self.settle_seconds:
+                oldest_pending = edited if oldest_pending is None else min(oldest_pending, edited)
+                continue
+
+            try:
+                status = self.read_status(page)
+            except Exception as e:
+                # Not marked as seen: the page is read again by the next poll
+                self.callback(f"[WARNING][NotionWatcher] Cannot read the status of {page.get('url', page_id)}: {e}")
+                oldest_pending = edited if oldest_pending is None else min(oldest_pending, edited)
+                continue
+            self._seen[page_id] = edited
+            newest = max(newest, edited)
+            if status in self.write_statuses:
+                urls[JOB_TYPE_WRITE_POST].append(page.get("url"))
+            elif status in self.img_statuses:
+                urls[JOB_TYPE_ADD_WP_IMGS].append(page.get("url"))
+
+        jobs = {}
+        for job_type, job_urls in urls.items():
+            active = self.queue.active_urls(job_type)
+            job_urls = [url for url in dict.fromkeys(job_urls) if url and url not in active]
+            if job_urls:
+                jobs[job_type] = self.queue.submit(job_type, job_urls)
+                self.callback(f"[INFO][NotionWatcher] Queued {job_type} job {jobs[job_type]['id']} with {len(job_urls)} URL(s)")
+
+        # Unsettled pages and pages whose status could not be read must come back in the next query
+        self.cursor = min(newest, oldest_pending) if oldest_pending is not None else newest
+        self._seen = {page_id: edited for page_id, edited in self._seen.items() if edited >= self.cursor}
+        self._save()
+        return jobs
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notion-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                # Keep the cursor: the same changes are queried again by the next poll
+                self.callback(f"[ERROR][NotionWatcher] Poll failed: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def _load(self):
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.cursor = state.get("cursor")
+            self._seen = dict(state.get("seen") or {})
+        except (OSError, ValueError) as e:
+            self.callback(f"[WARNING][NotionWatcher] Ignoring unreadable state file '{self.state_path}': {e}")
+
+    def _save(self):
+        if self.state_path is None:
+            return
+        folder = os.path.dirname(self.state_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"cursor": self.cursor, "seen": self._seen}, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def create_notion_watcher(queue: JobQueue, callback=print) -> NotionWatcher:
+    """Return a NotionWatcher of the posts database, queueing the statuses the checks accept.
+
+    The database id and the integration token are the ones of the app's Notion configuration
+    (notion_config, set up in ConfigKeeper), so the watcher reads the same workspace as notion_api.
+    """
+    from notion_api import get_post_status
+    from notion_config import PostStatuses, NOTION_TOKEN, NOTION_POSTS_DATABASE_ID
+    from checks import MY_KOALA_POST_STATUSES_ALLOWED
+
+    if not NOTION_POSTS_DATABASE_ID or not NOTION_TOKEN:
+        raise ValueError("[ERROR][create_notion_watcher] The Notion configuration has no posts database id or token")
+
+    return NotionWatcher(
+        queue,
+        query_pages=NotionDatabaseQuery(NOTION_POSTS_DATABASE_ID, NOTION_TOKEN),
+        read_status=get_post_status,
+        write_statuses=MY_KOALA_POST_STATUSES_ALLOWED,
+        img_statuses=PostStatuses().post_done_statuses if NOTION_WATCH_ADD_WP_IMGS else (),
+        callback=callback,
+    )
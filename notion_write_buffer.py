@@ -0,0 +1,89 @@
+"""
+Deferred "Published" status updates of write_post.
+
+notion_api has one helper per page property and every call is a PATCH round trip that
+returns the page. With `defer_publish`, write_post does not wait for the final write of
+each post (the "Published" status): NotionWriteBuffer keeps them until `flush_deferred`,
+which awaits all of them concurrently at the end of the run. They are writes of different
+pages, so they do not depend on each other.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, Hashable, List
+
+from settings import NOTION_WRITE_FLUSH_WORKERS, NOTION_DEFER_PUBLISH
+
+
+class NotionWriteBuffer:
+    """Deferred Notion writes, one per page. Writes are zero-argument coroutine functions returning the updated page."""
+
+    def __init__(self, max_workers: int = NOTION_WRITE_FLUSH_WORKERS, defer_publish: bool = NOTION_DEFER_PUBLISH, callback=print):
+        """
+        Args:
+            max_workers: Maximum number of deferred writes sent at the same time (the
+                Notion rate limiter still applies to each of them).
+            defer_publish: When True, write_post defers the "Published" status of every post
+                to flush_deferred at the end of the run.
+            callback: Logging callback.
+        """
+        self.max_workers = max(1, max_workers)
+        self.defer_publish = defer_publish
+        self.callback = callback
+        self._deferred: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def defer(self, post, write: Callable, on_done: Callable = None, label: str = ""):
+        """Keep `write` until flush_deferred; a later deferred write of the same page replaces it.
+
+        Args:
+            on_done: Called with the result of the write once it succeeded.
+            label: Name of the page in logs and failures, e.g. its Notion URL.
+        """
+        with self._lock:
+            self._deferred[self._page_key(post)] = (post, write, on_done, label)
+
+    def pending_deferred(self) -> int:
+        with self._lock:
+            return len(self._deferred)
+
+    async def flush_deferred(self, failures: list = None) -> List[str]:
+        """Await all deferred writes concurrently and return the labels of the ones that failed.
+
+        A failing write is logged and recorded in `failures` as {"url": label, "error": ...}.
+        """
+        with self._lock:
+            deferred = list(self._deferred.values())
+            self._deferred.clear()
+        if not deferred:
+            return []
+
+        self.callback(f"\n[INFO][NotionWriteBuffer.flush_deferred] Sending {len(deferred)} deferred Notion update(s)...")
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(write):
+            async with semaphore:
+                return await write()
+
+        outcomes = await asyncio.gather(*(run(write) for _, write, _, _ in deferred), return_exceptions=True)
+        failed_labels = []
+        for (_, _, on_done, label), outcome in zip(deferred, outcomes):
+            error = outcome if isinstance(outcome, BaseException) else None
+            if error is None and on_done is not None:
+                try:
+                    on_done(outcome)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                self.callback(f"[ERROR][NotionWriteBuffer.flush_deferred] Update failed for {label}: {error}")
+                if failures is not None:
+                    failures.append({"url": label, "error": str(error)})
+                failed_labels.append(label)
+        done = len(deferred) - len(failed_labels)
+        self.callback(f"[INFO][NotionWriteBuffer.flush_deferred] {done} of {len(deferred)} deferred update(s) sent")
+        return failed_labels
+
+    @staticmethod
+    def _page_key(post) -> Hashable:
+        page_id = post.get("id") if isinstance(post, dict) else getattr(post, "id", None)
+        return page_id if isinstance(page_id, Hashable) and page_id is not None else id(post)
@@ -0,0 +1,129 @@
+import io
+import json
+import time
+from typing import Dict
+
+from settings import (
+    APP_NAME,
+    AI_BATCH_COMPLETION_WINDOW,
+    AI_BATCH_POLL_SECONDS,
+    AI_BATCH_TIMEOUT_SECONDS,
+)
+from ai_stream import build_chat_request, get_openai_client
+
+AI_BATCH_ENDPOINT = "/v1/chat/completions"
+AI_BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class OpenAIBatchError(RuntimeError):
+    """Raised when a batch cannot be submitted or ends without any results."""
+
+
+class OpenAIBatchRunner:
+    """Sends many prompts as one OpenAI Batch API job and waits for the answers.
+
+    Batch jobs are billed at half the token price and finish within the completion
+    window (usually much sooner), which suits large queues that do not need
+    interactive latency.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        poll_seconds: float = AI_BATCH_POLL_SECONDS,
+        timeout_seconds: float = AI_BATCH_TIMEOUT_SECONDS,
+        callback=print,
+    ):
+        """
+        Args:
+            client: OpenAI client (or a stand-in with the same files/batches API); if None, one configured like
+                chatgpt_api's (see ai_stream.get_openai_client) is created on first use.
+            poll_seconds: Delay between two batch status checks.
+            timeout_seconds: Give up (and cancel the batch) after this long.
+            callback: Logging callback.
+        """
+        self.client = client
+        self.poll_seconds = poll_seconds
+        self.timeout_seconds = timeout_seconds
+        self.callback = callback
+
+    def run(self, prompt_configs: Dict[str, object]) -> Dict[str, dict]:
+        """Submit {custom_id: prompt_config} as one batch and return {custom_id: response}.
+
+        Responses have the same {"message", "error", "usage"} shape as send_prompt_to_openai.
+        Requests the batch did not answer are returned with an error.
+        """
+        if not prompt_configs:
+            return {}
+        if self.client is None:
+            self.client = get_openai_client()
+
+        input_file = self.client.files.create(file=("koala_batch.jsonl", self._build_input(prompt_configs)), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=AI_BATCH_ENDPOINT,
+            completion_window=AI_BATCH_COMPLETION_WINDOW,
+            metadata={"app": APP_NAME},
+        )
+        self.callback(f"[INFO][OpenAIBatchRunner.run] Submitted batch {batch.id} with {len(prompt_configs)} request(s)")
+
+        batch = self._wait(batch)
+        responses = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                responses.update(self._read_results(file_id))
+        if not responses and batch.status != "completed":
+            raise OpenAIBatchError(f"[ERROR][OpenAIBatchRunner.run] Batch {batch.id} ended as '{batch.status}' without results")
+
+        for custom_id in prompt_configs:
+            responses.setdefault(custom_id, {"message": f"No result in batch {batch.id} ({batch.status})", "error": "missing"})
+        return responses
+
+    def _build_input(self, prompt_configs: Dict[str, object]) -> io.BytesIO:
+        lines = []
+        for custom_id, prompt_config in prompt_configs.items():
+            line = {"custom_id": custom_id, "method": "POST", "url": AI_BATCH_ENDPOINT, "body": build_chat_request(prompt_config)}
+            lines.append(json.dumps(line, ensure_ascii=False))
+        return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+    def _wait(self, batch):
+        deadline = time.monotonic() + self.timeout_seconds
+        last_progress = None
+        while batch.status not in AI_BATCH_FINAL_STATUSES:
+            if time.monotonic() > deadline:
+                self.client.batches.cancel(batch.id)
+                raise OpenAIBatchError(f"[ERROR][OpenAIBatchRunner._wait] Batch {batch.id} did not finish within {self.timeout_seconds}s; cancelled")
+            time.sleep(self.poll_seconds)
+            batch = self.client.batches.retrieve(batch.id)
+
+            counts = getattr(batch, "request_counts", None)
+            progress = (batch.status, getattr(counts, "completed", 0), getattr(counts, "total", 0))
+            if progress != last_progress:
+                self.callback(f"[INFO][OpenAIBatchRunner._wait] Batch {batch.id}: {progress[0]}, {progress[1]}/{progress[2]} done")
+                last_progress = progress
+        return batch
+
+    def _read_results(self, file_id: str) -> Dict[str, dict]:
+        responses = {}
+        for line in self.client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            responses[result["custom_id"]] = _to_prompt_response(result)
+        return responses
+
+
+def _to_prompt_response(result: dict) -> dict:
+    """Convert one batch output line to the send_prompt_to_openai response shape."""
+    response = result.get("response") or {}
+    body = response.get("body") or {}
+    error = result.get("error") or body.get("error")
+    if error or response.get("status_code") != 200:
+        message = error.get("message", str(error)) if isinstance(error, dict) else str(error or body)
+        return {"message": message, "error": str(response.get("status_code") or "batch_error")}
+
+    try:
+        message = body["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        return {"message": f"Unexpected batch response body: {body}", "error": "bad_response"}
+    return {"message": message, "error": "", "usage": body.get("usage")}
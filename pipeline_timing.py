@@ -0,0 +1,111 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List
+
+# Pipeline stages timed per Notion URL
+TIMING_STAGE_CHECKS = "checks"
+TIMING_STAGE_RESOLVE_URL = "resolve_url"
+TIMING_STAGE_STATUS_UPDATE = "status_update"
+TIMING_STAGE_AI_BODY = "ai_body"
+TIMING_STAGE_AI_TITLE = "ai_title"
+TIMING_STAGE_AI_IMG_PROMPT = "ai_img_prompt"
+TIMING_STAGE_WP_CREATE = "wp_create"
+TIMING_STAGE_PUBLISH = "publish"
+
+
+class StageTimer:
+    """Collects timing spans per pipeline stage and Notion URL for one batch.
+
+    Thread-safe, so concurrent URLs can share one timer. Spans can be exported as JSON
+    lines and summarized as p50/p95/max per stage at the end of the run.
+    """
+
+    def __init__(self):
+        self._spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, notion_url: str = ""):
+        """Time the wrapped block; the span is recorded even when the block raises."""
+        started_at = time.time()
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(stage, time.perf_counter() - start, notion_url=notion_url, started_at=started_at, ok=ok)
+
+    def record(self, stage: str, duration: float, notion_url: str = "", started_at: float = None, ok: bool = True):
+        span = {
+            "stage": stage,
+            "url": notion_url,
+            "started_at": started_at if started_at is not None else time.time() - duration,
+            "duration": duration,
+            "ok": ok,
+        }
+        with self._lock:
+            self._spans.append(span)
+
+    def get_spans(self) -> List[Dict]:
+        with self._lock:
+            return [dict(span) for span in self._spans]
+
+    def export_jsonl(self, path: str):
+        """Write one JSON object per span to `path` (the folder is created if needed)."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.get_spans():
+                f.write(json.dumps(span, ensure_ascii=False) + "\n")
+
+    def summarize(self) -> Dict[str, Dict]:
+        """Return {stage: {"count", "total", "p50", "p95", "max"}} in first-seen stage order."""
+        durations_by_stage: Dict[str, List[float]] = {}
+        for span in self.get_spans():
+            durations_by_stage.setdefault(span["stage"], []).append(span["duration"])
+
+        summary = {}
+        for stage, durations in durations_by_stage.items():
+            durations.sort()
+            summary[stage] = {
+                "count": len(durations),
+                "total": sum(durations),
+                "p50": _percentile(durations, 50),
+                "p95": _percentile(durations, 95),
+                "max": durations[-1],
+            }
+        return summary
+
+    def format_summary(self) -> str:
+        summary = self.summarize()
+        if not summary:
+            return "[INFO][StageTimer] No timings recorded."
+
+        stage_width = max(len("stage"), *(len(stage) for stage in summary))
+        lines = [
+            "=== Stage timings (seconds) ===",
+            f"{'stage':<{stage_width}}  {'count':>5}  {'p50':>7}  {'p95':>7}  {'max':>7}  {'total':>8}",
+        ]
+        for stage, stats in summary.items():
+            lines.append(
+                f"{stage:<{stage_width}}  {stats['count']:>5}  {stats['p50']:>7.2f}  {stats['p95']:>7.2f}  "
+                f"{stats['max']:>7.2f}  {stats['total']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+
+def timed(timer: StageTimer, stage: str, notion_url: str = ""):
+    """Return `timer.span(...)`, or a no-op context when no timer is set."""
+    return timer.span(stage, notion_url) if timer is not None else nullcontext()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
@@ -5,9 +5,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'W
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NotionAutomator')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NotionUtils')))
 
+import asyncio
 import html
 import json
 import random
+import time
 from chatgpt_api import *
 from chatgpt_settings import *
 from settings import *
@@ -39,6 +41,28 @@ from wp_formatter import (
 from post_part_constants import *
 # Import PostParts for .field_name access
 from post_part_constants import PostParts
+from pipeline_timing import timed, TIMING_STAGE_AI_BODY, TIMING_STAGE_AI_TITLE
+from ai_usage import (
+    AI_USAGE_PROMPT_POST_BODY,
+    AI_USAGE_PROMPT_TITLE,
+    AI_USAGE_PROMPT_TITLE_INTRO_CONCLUSION,
+    AI_USAGE_PROMPT_MISSING_PARTS,
+    get_response_usage,
+)
+from ai_stream import stream_prompt_to_openai
+from ai_response_cache import AIResponseCache
+from streaming_json import StreamingJSONObjectParser, StreamingJSONError
+from rate_limiter import call_limited, is_openai_throttled, RATE_LIMIT_NOTION, RATE_LIMIT_OPENAI
+from text_segmentation import split_into_paragraphs, split_into_paragraphs_batch
+
+class PromptDeferred(Exception):
+    """Raised by _send_prompt in collect mode instead of sending a prompt that is not cached yet."""
+
+    def __init__(self, prompt_name: str, prompt_config=None, stage: str = TIMING_STAGE_AI_BODY):
+        super().__init__(prompt_name)
+        self.prompt_config = prompt_config
+        self.stage = stage
+
 
 CTA_TXT = "cta_text"
 CTA_ANCHOR = "cta_anchor"
@@ -54,6 +78,12 @@ class PostWriter:
         POST_TOPIC_RECIPES: "Your style is humorous, friendly, engaging, and informative. Your tone is warm, approachable, and humorous, making readers feel like they are having a conversation with a knowledgeable friend who cracks family-friendly jokes all the time.",
         POST_TOPIC_OUTFITS: "yOR STYLE IS INFORMATIVE AND TRENDY. YOUR TONE IS FRIENDLY, APPROACHABLE, AND FASHION-FORWARD, MAKING READERS FEEL INSPIRED TO EXPLORE NEW STYLES AND EXPRESS THEMSELVES THROUGH CLOTHING. YOU also have a deep understanding of the domain the outfits are for (e.g., hiking, fishing, etc.) AND INCORPORATE THAT KNOWLEDGE INTO YOUR WRITING.",
     }
+    AI_TXT_SYS_PROMPT_TITLE_INTRO_CONCLUSION = """
+For the blog post given by the user, provide:
+1. A catchy and SEO-friendly blog post title (engaging and keyword-rich)
+2. A 50-word introduction paragraph that hooks the reader
+3. A 50-word conclusion paragraph that wraps up the post
+"""
     
     # CTA templates with anchor text and CTA text
     CTA_LIST = [
@@ -66,13 +96,21 @@ class PostWriter:
         {CTA_TXT: "Want to cook it?", CTA_ANCHOR: "Here's the full recipe"},
     ]
 
-    def __init__(self, test: bool = False, callback=print):
+    def __init__(self, test: bool = False, callback=print, ai_cache=None, timer=None, usage=None):
         self.test = test
         self.callback = callback
+        self.ai_cache = ai_cache  # Optional AIResponseCache shared across the batch
+        self.timer = timer  # Optional StageTimer; every AI call is recorded as a span
+        self.usage = usage  # Optional AIUsageTracker; tokens, cost and latency of every AI call
         self.website = ""
         self.post_title = ""
         self.post_topic = ""
         self.post_type = ""
+        self.title_with_body = AI_TITLE_WITH_BODY
+        self.stream = AI_STREAMING_ENABLED
+        self.prompt_collector = None  # Batch mode: uncached prompts are handed to it (prompt_config, prompt_name) instead of sent
+        self.roundup_items = None  # Roundup items already fetched for notion_url (e.g. by the checks)
+        self._answers = None  # During async_write_post: {AI cache key: response} of the prompts answered so far
 
     def __get_verbosity_by_topic__(self) -> int:
         if self._is_recipe():
@@ -81,6 +119,7 @@ class PostWriter:
         return CHATGPT_VERBOSITY_MEDIUM
 
     def _get_sys_prompt_base(self):
+        # Depends on the topic only; keep post-specific text out so the prefix stays cacheable
         return f"yOU ARE A PROFESSIONAL {self.post_topic} WRITER AND COPYWRITER.{self.AI_TXT_SYS_PROMPT_STYLE_BY_TOPIC[self.post_topic]}  You write in a clear and concise manner, making complex topics easy to understand. You have a knack for storytelling and can weave narratives that captivate readers.You are also skilled at SEO writing, ensuring that your content is optimized for search engines while still being enjoyable to read."
 
 
@@ -167,6 +206,8 @@ class PostWriter:
 
         self.callback("[PostWriter._get_single_recipe_post] Preparing prompts...")
         prompt_config = self._get_single_recipe_post_body_prompts(prompt_config)
+        if self.title_with_body:
+            prompt_config = self._add_title_to_body_prompts(prompt_config)
 
         self.callback(f"\n[PostWriter._get_single_recipe_post] Writing the post body...\n")
         
@@ -178,9 +219,10 @@ class PostWriter:
             ingredients = ["2 cups flour", "1 cup sugar", "3 eggs", "1 tsp vanilla extract"]
             instructions = ["Mix dry ingredients", "Add wet ingredients", "Bake at 350F for 30 minutes", "Let cool before serving"]
             good_to_know = "This recipe can be made ahead and frozen for up to 3 months."
+            title = ""
         else:
             self.callback("[PostWriter._get_single_recipe_post] Calling OpenAI API for post body...")
-            post_txt = send_prompt_to_openai(prompt_config, self.test)
+            post_txt = self._send_prompt(prompt_config)
 
             if post_txt["error"] != "":
                 raise OpenAIAPIError(f"OpenAI API error: {post_txt['error']} '{post_txt['message']}'")
@@ -200,13 +242,17 @@ class PostWriter:
                 ingredients = data.get(POST_PART_INGREDIENTS, [])
                 instructions = data.get(POST_PART_INSTRUCTIONS, [])
                 good_to_know = self._split_into_paragraphs(data.get(POST_PART_GOOD_TO_KNOW, ""))
+                title = (data.get(POST_PART_TITLE) or "").strip()
             except json.JSONDecodeError as e:
                 self.callback(f"[PostWriter._get_single_recipe_post] JSON parse error: {e}\nJSON:\n{content}")
                 raise ValueError(f"Failed to parse AI response as JSON: {e}")
         
         self.callback(f"[PostWriter._get_single_recipe_post] Recipe parts generated")
 
-        title = self._generate_title_with_ai(prompt_config, intro, ingredients, instructions)
+        if title:
+            self.callback(f"[PostWriter._get_single_recipe_post] Title generated with the body: {title}")
+        else:
+            title = self._generate_title_with_ai(prompt_config, intro, ingredients, instructions)
 
         return {
             POST_PART_TITLE: title,
@@ -229,17 +275,20 @@ class PostWriter:
         # - "Image Description": Item URL
         # - "Notes": Summary of the post located at the URL
         self.callback("[PostWriter._get_roundup_post] Generating roundup post from saved items...")
-        self.callback(f"[PostWriter._get_roundup_post] Fetching items from Notion URL...")
-        roundup_items = get_post_images_for_blog_url(self.notion_url)
+        if self.roundup_items is not None:
+            self.callback(f"[PostWriter._get_roundup_post] Using items fetched during the checks")
+            roundup_items = self.roundup_items
+        else:
+            self.callback(f"[PostWriter._get_roundup_post] Fetching items from Notion URL...")
+            roundup_items = call_limited(RATE_LIMIT_NOTION, get_post_images_for_blog_url, self.notion_url, limiter_callback=self.callback)
         if not roundup_items or len(roundup_items) == 0:
             raise ValueError(f"[ERROR][_get_roundup_post_body_prompts] No roundup items found for post '{self.notion_url}'")
 
         self.callback(f"[PostWriter._get_roundup_post] Found {len(roundup_items)} roundup items")
         post_items = []
-        for item in roundup_items:
+        body_texts = split_into_paragraphs_batch((item.get(BLOG_POST_IMAGES_NOTES_PROP) or "").strip() for item in roundup_items)
+        for item, body_text in zip(roundup_items, body_texts):
             title = (item.get(BLOG_POST_IMAGES_TITLE_PROP) or "").strip()
-            body_text = (item.get(BLOG_POST_IMAGES_NOTES_PROP) or "").strip()
-            body_text = self._split_into_paragraphs(body_text)
             
             # Get URL and append CTA link
             url = (item.get(BLOG_POST_IMAGES_DESCRIPTION_PROP) or "").strip()
@@ -277,7 +326,7 @@ class PostWriter:
         """
         # Parse recipe from Notion page
         parser = NotionRecipeParser(self.callback)
-        recipe_data = parser.parse_recipe_from_url(post_url)
+        recipe_data = call_limited(RATE_LIMIT_NOTION, parser.parse_recipe_from_url, post_url, limiter_callback=self.callback)
         
         post = recipe_data['post']
         title = recipe_data['title']
@@ -341,6 +390,129 @@ class PostWriter:
         return sections
         
 
+    def _send_prompt(self, prompt_config: AIPromptConfig, stage: str = TIMING_STAGE_AI_BODY, prompt_name: str = AI_USAGE_PROMPT_POST_BODY) -> dict:
+        """Send a prompt to OpenAI, serving identical prompts from the AI response cache if set.
+
+        The call is timed under `stage` when a StageTimer is set and its tokens, cost and
+        latency are recorded under `prompt_name` when an AIUsageTracker is set.
+        """
+        answer = self._answers.get(AIResponseCache.make_key(prompt_config)) if self._answers is not None else None
+        if answer is not None:
+            # Answered earlier in async_write_post, which already timed, recorded and cached it
+            return answer
+
+        notion_url = getattr(self, "notion_url", "")
+        with timed(self.timer, stage, notion_url):
+            start = time.perf_counter()
+            if self.ai_cache is not None:
+                cached_response = self.ai_cache.get(prompt_config)
+                if cached_response is not None:
+                    self.callback("[PostWriter._send_prompt] Using cached AI response")
+                    # Answers of a batch of this run were recorded when the batch returned them
+                    if self.usage is None or not self.usage.take_primed(self.ai_cache.make_key(prompt_config)):
+                        self._record_usage(prompt_config, cached_response, time.perf_counter() - start, prompt_name, from_cache=True)
+                    if self._answers is not None:
+                        self._answers[self.ai_cache.make_key(prompt_config)] = cached_response
+                    return cached_response
+
+            if self.prompt_collector is not None:
+                self.prompt_collector(prompt_config, prompt_name)
+                raise PromptDeferred(prompt_name, prompt_config, stage)
+
+            if self._can_stream(prompt_config):
+                response = call_limited(RATE_LIMIT_OPENAI, self._stream_prompt, prompt_config, limiter_callback=self.callback, is_throttled=is_openai_throttled)
+            else:
+                response = call_limited(RATE_LIMIT_OPENAI, send_prompt_to_openai, prompt_config, self.test, limiter_callback=self.callback, is_throttled=is_openai_throttled)
+            self._record_usage(prompt_config, response, time.perf_counter() - start, prompt_name)
+
+        self._store_response(prompt_config, response)
+        return response
+
+    async def async_write_post(self, send_prompt) -> dict:
+        """write_post with its AI prompts awaited on the running event loop.
+
+        write_post runs in a worker thread in collect mode and stops at the first prompt it has
+        no answer for. That prompt is awaited with `send_prompt` (a coroutine function taking
+        the prompt config and returning a send_prompt_to_openai style response) and write_post
+        runs again, until it completes; no thread waits for OpenAI. The prompts of a post do not
+        change between runs, so every run is answered up to the next new prompt.
+        """
+        if self.test:
+            return await asyncio.to_thread(self.write_post)
+
+        prompt_collector = self.prompt_collector
+        # Collect mode; the deferred prompt comes with the PromptDeferred
+        self.prompt_collector = lambda prompt_config, prompt_name: None
+        self._answers = {}
+        try:
+            while True:
+                try:
+                    return await asyncio.to_thread(self.write_post)
+                except PromptDeferred as deferred:
+                    prompt_config, prompt_name, stage = deferred.prompt_config, str(deferred), deferred.stage
+
+                key = AIResponseCache.make_key(prompt_config)
+                if key in self._answers:
+                    raise ValueError(f"[ERROR][PostWriter.async_write_post] The '{prompt_name}' prompt was asked again after it was answered")
+                with timed(self.timer, stage, getattr(self, "notion_url", "")):
+                    start = time.perf_counter()
+                    response = await send_prompt(prompt_config)
+                self._record_usage(prompt_config, response, time.perf_counter() - start, prompt_name)
+                self._store_response(prompt_config, response)
+                self._answers[key] = response
+        finally:
+            self.prompt_collector = prompt_collector
+            self._answers = None
+
+    def _store_response(self, prompt_config: AIPromptConfig, response: dict):
+        """Log the prompt cache hits of a fresh response and keep it in the AI response cache."""
+        usage = get_response_usage(response)
+        if usage:
+            self.callback(f"[PostWriter._send_prompt] {usage['cached_tokens']} of {usage['prompt_tokens']} prompt tokens served from the OpenAI prompt cache")
+
+        if self.ai_cache is not None:
+            self.ai_cache.put(prompt_config, response)
+
+    def _can_stream(self, prompt_config: AIPromptConfig) -> bool:
+        """Only structured (JSON object) responses are streamed; they can be parsed as they arrive."""
+        return self.stream and not self.test and isinstance(prompt_config.response_format, dict) and bool(prompt_config.response_format)
+
+    def _stream_prompt(self, prompt_config: AIPromptConfig) -> dict:
+        """Stream the response, logging each post part as soon as its JSON value is complete.
+
+        A response that stops being valid JSON aborts the call right away.
+        """
+        parser = StreamingJSONObjectParser(on_field=self._log_streamed_field)
+        try:
+            response = stream_prompt_to_openai(prompt_config, parser.feed)
+            if response["error"] == "":
+                parser.close()
+        except StreamingJSONError as e:
+            self.callback(f"[ERROR][PostWriter._stream_prompt] {e}")
+            raise ValueError(f"Failed to parse AI response as JSON: {e}")
+        return response
+
+    def _log_streamed_field(self, key: str, value):
+        if isinstance(value, list):
+            preview = f"{len(value)} item(s)"
+        else:
+            preview = html.unescape(str(value)).replace("\n", " ")
+            preview = preview if len(preview) <= 80 else preview[:77] + "..."
+        self.callback(f"[PostWriter._stream_prompt] '{key}' ready: {preview}")
+
+    def _record_usage(self, prompt_config: AIPromptConfig, response: dict, latency: float, prompt_name: str, from_cache: bool = False):
+        if self.usage is None:
+            return
+        self.usage.record(
+            prompt_config,
+            response,
+            latency,
+            notion_url=getattr(self, "notion_url", ""),
+            topic=self.post_topic,
+            prompt_name=prompt_name,
+            from_cache=from_cache,
+        )
+
     def _is_recipe(self) -> bool:
         return self.post_topic == POST_TOPIC_RECIPES
         
@@ -374,10 +546,11 @@ class PostWriter:
             self.callback("[PostWriter._generate_title_with_ai] [TEST] Using mock title")
             return f"[TEST] The Ultimate Guide: Everything You Need to Know about '{self.post_title}' and {temp_body}"
         
-        prompt_config.system_prompt = self._get_sys_prompt_base() + self._get_post_prompt("title")
+        prompt_config.system_prompt = self._get_static_sys_prompt("title")
         prompt_config.user_prompt = f"""
-            Generate a catchy and SEO-friendly blog post title for the following blog post about '{self.post_title}'. 
+            Generate a catchy and SEO-friendly blog post title for the following blog post.
             The title should be engaging and encourage readers to click on the article. It should also include relevant keywords that would help improve the post's search engine ranking.
+            Post about: '{self.post_title}'
             Take into account {self._get_single_plural_subj()}.
             Post text:
                 {temp_body}
@@ -392,7 +565,7 @@ class PostWriter:
             return title
         
         self.callback("[PostWriter._generate_title_with_ai] Calling OpenAI API for title...")
-        post_title = send_prompt_to_openai(prompt_config, self.test)
+        post_title = self._send_prompt(prompt_config, stage=TIMING_STAGE_AI_TITLE, prompt_name=AI_USAGE_PROMPT_TITLE)
 
         if post_title["error"] != "":
             raise OpenAIAPIError(f"OpenAI API error: {post_title['error']} '{post_title['message']}'")
@@ -412,17 +585,13 @@ class PostWriter:
         self.callback("[PostWriter._generate_title_intro_conclusion_with_ai] Preparing combined generation prompts...")
         
         prompt_config = AIPromptConfig(
-            system_prompt=self._get_sys_prompt_base(),
+            system_prompt=self._get_sys_prompt_base() + self.AI_TXT_SYS_PROMPT_TITLE_INTRO_CONCLUSION,
             user_prompt=f"""
-                Generate the following for a blog post about '{self.post_title}'. Take into account {self._get_single_plural_subj()}.
+                Generate the title, introduction and conclusion for the following blog post.
+                Post about: '{self.post_title}'. Take into account {self._get_single_plural_subj()}.
                 
                 Post body content:
                 {post_body}
-                
-                Please provide:
-                1. A catchy and SEO-friendly blog post title (engaging and keyword-rich)
-                2. A 50-word introduction paragraph that hooks the reader
-                3. A 50-word conclusion paragraph that wraps up the post
             """,
             response_format={
                 POST_PART_TITLE: {
@@ -451,7 +620,7 @@ class PostWriter:
             conclusion = f"[TEST] We hope this guide about {self.post_title} has been helpful and informative. Remember to apply these tips in your own practice. Stay tuned for more great content, and don't hesitate to share your experiences with us. Thank you for reading!"
             return title, intro, conclusion
         
-        response = send_prompt_to_openai(prompt_config, self.test)
+        response = self._send_prompt(prompt_config, stage=TIMING_STAGE_AI_TITLE, prompt_name=AI_USAGE_PROMPT_TITLE_INTRO_CONCLUSION)
 
         if response["error"] != "":
             raise OpenAIAPIError(f"OpenAI API error: {response['error']} '{response['message']}'")
@@ -489,31 +658,7 @@ class PostWriter:
         Returns:
             Text formatted with paragraph breaks
         """
-        if not text or not text.strip():
-            return text
-        
-        # Split by sentence-ending punctuation followed by space
-        import re
-        sentences = re.split(r'([.!?]+\s+)', text)
-        
-        # Reconstruct sentences with their punctuation
-        reconstructed = []
-        for i in range(0, len(sentences) - 1, 2):
-            if i + 1 < len(sentences):
-                reconstructed.append(sentences[i] + sentences[i + 1].rstrip())
-        
-        # Handle last sentence if it doesn't have trailing punctuation marker
-        if len(sentences) % 2 == 1 and sentences[-1].strip():
-            reconstructed.append(sentences[-1].strip())
-        
-        # Group sentences into paragraphs
-        paragraphs = []
-        for i in range(0, len(reconstructed), sentences_per_paragraph):
-            paragraph = ' '.join(reconstructed[i:i + sentences_per_paragraph])
-            if paragraph.strip():
-                paragraphs.append(paragraph.strip())
-        
-        return '\n'.join(paragraphs)
+        return split_into_paragraphs(text, sentences_per_paragraph)
 
     def _get_post_prompt(self, prompt_type) -> str:
         prompt = self.AI_TXT_GEN_PROMPTS_BY_TOPIC.get(self.post_topic, {}).get(prompt_type, "")
@@ -521,16 +666,43 @@ class PostWriter:
             raise ValueError(f"[ERROR][_get_post_prompt] No '{prompt_type}' prompt found for post topic '{self.post_topic}'")
         return prompt
 
+    def _get_static_sys_prompt(self, prompt_type: str) -> str:
+        """Return the system prompt for a prompt type, built only from per-topic static text.
+
+        It must stay byte-identical for every post of a topic so OpenAI can serve it from
+        its prompt cache; anything post-specific goes at the end of the user prompt.
+        """
+        return self._get_sys_prompt_base() + self._get_post_prompt(prompt_type)
+
     def _get_single_recipe_post_body_prompts(self, prompt_config: AIPromptConfig):
-        prompt_config.system_prompt = self._get_sys_prompt_base() + self._get_post_prompt("post")
+        prompt_config.system_prompt = self._get_static_sys_prompt("post")
         prompt_config.user_prompt = f"""
-        Write a detailed {self.post_topic} blog post about '{self.post_title}'. Make sure to follow the structure and style guidelines provided.
+        Write a detailed {self.post_topic} blog post. Make sure to follow the structure and style guidelines provided.
         The post should be engaging, informative, and easy to read. Ensure the content is original and provides value to the readers.
+        Post about: '{self.post_title}'
         Take into account {self._get_single_plural_subj()}.
         """
 
         return prompt_config
 
+    def _add_title_to_body_prompts(self, prompt_config: AIPromptConfig):
+        """Ask for the post title in the same structured response as the body.
+
+        Saves the separate title round trip; _generate_title_with_ai is only used
+        as a fallback when the response comes back without a title. The title guidelines
+        are static, so they extend the cached system prompt rather than the user prompt.
+        """
+        prompt_config.response_format[POST_PART_TITLE] = {
+            "type": "string",
+            "description": "The blog post title written after the recipe body, following the title guidelines"
+        }
+        prompt_config.system_prompt += f"""
+Also write the blog post title and return it ONLY in the '{POST_PART_TITLE}' field - never inside the other sections. Title guidelines:
+{self._get_post_prompt("title")}
+"""
+
+        return prompt_config
+
     def _get_single_plural_subj(self) -> str:
         if self.post_topic not in POST_TOPIC_AI_PROMPT_NOUNS:
             raise ValueError(
@@ -555,7 +727,8 @@ class PostWriter:
         Returns:
             HTML string with CTA and link
         """
-        cta_template = random.choice(self.CTA_LIST)
+        # Seeded by the URL so the same item always gets the same CTA and retried prompts stay cacheable
+        cta_template = random.Random(url).choice(self.CTA_LIST)
         anchor_text = cta_template[CTA_ANCHOR]
         cta_text = cta_template[CTA_TXT]
         
@@ -612,8 +785,8 @@ class PostWriter:
         if not ingredients:
             raise ValueError(f"[ERROR][_update_add_missing_post_parts] Ingredients part is missing from the extracted Notion recipe parts")
         
-        # Prepare AI prompt config
-        sys_prompt = f"You are a skilled recipe copy writer who specializes in writing engaging recipe posts. You know how to write a captivating intro that makes the reader want to read the whole recipe.\n You are writing supporting text for the recipe with the title '{self.post_title}' that has the following ingrediens: '{ingredients}' and the following instructions: '{instructions}'.\n Make sure the writing is smooth and easy to read. Use proper grammar and spelling. Use a friendly and engaging tone.\n".format(ingredients=", ".join(ingredients), instructions=", ".join(instructions))
+        # Prepare AI prompt config; the recipe itself goes last so the static instructions form a cacheable prefix
+        sys_prompt = AI_TXT_GEN_MISSING_PARTS_SYS_PROMPT_RECIPE
 
         intro_prompt = f"Generate a captivating 50-word intro for the recipe'.\n" if intro == "" else f"write the intro '{intro}' to make sure it is engaging and well-written.\n"
         
@@ -628,8 +801,9 @@ class PostWriter:
         conclusion_prompt += " Make sure the conclusion wraps up the recipe nicely and leaves the reader satisfied.Do not mention the recipe structure. '\n"
         
         user_prompt = f"{intro_prompt}, {equipment_prompt}, {low_fodmap_prompt}, {good_to_know_prompt}, and {conclusion_prompt}\n"
-        user_prompt += f"Add new lines to the text to improve readability.\n" 
-        user_prompt += "Do not add Intro or its synonyms as a heading, Do not add Outro or its synonyms as a heading, Do not add Low FODMAP or its synonyms as a heading, Do not add 'what you need to know' or its synonyms as a heading\n"
+        user_prompt += f"Recipe title: '{self.post_title}'\n"
+        user_prompt += f"Ingredients: '{', '.join(ingredients)}'\n"
+        user_prompt += f"Instructions: '{', '.join(instructions)}'\n"
 
         response_format = {
             PostParts.INTRO.field_name: {
@@ -685,7 +859,7 @@ class PostWriter:
         )
         
         self.callback("[PostWriter._update_add_missing_post_parts] Calling OpenAI API for post parts...")
-        post_txt = send_prompt_to_openai(prompt_config, self.test)
+        post_txt = self._send_prompt(prompt_config, prompt_name=AI_USAGE_PROMPT_MISSING_PARTS)
 
         if post_txt["error"] != "":
             raise OpenAIAPIError(f"OpenAI API error: {post_txt['error']} '{post_txt['message']}'")
@@ -0,0 +1,61 @@
+import threading
+from typing import Optional
+
+
+class PrefetchedPost:
+    """Notion data already resolved for one URL during the current batch.
+
+    Fields left as None were not read yet and must be fetched by the consumer.
+    """
+
+    def __init__(self, post=None, title=None, website=None):
+        self.post = post
+        self.title = title
+        self.website = website
+        self.categories = None
+        self.post_type = None
+        self.post_slug = None
+        self.roundup_items = None
+
+
+class PrefetchStore:
+    """Per-run store of Notion data keyed by Notion URL.
+
+    The checks fill it while validating, and the writing steps consume it so the page
+    object, categories, slug, type and roundup items are fetched once per URL per batch.
+    Create a new store for every batch - entries are never refreshed.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, notion_url: str) -> Optional[PrefetchedPost]:
+        with self._lock:
+            return self._entries.get(notion_url)
+
+    def put(self, notion_url: str, post, title, website) -> PrefetchedPost:
+        """Record a resolved Notion page and return its (new) entry."""
+        entry = PrefetchedPost(post=post, title=title, website=website)
+        with self._lock:
+            self._entries[notion_url] = entry
+        return entry
+
+    def update(self, notion_url: str, **fields):
+        """Set extra fields (categories, post_type, post_slug, roundup_items) on an existing entry."""
+        with self._lock:
+            entry = self._entries.get(notion_url)
+            if entry is None:
+                return
+            for name, value in fields.items():
+                if not hasattr(entry, name):
+                    raise AttributeError(f"[ERROR][PrefetchStore.update] Unknown prefetched field '{name}'")
+                setattr(entry, name, value)
+
+    def __contains__(self, notion_url: str) -> bool:
+        with self._lock:
+            return notion_url in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,311 @@
+import asyncio
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from settings import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMITS,
+    RATE_LIMIT_THROTTLE_RETRIES,
+    RATE_LIMIT_DEFAULT_RETRY_AFTER_SECONDS,
+    RATE_LIMIT_AIMD_INCREASE,
+    RATE_LIMIT_AIMD_DECREASE,
+)
+
+# Services with their own limits in settings.RATE_LIMITS
+RATE_LIMIT_NOTION = "notion"
+RATE_LIMIT_OPENAI = "openai"
+RATE_LIMIT_WORDPRESS = "wordpress"  # Limited per website
+
+THROTTLE_STATUS_CODES = (429, 503)
+# An exhausted OpenAI quota is also a 429, but waiting does not help
+_QUOTA_ERROR_CODE = "insufficient_quota"
+# How the OpenAI SDK formats status errors, e.g. "Error code: 429 - {...}"
+_OPENAI_STATUS_PATTERN = re.compile(r"Error code: (\d{3})")
+# How often a coroutine waiting for an in-flight slot checks again (release() cannot wake it up)
+ASYNC_SLOT_POLL_SECONDS = 0.05
+
+
+class RateLimiter:
+    """Token bucket plus AIMD concurrency limit for one service (or one WordPress website).
+
+    Calls take a token (refilled at `rate` per second, up to `burst`) and an in-flight
+    slot. Every successful call raises the concurrency limit a little; a throttled call
+    halves it and pauses the whole limiter for the server's Retry-After, so parallel
+    workers back off together instead of each hammering the service.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._calls = 0
+        self._throttles = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self) -> float:
+        """Block until the call may start; returns the seconds waited."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                delay = self._try_acquire(start)
+                if delay is None:
+                    return time.monotonic() - start
+                self._cond.wait(delay or None)  # Waiting for a slot: release() wakes us up
+
+    async def acquire_async(self) -> float:
+        """acquire() for coroutines: waits with asyncio.sleep, so the event loop keeps running."""
+        start = time.monotonic()
+        while True:
+            with self._cond:
+                delay = self._try_acquire(start)
+            if delay is None:
+                return time.monotonic() - start
+            await asyncio.sleep(delay or ASYNC_SLOT_POLL_SECONDS)
+
+    def _try_acquire(self, start: float) -> Optional[float]:
+        """Take a token and an in-flight slot if the call may start now; call with the lock held.
+
+        Returns None once taken, else the seconds to wait (0 when waiting for a free slot).
+        """
+        now = time.monotonic()
+        self._refill(now)
+        has_slot = self._in_flight < max(self.min_concurrency, int(self.concurrency))
+        has_token = not self.rate or self._tokens >= 1
+        if now < self._paused_until:
+            return self._paused_until - now
+        if not has_token:
+            return (1 - self._tokens) / self.rate
+        if not has_slot:
+            return 0.0
+
+        if self.rate:
+            self._tokens -= 1
+        self._in_flight += 1
+        waited = now - start
+        self._calls += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return None
+
+    def release(self, retry_after: Optional[float] = None, success: bool = True):
+        """Finish a call; pass the Retry-After seconds if the service throttled it.
+
+        A call that failed for another reason (success=False) leaves the concurrency limit as it is.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if retry_after is None:
+                if success:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + RATE_LIMIT_AIMD_INCREASE / self.concurrency)
+            else:
+                self._throttles += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency * RATE_LIMIT_AIMD_DECREASE)
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def get_metrics(self) -> Dict:
+        with self._cond:
+            return {
+                "calls": self._calls,
+                "throttles": self._throttles,
+                "wait_total": self._wait_total,
+                "wait_max": self._wait_max,
+                "concurrency": self.concurrency,
+            }
+
+    def reset_metrics(self):
+        with self._cond:
+            self._calls = 0
+            self._throttles = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+
+    def _refill(self, now: float):
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+
+_limiters: Dict[tuple, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(service: str, key: str = "") -> RateLimiter:
+    """Return the process-wide limiter of a service (and key, e.g. a WordPress website)."""
+    with _limiters_lock:
+        limiter = _limiters.get((service, key))
+        if limiter is None:
+            limits = RATE_LIMITS[service]
+            name = f"{service}:{key}" if key else service
+            limiter = RateLimiter(name, limits["rate"], limits["burst"], limits["max_concurrency"])
+            _limiters[(service, key)] = limiter
+        return limiter
+
+
+def call_limited(service: str, func, *args, limiter_key: str = "", limiter_callback=print, is_throttled=None, idempotent: bool = True, **kwargs):
+    """Call func(*args, **kwargs) under the service's limiter, retrying throttled calls.
+
+    A call is throttled when it raises an HTTP 429/503 style error (see get_retry_after)
+    or, for APIs that return errors instead of raising, when `is_throttled(result)` is True.
+    The call is retried up to RATE_LIMIT_THROTTLE_RETRIES times after the Retry-After
+    delay; any other error is re-raised right away. Calls that are not idempotent (e.g.
+    creating a post) are only retried after a 429, which the server answers without
+    processing the request; a 503 may come after the work was done.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return func(*args, **kwargs)
+
+    limiter = get_limiter(service, limiter_key)
+    for attempt in range(RATE_LIMIT_THROTTLE_RETRIES + 1):
+        limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            retry_after = get_retry_after(e, attempt)
+            limiter.release(retry_after, success=False)
+            if retry_after is None or attempt == RATE_LIMIT_THROTTLE_RETRIES or (not idempotent and get_status_code(e) != 429):
+                raise
+            limiter_callback(f"[WARNING][call_limited] {limiter.name} throttled the call ({e}); retrying in {retry_after:.1f}s")
+            continue
+
+        if is_throttled is not None and is_throttled(result):
+            retry_after = _get_default_retry_after(attempt)
+            limiter.release(retry_after)
+            if attempt == RATE_LIMIT_THROTTLE_RETRIES:
+                return result
+            limiter_callback(f"[WARNING][call_limited] {limiter.name} throttled the call; retrying in {retry_after:.1f}s")
+            continue
+
+        limiter.release()
+        return result
+
+
+async def acall_limited(service: str, func, *args, limiter_key: str = "", limiter_callback=print, is_throttled=None, idempotent: bool = True, **kwargs):
+    """call_limited for coroutine functions: awaits func(*args, **kwargs) under the same limiter.
+
+    Waiting for the limiter and for a Retry-After does not block the event loop. The
+    throttling and retry rules are the ones of call_limited.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return await func(*args, **kwargs)
+
+    limiter = get_limiter(service, limiter_key)
+    for attempt in range(RATE_LIMIT_THROTTLE_RETRIES + 1):
+        await limiter.acquire_async()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            retry_after = get_retry_after(e, attempt)
+            limiter.release(retry_after, success=False)
+            if retry_after is None or attempt == RATE_LIMIT_THROTTLE_RETRIES or (not idempotent and get_status_code(e) != 429):
+                raise
+            limiter_callback(f"[WARNING][acall_limited] {limiter.name} throttled the call ({e}); retrying in {retry_after:.1f}s")
+            continue
+
+        if is_throttled is not None and is_throttled(result):
+            retry_after = _get_default_retry_after(attempt)
+            limiter.release(retry_after)
+            if attempt == RATE_LIMIT_THROTTLE_RETRIES:
+                return result
+            limiter_callback(f"[WARNING][acall_limited] {limiter.name} throttled the call; retrying in {retry_after:.1f}s")
+            continue
+
+        limiter.release()
+        return result
+
+
+def get_retry_after(error: Exception, attempt: int = 0) -> Optional[float]:
+    """Return how long to back off if `error` is a throttling error, else None.
+
+    Only HTTP 429/503 errors are throttling, and not an exhausted OpenAI quota. Honors a
+    Retry-After header (seconds or HTTP date) on the error or its response; without one,
+    backs off exponentially from RATE_LIMIT_DEFAULT_RETRY_AFTER_SECONDS.
+    """
+    response = getattr(error, "response", None)
+    status = get_status_code(error)
+    if status not in THROTTLE_STATUS_CODES or _is_quota_error(getattr(error, "code", None), str(error)):
+        return None
+
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None) or {}
+    header = (headers.get("Retry-After") or headers.get("retry-after")) if hasattr(headers, "get") else None
+    if header is not None:
+        seconds = _parse_retry_after(header)
+        if seconds is not None:
+            return seconds
+    return _get_default_retry_after(attempt)
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """Return the HTTP status of a requests/openai style error, or None."""
+    response = getattr(error, "response", None)
+    return getattr(error, "status_code", None) or getattr(error, "status", None) or getattr(response, "status_code", None)
+
+
+def is_openai_throttled(response) -> bool:
+    """send_prompt_to_openai reports errors in the response instead of raising: look for a 429/503 status in it."""
+    if not isinstance(response, dict) or not response.get("error"):
+        return False
+    message = str(response.get("message", ""))
+    status = response.get("status_code")
+    if status is None:
+        match = _OPENAI_STATUS_PATTERN.search(message)
+        status = int(match.group(1)) if match else None
+    return status in THROTTLE_STATUS_CODES and not _is_quota_error(response.get("code"), message)
+
+
+def get_limiter_metrics() -> Dict[str, Dict]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.get_metrics() for limiter in limiters}
+
+
+def reset_limiter_metrics():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        limiter.reset_metrics()
+
+
+def format_limiter_metrics() -> str:
+    metrics = {name: stats for name, stats in get_limiter_metrics().items() if stats["calls"]}
+    if not metrics:
+        return "[INFO][rate_limiter] No rate-limited calls recorded."
+
+    lines = ["=== Rate limiter waits ==="]
+    for name, stats in sorted(metrics.items()):
+        lines.append(
+            f"{name}: {stats['calls']} call(s), waited {stats['wait_total']:.1f}s "
+            f"(max {stats['wait_max']:.1f}s), {stats['throttles']} throttled, concurrency {stats['concurrency']:.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _is_quota_error(code, text: str) -> bool:
+    return code == _QUOTA_ERROR_CODE or _QUOTA_ERROR_CODE in text
+
+
+def _get_default_retry_after(attempt: int) -> float:
+    return RATE_LIMIT_DEFAULT_RETRY_AFTER_SECONDS * (2 ** attempt)
+
+
+def _parse_retry_after(value) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
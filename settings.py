@@ -1,5 +1,6 @@
 import sys
 import os
+import tempfile
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ConfigKeeper')))
 
 from secret_env import (
@@ -15,3 +16,108 @@ APP_WINDOW_SIZE = "1000x700"
 
 # Feature flags
 ENABLE_ADD_WP_IMGS_BUTTON = True
+AI_TITLE_WITH_BODY = True  # Single recipe posts: generate the title in the same AI call as the body
+AI_STREAMING_ENABLED = False  # Stream structured AI responses and log each post part as soon as it is written
+AI_STREAM_TIMEOUT_SECONDS = 600
+
+# Shared rate limits (per service; WordPress per website). rate = requests/s, burst = bucket size
+RATE_LIMIT_ENABLED = True
+RATE_LIMITS = {
+    "notion": {"rate": 3, "burst": 3, "max_concurrency": 3},
+    "openai": {"rate": 5, "burst": 10, "max_concurrency": 8},
+    "wordpress": {"rate": 4, "burst": 4, "max_concurrency": 4},
+}
+RATE_LIMIT_THROTTLE_RETRIES = 3
+RATE_LIMIT_DEFAULT_RETRY_AFTER_SECONDS = 2  # Doubled on each retry when the server sends no Retry-After
+RATE_LIMIT_AIMD_INCREASE = 1.0  # Concurrency grows by about this much per `concurrency` successful calls
+RATE_LIMIT_AIMD_DECREASE = 0.5  # Concurrency is multiplied by this on every throttled call
+
+# Deferred Notion writes of write_post: with NOTION_DEFER_PUBLISH the "Published" statuses of a run are
+# sent concurrently at its end (main.py --defer-publish)
+NOTION_WRITE_FLUSH_WORKERS = 4
+NOTION_DEFER_PUBLISH = False
+
+# OpenAI Batch API mode (main.py --batch): half-price tokens for large queues that can wait
+AI_BATCH_COMPLETION_WINDOW = "24h"
+AI_BATCH_POLL_SECONDS = 60
+AI_BATCH_TIMEOUT_SECONDS = 25 * 60 * 60
+AI_BATCH_MAX_ROUNDS = 3  # Body prompts first, then prompts that need their answers (e.g. the separate title)
+AI_BATCH_PRICE_FACTOR = 0.5
+
+# Concurrency
+WRITE_POST_MAX_WORKERS = 1  # Notion URLs written in parallel; 1 keeps the sequential, fail-fast behaviour
+CHECKS_MAX_WORKERS = 8  # Notion URLs validated in parallel by the checks
+WP_CLIENT_POOL_ENABLED = True  # Reuse one WordPress client per website for the whole app session
+WP_UPLOAD_MAX_WORKERS = 4  # Images uploaded to WordPress in parallel per post
+WP_UPLOAD_RETRIES = 2  # Extra attempts per image when an upload fails
+WP_UPLOAD_RETRY_DELAY_SECONDS = 2  # Doubled after every failed attempt
+
+# Image pre-processing before the WordPress upload (resize, strip metadata, re-encode)
+IMG_PREPROCESS_ENABLED = False
+IMG_PREPROCESS_MAX_EDGE = 2048  # px, longest side
+IMG_PREPROCESS_FORMAT = "webp"  # "webp" or "jpeg"
+IMG_PREPROCESS_QUALITY = 82
+IMG_PREPROCESS_MAX_WORKERS = 4  # Worker processes
+IMG_PREPROCESS_CACHE_DIR = os.path.join(tempfile.gettempdir(), "my_koala_writer_img_cache")
+IMG_PREPROCESS_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60  # 1 week
+
+# Local app data (caches, journals, indexes)
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".my_koala_writer")
+
+# AI response cache
+AI_RESPONSE_CACHE_ENABLED = True
+AI_RESPONSE_CACHE_DIR = os.path.join(APP_DATA_DIR, "ai_cache")
+AI_RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 1 week
+AI_RESPONSE_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+# Batch journal (lets an interrupted batch resume where it stopped)
+BATCH_JOURNAL_ENABLED = True
+BATCH_JOURNAL_PATH = os.path.join(APP_DATA_DIR, "batch_journal.jsonl")
+BATCH_JOURNAL_MAX_AGE_SECONDS = 24 * 60 * 60  # Unfinished URLs not advanced for 1 day start from scratch, unless they reached WordPress
+
+# Index of images already uploaded to WordPress (content hash + website -> media)
+WP_MEDIA_INDEX_ENABLED = True
+WP_MEDIA_INDEX_PATH = os.path.join(APP_DATA_DIR, "wp_media_index.json")
+
+# Per-stage timings of write_post runs (one JSONL file per GUI run)
+PIPELINE_TIMING_ENABLED = True
+PIPELINE_TIMING_DIR = os.path.join(APP_DATA_DIR, "timings")
+
+# AI token/cost accounting (one JSON report per GUI run)
+AI_USAGE_TRACKING_ENABLED = True
+AI_USAGE_REPORT_DIR = os.path.join(APP_DATA_DIR, "ai_usage")
+# USD per 1M tokens as (input, output, cached input); models not listed are reported with a cost of 0.
+# Without a cached input price, cached prompt tokens are priced as input
+AI_USAGE_PRICES_PER_1M_TOKENS = {
+    "gpt-5": (1.25, 10.0, 0.125),
+    "gpt-5-mini": (0.25, 2.0, 0.025),
+    "gpt-5-nano": (0.05, 0.4, 0.005),
+    "gpt-4.1": (2.0, 8.0, 0.5),
+    "gpt-4.1-mini": (0.4, 1.6, 0.1),
+    "gpt-4o": (2.5, 10.0, 1.25),
+    "gpt-4o-mini": (0.15, 0.6, 0.075),
+}
+
+# GUI log view: the window keeps the last lines only; the full log of every GUI run is written to GUI_LOG_DIR
+GUI_LOG_POLL_MS = 100
+GUI_LOG_MAX_LINES = 5000
+GUI_LOG_MAX_MESSAGE_CHARS = 20000  # Longer messages (e.g. test-mode post dumps) are cut in the window only
+GUI_LOG_MAX_MESSAGES_PER_TICK = 5000  # The rest waits for the next poll, so a burst cannot freeze the window
+GUI_LOG_DIR = os.path.join(APP_DATA_DIR, "logs")
+GUI_LOG_KEEP_FILES = 20
+
+# Headless job server (main.py --serve): local HTTP API in front of a persistent job queue
+JOB_SERVER_HOST = "127.0.0.1"  # Local only
+JOB_SERVER_PORT = 8765
+JOB_SERVER_WORKERS = 2  # Jobs processed at the same time
+JOB_QUEUE_PATH = os.path.join(APP_DATA_DIR, "job_queue.jsonl")
+JOB_QUEUE_KEEP_FINISHED = 200  # Most recent finished jobs kept when the server restarts
+JOB_LOG_LINES = 500  # Log lines kept in memory per job for GET /jobs/<id>
+JOB_SERVER_TOKEN_PATH = os.path.join(APP_DATA_DIR, "job_server_token")  # Generated on the first start; JobClient reads it
+
+# Notion watcher (main.py --watch): polls the posts database and queues the posts that are ready on the job server.
+# The database and the token are taken from the Notion configuration (notion_config / notion_api)
+NOTION_WATCH_POLL_SECONDS = 60
+NOTION_WATCH_SETTLE_SECONDS = 120  # Pages edited more recently wait for a later poll, so half-edited pages are not picked up
+NOTION_WATCH_ADD_WP_IMGS = True  # Also queue add_wp_imgs jobs for posts in an image-ready status
+NOTION_WATCH_STATE_PATH = os.path.join(APP_DATA_DIR, "notion_watch_state.json")
@@ -0,0 +1,93 @@
+"""
+Import-time profile of the app start, in the spirit of `python -X importtime`.
+
+The one-file exe cannot be started with -X options, so `main.py --import-report` installs
+ImportProfiler as early as possible instead: it wraps builtins.__import__ and records, for
+every import that loaded new modules, its own time and its time including nested imports.
+The report lists the slowest ones, which is where lazy imports pay off.
+"""
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+IMPORT_REPORT_FLAG = "--import-report"
+IMPORT_REPORT_LIMIT = 25
+
+
+class ImportProfiler:
+    """Records the import times of the thread that started it until stopped."""
+
+    def __init__(self):
+        self.records = []  # (module, self seconds, cumulative seconds, nesting depth), in completion order
+        self.started_at = None
+        self._original_import = None
+        self._thread_id = None
+        self._stack = []
+
+    def start(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            self._thread_id = threading.get_ident()
+            self.started_at = time.perf_counter()
+            builtins.__import__ = self._import
+        return self
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        return self
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import or builtins.__import__
+        module_name = self._resolve_name(name, globals, level)
+        if not name and fromlist:
+            # "from . import x": the interesting names are the submodules
+            module_name = ", ".join(f"{module_name}.{item}" for item in fromlist)
+        if threading.get_ident() != self._thread_id or (module_name in sys.modules and not fromlist):
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            if len(sys.modules) > modules_before:
+                self.records.append((module_name, cumulative - nested, cumulative, len(self._stack)))
+
+    @staticmethod
+    def _resolve_name(name: str, globals, level: int) -> str:
+        if not level:
+            return name
+        package = (globals or {}).get("__package__") or ""
+        try:
+            return importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return name
+
+    def total_seconds(self) -> float:
+        """Time spent in top-level imports."""
+        return sum(cumulative for _, _, cumulative, depth in self.records if depth == 0)
+
+    def slowest(self, limit: int = IMPORT_REPORT_LIMIT) -> list:
+        """Return the `limit` records with the highest cumulative time."""
+        return sorted(self.records, key=lambda record: record[2], reverse=True)[:limit]
+
+    def format_report(self, limit: int = IMPORT_REPORT_LIMIT) -> str:
+        elapsed = time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+        lines = [
+            f"=== Import report: {len(self.records)} import(s) took {self.total_seconds():.3f}s "
+            f"of {elapsed:.3f}s since start ===",
+            f"{'self [ms]':>10} {'cumulative [ms]':>16}  module",
+        ]
+        for module_name, self_seconds, cumulative, depth in self.slowest(limit):
+            lines.append(f"{self_seconds * 1000:>10.1f} {cumulative * 1000:>16.1f}  {'  ' * depth}{module_name}")
+        return "\n".join(lines)
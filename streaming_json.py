@@ -0,0 +1,159 @@
+import json
+from typing import Callable, Optional
+
+# Parser states
+_STATE_BEFORE_OBJECT = "before_object"
+_STATE_EXPECT_KEY = "expect_key"
+_STATE_IN_KEY = "in_key"
+_STATE_EXPECT_COLON = "expect_colon"
+_STATE_EXPECT_VALUE = "expect_value"
+_STATE_IN_VALUE = "in_value"
+_STATE_AFTER_VALUE = "after_value"
+_STATE_DONE = "done"
+
+_WHITESPACE = " \t\r\n"
+_CLOSING = {"{": "}", "[": "]"}
+
+
+class StreamingJSONError(ValueError):
+    """Raised as soon as a streamed response can no longer become a valid JSON object."""
+
+
+class StreamingJSONObjectParser:
+    """Incremental parser for a streamed top-level JSON object.
+
+    Feed it the response text chunk by chunk as it arrives. Each top-level field is
+    decoded and handed to `on_field(key, value)` the moment its value closes, so
+    finished sections can be shown while the rest is still being generated. A response
+    that cannot be a JSON object raises StreamingJSONError on the chunk that breaks it,
+    not after the whole generation.
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, object], None]] = None):
+        self.on_field = on_field
+        self.fields = {}
+        self._state = _STATE_BEFORE_OBJECT
+        self._pos = 0
+        self._key_chars = []
+        self._key = None
+        self._value_chars = []
+        self._stack = []  # open containers of the current value
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _STATE_DONE
+
+    def feed(self, chunk: str):
+        for char in chunk:
+            self._feed_char(char)
+            self._pos += 1
+
+    def close(self) -> dict:
+        """Finish parsing and return all fields; raises StreamingJSONError if the object is incomplete."""
+        if self._state != _STATE_DONE:
+            raise StreamingJSONError(f"Response ended before the JSON object was complete (state: {self._state}, {self._pos} chars)")
+        return dict(self.fields)
+
+    def _feed_char(self, char: str):
+        state = self._state
+        if state == _STATE_IN_VALUE:
+            self._feed_value_char(char)
+        elif state == _STATE_IN_KEY:
+            self._key_chars.append(char)
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                try:
+                    self._key = json.loads("".join(self._key_chars))
+                except ValueError as e:
+                    self._raise(f"invalid key: {e}")
+                self._key_chars = []
+                self._state = _STATE_EXPECT_COLON
+        elif char in _WHITESPACE:
+            return
+        elif state == _STATE_BEFORE_OBJECT:
+            self._expect(char, "{")
+            self._state = _STATE_EXPECT_KEY
+        elif state == _STATE_EXPECT_KEY:
+            if char == "}" and not self.fields:
+                self._state = _STATE_DONE
+                return
+            self._expect(char, '"')
+            self._key_chars = [char]
+            self._state = _STATE_IN_KEY
+        elif state == _STATE_EXPECT_COLON:
+            self._expect(char, ":")
+            self._state = _STATE_EXPECT_VALUE
+        elif state == _STATE_EXPECT_VALUE:
+            self._value_chars = []
+            self._state = _STATE_IN_VALUE
+            self._feed_value_char(char)
+        elif state == _STATE_AFTER_VALUE:
+            self._end_value(char)
+        else:
+            self._raise(f"unexpected {char!r} after the end of the JSON object")
+
+    def _feed_value_char(self, char: str):
+        if self._in_string:
+            self._value_chars.append(char)
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                if not self._stack:
+                    self._emit_value()
+            return
+
+        if char in "{[":
+            self._stack.append(char)
+        elif char in "}]":
+            if not self._stack:
+                # End of a scalar value (number/true/false/null) at the top level
+                self._emit_value()
+                self._end_value(char)
+                return
+            if _CLOSING[self._stack.pop()] != char:
+                self._raise(f"mismatched {char!r}")
+        elif char == '"':
+            self._in_string = True
+        elif char == "," and not self._stack:
+            self._emit_value()
+            self._end_value(char)
+            return
+
+        self._value_chars.append(char)
+        if char in "}]" and not self._stack:
+            self._emit_value()
+
+    def _emit_value(self):
+        value_text = "".join(self._value_chars).strip()
+        try:
+            value = json.loads(value_text)
+        except ValueError as e:
+            self._raise(f"invalid value for '{self._key}': {e}")
+        self.fields[self._key] = value
+        self._value_chars = []
+        self._state = _STATE_AFTER_VALUE
+        if self.on_field is not None:
+            self.on_field(self._key, value)
+
+    def _end_value(self, char: str):
+        if char == ",":
+            self._state = _STATE_EXPECT_KEY
+        elif char == "}":
+            self._state = _STATE_DONE
+        else:
+            self._raise(f"expected ',' or '}}' after '{self._key}', got {char!r}")
+
+    def _expect(self, char: str, expected: str):
+        if char != expected:
+            self._raise(f"expected {expected!r}, got {char!r}")
+
+    def _raise(self, reason: str):
+        raise StreamingJSONError(f"Malformed JSON response at char {self._pos}: {reason}")
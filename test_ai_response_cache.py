@@ -0,0 +1,150 @@
+"""
+Unit tests for ai_response_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ConfigKeeper')))
+
+from ai_response_cache import AIResponseCache
+
+
+class FakePromptConfig:
+    """Stand-in with the same attributes as chatgpt_api.AIPromptConfig."""
+
+    def __init__(self, system_prompt="sys", user_prompt="user", response_format=None, ai_model="model", verbosity=1):
+        self.system_prompt = system_prompt
+        self.user_prompt = user_prompt
+        self.response_format = response_format if response_format is not None else {"intro": {"type": "string"}}
+        self.ai_model = ai_model
+        self.verbosity = verbosity
+
+
+class TestAIResponseCacheKey(unittest.TestCase):
+    """Test cache key generation"""
+
+    def test_same_prompt_same_key(self):
+        self.assertEqual(AIResponseCache.make_key(FakePromptConfig()), AIResponseCache.make_key(FakePromptConfig()))
+
+    def test_every_key_field_changes_key(self):
+        base_key = AIResponseCache.make_key(FakePromptConfig())
+        variants = [
+            FakePromptConfig(system_prompt="other"),
+            FakePromptConfig(user_prompt="other"),
+            FakePromptConfig(response_format={"title": {"type": "string"}}),
+            FakePromptConfig(ai_model="other-model"),
+            FakePromptConfig(verbosity=2),
+        ]
+        for variant in variants:
+            self.assertNotEqual(base_key, AIResponseCache.make_key(variant))
+
+
+class TestAIResponseCacheStorage(unittest.TestCase):
+    """Test storing, expiring and evicting entries"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "ai_cache")
+        self.callback = Mock()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_put_then_get_returns_response(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, ttl_seconds=60, max_bytes=0, callback=self.callback)
+        cache.put(FakePromptConfig(), {"message": "Hello", "error": ""})
+
+        self.assertEqual(cache.get(FakePromptConfig()), {"message": "Hello", "error": ""})
+
+    def test_miss_returns_none_without_creating_folder(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, callback=self.callback)
+
+        self.assertIsNone(cache.get(FakePromptConfig()))
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_error_responses_are_not_cached(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, callback=self.callback)
+        cache.put(FakePromptConfig(), {"message": "Rate limit", "error": "API_ERROR"})
+
+        self.assertIsNone(cache.get(FakePromptConfig()))
+
+    def test_bypass_skips_reads_but_still_writes(self):
+        bypass_cache = AIResponseCache(cache_dir=self.cache_dir, bypass=True, callback=self.callback)
+        bypass_cache.put(FakePromptConfig(), {"message": "Fresh", "error": ""})
+
+        self.assertIsNone(bypass_cache.get(FakePromptConfig()))
+        normal_cache = AIResponseCache(cache_dir=self.cache_dir, callback=self.callback)
+        self.assertEqual(normal_cache.get(FakePromptConfig())["message"], "Fresh")
+
+    def test_expired_entry_is_dropped(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, ttl_seconds=10, max_bytes=0, callback=self.callback)
+        cache.put(FakePromptConfig(), {"message": "Old", "error": ""})
+
+        # Rewind the last use past the TTL
+        path = os.path.join(self.cache_dir, AIResponseCache.make_key(FakePromptConfig()) + ".json")
+        os.utime(path, (time.time() - 20, time.time() - 20))
+
+        self.assertIsNone(cache.get(FakePromptConfig()))
+        self.assertFalse(os.path.exists(path))
+
+    def test_hit_keeps_the_entry_alive(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, ttl_seconds=10, max_bytes=0, callback=self.callback)
+        cache.put(FakePromptConfig(), {"message": "Used", "error": ""})
+        path = os.path.join(self.cache_dir, AIResponseCache.make_key(FakePromptConfig()) + ".json")
+        os.utime(path, (time.time() - 8, time.time() - 8))
+
+        self.assertIsNotNone(cache.get(FakePromptConfig()))
+        # An eviction pass right after the hit keeps it too
+        cache.put(FakePromptConfig(user_prompt="other"), {"message": "Other", "error": ""})
+        self.assertTrue(os.path.exists(path))
+
+    def test_usage_is_stored_with_the_response(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, callback=self.callback)
+        usage = {"prompt_tokens": 100, "completion_tokens": 20, "prompt_tokens_details": {"cached_tokens": 64}}
+        cache.put(FakePromptConfig(), {"message": "Hello", "error": "", "usage": usage})
+
+        self.assertEqual(cache.get(FakePromptConfig())["usage"], usage)
+
+    def test_size_limit_evicts_least_recently_used(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, ttl_seconds=0, max_bytes=10**6, callback=self.callback)
+        first = FakePromptConfig(user_prompt="first")
+        second = FakePromptConfig(user_prompt="second")
+        cache.put(first, {"message": "x" * 400, "error": ""})
+        cache.put(second, {"message": "y" * 400, "error": ""})
+
+        first_path = os.path.join(self.cache_dir, AIResponseCache.make_key(first) + ".json")
+        second_path = os.path.join(self.cache_dir, AIResponseCache.make_key(second) + ".json")
+        os.utime(first_path, (time.time() - 100, time.time() - 100))
+
+        entry_size = os.path.getsize(second_path)
+        cache.max_bytes = entry_size * 2 + 50  # Room for two entries, not three
+        cache.put(FakePromptConfig(user_prompt="third"), {"message": "z" * 400, "error": ""})
+
+        self.assertFalse(os.path.exists(first_path))
+        self.assertTrue(os.path.exists(second_path))
+
+    def test_unreadable_entry_is_dropped(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, callback=self.callback)
+        os.makedirs(self.cache_dir)
+        path = os.path.join(self.cache_dir, AIResponseCache.make_key(FakePromptConfig()) + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("not json")
+
+        self.assertIsNone(cache.get(FakePromptConfig()))
+        self.assertFalse(os.path.exists(path))
+
+    def test_clear_removes_entries(self):
+        cache = AIResponseCache(cache_dir=self.cache_dir, callback=self.callback)
+        cache.put(FakePromptConfig(), {"message": "Hello", "error": ""})
+        cache.clear()
+
+        self.assertIsNone(cache.get(FakePromptConfig()))
+
+
+if __name__ == '__main__':
+    unittest.main()
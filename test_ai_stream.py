@@ -0,0 +1,43 @@
+"""
+Unit tests for ai_stream.py
+"""
+
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from ai_stream import get_openai_client, get_openai_client_config
+
+
+class TestOpenAIClientConfig(unittest.TestCase):
+    """Test that the OpenAI clients are configured like chatgpt_api's"""
+
+    def _patch_modules(self, chatgpt_api):
+        self.openai = SimpleNamespace(OpenAI=Mock(return_value="client"))
+        return patch.dict(sys.modules, {"chatgpt_api": chatgpt_api, "openai": self.openai})
+
+    def test_shared_client_is_reused(self):
+        shared_client = Mock()
+        with self._patch_modules(SimpleNamespace(client=shared_client)):
+            client = get_openai_client(timeout=5)
+
+        self.assertIs(client, shared_client.with_options.return_value)
+        shared_client.with_options.assert_called_once_with(timeout=5)
+        self.openai.OpenAI.assert_not_called()
+
+    def test_client_is_built_from_the_chatgpt_api_settings(self):
+        chatgpt_api = SimpleNamespace(OPENAI_API_KEY="sk-test", OPENAI_BASE_URL="https://proxy/v1")
+        with self._patch_modules(chatgpt_api):
+            self.assertEqual(get_openai_client(timeout=5), "client")
+
+        self.openai.OpenAI.assert_called_once_with(api_key="sk-test", base_url="https://proxy/v1", timeout=5)
+
+    def test_missing_api_key_raises(self):
+        for chatgpt_api in (SimpleNamespace(), SimpleNamespace(OPENAI_API_KEY="")):
+            with self._patch_modules(chatgpt_api), self.assertRaises(ValueError):
+                get_openai_client_config()
+
+
+if __name__ == '__main__':
+    unittest.main()
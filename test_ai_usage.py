@@ -0,0 +1,130 @@
+"""
+Unit tests for ai_usage.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from ai_usage import (
+    AIUsageTracker,
+    get_response_usage,
+    AI_USAGE_PROMPT_POST_BODY,
+    AI_USAGE_PROMPT_TITLE,
+)
+
+
+def make_prompt_config(model="gpt-test", system_prompt="", user_prompt=""):
+    return SimpleNamespace(ai_model=model, verbosity="high", system_prompt=system_prompt, user_prompt=user_prompt)
+
+
+class TestGetResponseUsage(unittest.TestCase):
+    """Test reading token counts from the different OpenAI response shapes"""
+
+    def test_chat_completions_usage(self):
+        response = {"usage": {"prompt_tokens": 100, "completion_tokens": 20, "prompt_tokens_details": {"cached_tokens": 64}}}
+        self.assertEqual(get_response_usage(response), {"prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 64})
+
+    def test_responses_api_usage_object(self):
+        usage = SimpleNamespace(input_tokens=50, output_tokens=10, input_tokens_details=SimpleNamespace(cached_tokens=0))
+        self.assertEqual(get_response_usage({"usage": usage}), {"prompt_tokens": 50, "completion_tokens": 10, "cached_tokens": 0})
+
+    def test_missing_usage(self):
+        self.assertEqual(get_response_usage({"error": "", "message": "hi"}), {})
+        self.assertEqual(get_response_usage(None), {})
+
+
+class TestAIUsageTracker(unittest.TestCase):
+    """Test recording, cost and aggregation of AI calls"""
+
+    def setUp(self):
+        self.tracker = AIUsageTracker(prices={"gpt-test": (1.0, 4.0)})
+        self.usage_response = {"error": "", "message": "x", "usage": {"prompt_tokens": 1000, "completion_tokens": 500}}
+
+    def test_cost_from_price_table(self):
+        self.tracker.record(make_prompt_config(), self.usage_response, 2.0, notion_url="u1", topic="recipes", prompt_name=AI_USAGE_PROMPT_POST_BODY)
+
+        totals = self.tracker.totals()
+        self.assertEqual(totals["calls"], 1)
+        self.assertEqual(totals["prompt_tokens"], 1000)
+        self.assertEqual(totals["completion_tokens"], 500)
+        self.assertAlmostEqual(totals["cost"], (1000 * 1.0 + 500 * 4.0) / 1_000_000)
+        self.assertEqual(totals["latency"], 2.0)
+
+    def test_cached_prompt_tokens_use_the_cached_input_price(self):
+        tracker = AIUsageTracker(prices={"gpt-test": (1.0, 4.0, 0.1)})
+        response = {"error": "", "message": "x", "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "prompt_tokens_details": {"cached_tokens": 800}}}
+        tracker.record(make_prompt_config(), response, 1.0)
+
+        self.assertAlmostEqual(tracker.totals()["cost"], (200 * 1.0 + 800 * 0.1 + 500 * 4.0) / 1_000_000)
+
+    def test_cached_responses_are_free(self):
+        self.tracker.record(make_prompt_config(), self.usage_response, 0.01, from_cache=True)
+
+        totals = self.tracker.totals()
+        self.assertEqual(totals["cached_calls"], 1)
+        self.assertEqual(totals["cost"], 0.0)
+
+    def test_cached_responses_are_reported_as_saved_tokens(self):
+        self.tracker.record(make_prompt_config(), self.usage_response, 2.0)
+        self.tracker.record(make_prompt_config(), self.usage_response, 0.01, from_cache=True)
+
+        totals = self.tracker.totals()
+        self.assertEqual((totals["prompt_tokens"], totals["completion_tokens"]), (1000, 500))
+        self.assertEqual((totals["saved_prompt_tokens"], totals["saved_completion_tokens"]), (1000, 500))
+        summary = self.tracker.format_summary()
+        self.assertIn("Tokens: 1000 in", summary)
+        self.assertIn("Saved by cache: 1000 in / 500 out", summary)
+
+    def test_missing_usage_is_estimated(self):
+        self.tracker.record(make_prompt_config(user_prompt="a" * 400), {"error": "", "message": "b" * 40}, 1.0)
+
+        call = self.tracker.get_calls()[0]
+        self.assertTrue(call["estimated"])
+        self.assertEqual(call["prompt_tokens"], 100)
+        self.assertEqual(call["completion_tokens"], 10)
+
+    def test_unknown_model_costs_nothing(self):
+        self.tracker.record(make_prompt_config(model="other"), self.usage_response, 1.0)
+        self.assertEqual(self.tracker.totals()["cost"], 0.0)
+
+    def test_aggregate_by_post_topic_and_prompt(self):
+        self.tracker.record(make_prompt_config(), self.usage_response, 1.0, notion_url="u1", topic="recipes", prompt_name=AI_USAGE_PROMPT_POST_BODY)
+        self.tracker.record(make_prompt_config(), self.usage_response, 1.0, notion_url="u1", topic="recipes", prompt_name=AI_USAGE_PROMPT_TITLE)
+        self.tracker.record(make_prompt_config(), self.usage_response, 1.0, notion_url="u2", topic="crafts", prompt_name=AI_USAGE_PROMPT_POST_BODY)
+
+        self.assertEqual(self.tracker.aggregate_by("url")["u1"]["calls"], 2)
+        self.assertEqual(self.tracker.aggregate_by("topic")["crafts"]["calls"], 1)
+        self.assertEqual(self.tracker.aggregate_by("prompt")[AI_USAGE_PROMPT_POST_BODY]["prompt_tokens"], 2000)
+        self.assertIn(AI_USAGE_PROMPT_TITLE, self.tracker.format_summary())
+
+    def test_export_json(self):
+        self.tracker.record(make_prompt_config(), self.usage_response, 1.0, notion_url="u1", topic="recipes", prompt_name=AI_USAGE_PROMPT_POST_BODY)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sub", "usage.json")
+            self.tracker.export_json(path)
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+
+        self.assertEqual(report["totals"]["calls"], 1)
+        self.assertIn("u1", report["by_post"])
+        self.assertIn("recipes", report["by_topic"])
+        self.assertEqual(len(report["calls"]), 1)
+
+    def test_batch_answers_are_not_recorded_again(self):
+        self.tracker.record(make_prompt_config(), self.usage_response, 0.5, price_factor=0.5, primed_key="key-1")
+
+        self.assertTrue(self.tracker.take_primed("key-1"))
+        self.assertFalse(self.tracker.take_primed("key-1"))
+        self.assertFalse(self.tracker.take_primed("key-2"))
+        self.assertEqual(self.tracker.totals()["calls"], 1)
+
+    def test_empty_summary(self):
+        self.assertEqual(AIUsageTracker().format_summary(), "[INFO][AIUsageTracker] No AI calls recorded.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for async_services.py
+"""
+
+import asyncio
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from async_services import AsyncServices, NOTION_RICH_TEXT_MAX_CHARS
+from notion_config import (
+    POST_POST_STATUS_PROP,
+    POST_POST_STATUS_PUBLISHED_ID,
+    POST_AI_IMAGE_PROMPT_PROP,
+)
+
+
+class FakeOpenAIError(Exception):
+    pass
+
+
+class TestAsyncServices(unittest.TestCase):
+    """Test the coroutine OpenAI and Notion calls"""
+
+    def setUp(self):
+        self.openai = Mock()
+        self.openai.chat.completions.create = AsyncMock()
+        self.notion = Mock()
+        self.notion.pages.update = AsyncMock(side_effect=lambda page_id, properties: {"id": page_id, "properties": properties})
+        self.services = AsyncServices(openai_client=self.openai, notion_client=self.notion)
+        self.prompt_config = SimpleNamespace(ai_model="gpt-test", system_prompt="System", user_prompt="User", response_format="", verbosity="low")
+        self.modules = patch.dict(sys.modules, {"openai": SimpleNamespace(OpenAIError=FakeOpenAIError)})
+        self.modules.start()
+        self.addCleanup(self.modules.stop)
+
+    def test_send_prompt_returns_message_and_usage(self):
+        usage = Mock()
+        usage.model_dump.return_value = {"prompt_tokens": 10, "completion_tokens": 5}
+        self.openai.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Hello"))],
+            usage=usage,
+        )
+
+        response = asyncio.run(self.services.send_prompt(self.prompt_config, callback=Mock()))
+
+        self.assertEqual(response, {"message": "Hello", "error": "", "usage": {"prompt_tokens": 10, "completion_tokens": 5}})
+        request = self.openai.chat.completions.create.await_args.kwargs
+        self.assertEqual(request["model"], "gpt-test")
+        self.assertEqual(request["extra_body"], {"verbosity": "low"})
+
+    def test_send_prompt_reports_openai_errors(self):
+        self.openai.chat.completions.create.side_effect = FakeOpenAIError("Bad request")
+
+        response = asyncio.run(self.services.send_prompt(self.prompt_config, callback=Mock()))
+
+        self.assertEqual(response, {"message": "Bad request", "error": "FakeOpenAIError"})
+
+    def test_update_post_status_uses_the_page_property_type(self):
+        post = {"id": "page-1", "properties": {POST_POST_STATUS_PROP: {"type": "select"}}}
+
+        updated = asyncio.run(self.services.update_post_status_to_published(post, callback=Mock()))
+
+        self.assertEqual(updated["properties"], {POST_POST_STATUS_PROP: {"select": {"id": POST_POST_STATUS_PUBLISHED_ID}}})
+        self.notion.pages.update.assert_awaited_once()
+
+    def test_update_post_status_in_test_mode_sends_nothing(self):
+        post = {"id": "page-1"}
+
+        self.assertIs(asyncio.run(self.services.update_post_status(post, "status-id", test=True)), post)
+        self.notion.pages.update.assert_not_awaited()
+
+    def test_update_post_ai_img_prompt_splits_long_text(self):
+        prompt = "x" * (NOTION_RICH_TEXT_MAX_CHARS + 10)
+
+        updated = asyncio.run(self.services.update_post_ai_img_prompt({"id": "page-1"}, prompt, callback=Mock()))
+
+        rich_text = updated["properties"][POST_AI_IMAGE_PROMPT_PROP]["rich_text"]
+        self.assertEqual([len(item["text"]["content"]) for item in rich_text], [NOTION_RICH_TEXT_MAX_CHARS, 10])
+
+    def test_aclose_leaves_injected_clients_open(self):
+        self.notion.aclose = AsyncMock()
+
+        asyncio.run(self.services.aclose())
+
+        self.notion.aclose.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for batch_journal.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from batch_journal import (
+    BatchJournal,
+    JOURNAL_JOB_WRITE_POST,
+    JOURNAL_JOB_ADD_WP_IMGS,
+    JOURNAL_STAGE_STATUS_SET_UP,
+    JOURNAL_STAGE_TEXT_GENERATED,
+    JOURNAL_STAGE_WP_POST_CREATED,
+    JOURNAL_STAGE_IMAGES_ADDED,
+    JOURNAL_STAGE_PUBLISHED,
+)
+
+
+class TestBatchJournal(unittest.TestCase):
+    """Test recording, replaying and finishing journal stages"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "sub", "journal.jsonl")
+        self.url = "https://notion.so/page"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_empty_journal(self):
+        journal = BatchJournal(path=self.path)
+        self.assertEqual(journal.get_stages(JOURNAL_JOB_WRITE_POST, self.url), {})
+        self.assertEqual(journal.get_resumable_urls(JOURNAL_JOB_WRITE_POST, [self.url]), [])
+
+    def test_stages_survive_restart(self):
+        journal = BatchJournal(path=self.path)
+        journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP)
+        journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_TEXT_GENERATED, {"title": "T"})
+
+        reloaded = BatchJournal(path=self.path)
+        self.assertEqual(
+            reloaded.get_stages(JOURNAL_JOB_WRITE_POST, self.url),
+            {JOURNAL_STAGE_STATUS_SET_UP: None, JOURNAL_STAGE_TEXT_GENERATED: {"title": "T"}},
+        )
+        self.assertTrue(reloaded.has_stage(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_TEXT_GENERATED))
+
+    def test_jobs_are_tracked_separately(self):
+        journal = BatchJournal(path=self.path)
+        journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP)
+        self.assertEqual(journal.get_resumable_urls(JOURNAL_JOB_ADD_WP_IMGS, [self.url]), [])
+
+    def test_resumable_urls_keep_input_order(self):
+        journal = BatchJournal(path=self.path)
+        journal.record(JOURNAL_JOB_WRITE_POST, "b", JOURNAL_STAGE_STATUS_SET_UP)
+        journal.record(JOURNAL_JOB_WRITE_POST, "a", JOURNAL_STAGE_STATUS_SET_UP)
+        self.assertEqual(journal.get_resumable_urls(JOURNAL_JOB_WRITE_POST, ["a", "c", "b"]), ["a", "b"])
+
+    def test_complete_forgets_url(self):
+        journal = BatchJournal(path=self.path)
+        journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP)
+        journal.complete(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_PUBLISHED, {"link": "https://wp.com/p"})
+
+        self.assertEqual(journal.get_stages(JOURNAL_JOB_WRITE_POST, self.url), {})
+        self.assertEqual(BatchJournal(path=self.path).get_stages(JOURNAL_JOB_WRITE_POST, self.url), {})
+
+    def test_truncated_line_is_skipped(self):
+        journal = BatchJournal(path=self.path)
+        journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"job": "write_post", "url": ')
+
+        callback = Mock()
+        reloaded = BatchJournal(path=self.path, callback=callback)
+        self.assertTrue(reloaded.has_stage(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP))
+        callback.assert_called_once()
+
+    def test_old_unfinished_url_starts_from_scratch(self):
+        with patch('batch_journal.time.time', return_value=1000.0):
+            BatchJournal(path=self.path).record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_TEXT_GENERATED, {"title": "T"})
+
+        with patch('batch_journal.time.time', return_value=1000.0 + 59):
+            self.assertTrue(BatchJournal(path=self.path, max_age_seconds=60).has_stage(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_TEXT_GENERATED))
+        with patch('batch_journal.time.time', return_value=1000.0 + 61):
+            journal = BatchJournal(path=self.path, max_age_seconds=60)
+            self.assertEqual(journal.get_stages(JOURNAL_JOB_WRITE_POST, self.url), {})
+            self.assertEqual(journal.get_resumable_urls(JOURNAL_JOB_WRITE_POST, [self.url]), [])
+
+    def test_url_past_wordpress_never_expires(self):
+        with patch('batch_journal.time.time', return_value=1000.0):
+            journal = BatchJournal(path=self.path)
+            journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_TEXT_GENERATED, {"title": "T"})
+            journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_WP_POST_CREATED, {"id": 7, "link": "https://wp.com/p"})
+            journal.record(JOURNAL_JOB_ADD_WP_IMGS, self.url, JOURNAL_STAGE_IMAGES_ADDED, {"link": "https://wp.com/p"})
+
+        with patch('batch_journal.time.time', return_value=1000.0 + 10 * 24 * 60 * 60):
+            reloaded = BatchJournal(path=self.path, max_age_seconds=60)
+            self.assertEqual(reloaded.get_stages(JOURNAL_JOB_WRITE_POST, self.url)[JOURNAL_STAGE_WP_POST_CREATED]["id"], 7)
+            self.assertEqual(reloaded.get_resumable_urls(JOURNAL_JOB_ADD_WP_IMGS, [self.url]), [self.url])
+
+    def test_entry_expires_in_a_running_journal(self):
+        journal = BatchJournal(path=self.path, max_age_seconds=60)
+        with patch('batch_journal.time.time', return_value=1000.0):
+            journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP)
+        with patch('batch_journal.time.time', return_value=1000.0 + 61):
+            self.assertFalse(journal.has_stage(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP))
+
+    def test_stale_journal_is_compacted(self):
+        journal = BatchJournal(path=self.path)
+        for idx in range(120):
+            journal.record(JOURNAL_JOB_WRITE_POST, f"url-{idx}", JOURNAL_STAGE_STATUS_SET_UP)
+            journal.forget(JOURNAL_JOB_WRITE_POST, f"url-{idx}")
+        journal.record(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP)
+
+        reloaded = BatchJournal(path=self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertTrue(reloaded.has_stage(JOURNAL_JOB_WRITE_POST, self.url, JOURNAL_STAGE_STATUS_SET_UP))
+
+
+if __name__ == '__main__':
+    unittest.main()
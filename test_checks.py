@@ -71,6 +71,71 @@ class RunChecksTests(unittest.TestCase):
         self.assertIn('Post title is empty', issues)
         self.assertTrue(any('Post status is unexpected' in issue for issue in issues))
 
+    def test_run_checks_fills_prefetch_store(self):
+        url = "https://notion.so/roundup"
+        notion_post = object()
+        roundup_items = [{'Image Title': 'Recipe 1'}]
+        prefetch = checks.PrefetchStore()
+
+        with patch('checks.dedup_and_trim', side_effect=lambda urls, callback=None: urls), \
+             patch('checks.reset_report_progress'), \
+             patch('checks.report_progress'), \
+             patch('checks.get_post_title_website_from_url', return_value=(notion_post, 'Roundup Title', 'example.com')), \
+             patch('checks.test_wp_connection'), \
+             patch('checks.get_post_title', return_value='Roundup Title'), \
+             patch('checks.get_page_property', return_value='Recipes / Dinner'), \
+             patch('checks.get_post_topic_from_cats', return_value=checks.POST_TOPIC_RECIPES), \
+             patch('checks.get_post_type', return_value=checks.POST_POST_TYPE_ROUNDUP_ID), \
+             patch('checks.get_post_status', return_value=checks.MY_KOALA_POST_STATUSES_ALLOWED[0]), \
+             patch('checks.get_post_images_for_blog_url', return_value=roundup_items):
+
+            checks.run_checks([url], callback=lambda *_: None, prefetch=prefetch)
+
+        entry = prefetch.get(url)
+        self.assertIs(entry.post, notion_post)
+        self.assertEqual(entry.title, 'Roundup Title')
+        self.assertEqual(entry.website, 'example.com')
+        self.assertEqual(entry.categories, 'Recipes / Dinner')
+        self.assertEqual(entry.post_type, checks.POST_POST_TYPE_ROUNDUP_ID)
+        self.assertEqual(entry.roundup_items, roundup_items)
+
+    def test_run_checks_concurrent_keeps_order_and_tests_each_website_once(self):
+        urls = [f"https://notion.so/page-{idx}" for idx in range(6)]
+        tested = []
+
+        def fake_resolve(notion_url):
+            if notion_url.endswith('-3'):
+                raise Exception('boom')
+            return object(), f"Title {notion_url}", 'example.com'
+
+        def fake_test_wp_connection(website, tested_websites, issues, callback):
+            if website not in tested_websites:
+                tested.append(website)
+                tested_websites[website] = True
+
+        with patch('checks.dedup_and_trim', side_effect=lambda urls, callback=None: urls), \
+             patch('checks.reset_report_progress'), \
+             patch('checks.report_progress') as mock_report_progress, \
+             patch('checks.get_post_title_website_from_url', side_effect=fake_resolve), \
+             patch('checks.test_wp_connection', side_effect=fake_test_wp_connection), \
+             patch('checks.get_post_title', return_value=''), \
+             patch('checks.get_page_property', return_value='Recipes / Dinner'), \
+             patch('checks.get_post_topic_from_cats', return_value=checks.POST_TOPIC_RECIPES), \
+             patch('checks.get_post_type', return_value=checks.POST_POST_TYPE_SINGLE_ITEM_ID), \
+             patch('checks.get_post_status', return_value=checks.MY_KOALA_POST_STATUSES_ALLOWED[0]):
+
+            logs = []
+            results = checks.run_checks(urls, callback=logs.append, max_workers=4)
+
+        # Every post has an empty title, so every URL reports an issue
+        self.assertEqual([r['url'] for r in results], urls)
+        self.assertIn('Exception resolving URL: boom', results[3]['issues'][0])
+        self.assertEqual(tested, ['example.com'])
+        self.assertEqual(mock_report_progress.call_count, len(urls))
+        # Lines logged by the concurrent checks are tagged with their URL
+        for url in urls:
+            self.assertIn(f"\n[{url}] [INFO][run_checks] Starting checks for Notion URL: {url}", logs)
+
 
 class RunWpImgAddChecksTests(unittest.TestCase):
     def test_run_wp_img_add_checks_with_empty_url_list(self):
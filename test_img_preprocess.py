@@ -0,0 +1,147 @@
+"""
+Unit tests for img_preprocess.py
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+from PIL import Image, ImageCms
+
+from img_preprocess import preprocess_images, get_processed_path
+
+
+class TestPreprocessImages(unittest.TestCase):
+    """Test resizing, re-encoding and caching of images before upload"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.src_dir = os.path.join(self.tmp_dir.name, "src")
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        os.makedirs(self.src_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _make_jpeg(self, name, size=(3000, 1500)):
+        path = os.path.join(self.src_dir, name)
+        exif = Image.Exif()
+        exif[0x010F] = "CameraMaker"  # Make
+        Image.new("RGB", size, (200, 100, 50)).save(path, format="JPEG", exif=exif)
+        return path
+
+    def test_downscales_strips_metadata_and_keeps_name(self):
+        src = self._make_jpeg("001_cover.jpg")
+
+        paths = preprocess_images([src], max_edge=1000, img_format="webp", cache_dir=self.cache_dir, callback=Mock())
+
+        self.assertEqual(os.path.basename(paths[0]), "001_cover.webp")
+        with Image.open(paths[0]) as img:
+            self.assertEqual(img.format, "WEBP")
+            self.assertEqual(img.size, (1000, 500))
+            self.assertEqual(len(img.getexif()), 0)
+
+    def test_jpeg_output_flattens_transparency(self):
+        src = os.path.join(self.src_dir, "logo.png")
+        # Noise, so the PNG is bigger than the JPEG copy and the copy is used
+        Image.frombytes("RGBA", (200, 100), os.urandom(200 * 100 * 4)).save(src)
+
+        paths = preprocess_images([src], max_edge=1000, img_format="jpeg", cache_dir=self.cache_dir, callback=Mock())
+
+        with Image.open(paths[0]) as img:
+            self.assertEqual(img.format, "JPEG")
+            self.assertEqual(img.mode, "RGB")
+            self.assertEqual(img.size, (200, 100))
+
+    def test_cached_copy_is_reused(self):
+        src = self._make_jpeg("001.jpg")
+        first = preprocess_images([src], max_edge=800, cache_dir=self.cache_dir, callback=Mock())[0]
+        mtime = os.path.getmtime(first)
+
+        second = preprocess_images([src], max_edge=800, cache_dir=self.cache_dir, callback=Mock())[0]
+
+        self.assertEqual(first, second)
+        self.assertEqual(os.path.getmtime(second), mtime)
+
+    def test_settings_are_part_of_the_cache_key(self):
+        src = self._make_jpeg("001.jpg", size=(100, 100))
+        self.assertNotEqual(
+            get_processed_path(src, 800, "webp", 80, self.cache_dir),
+            get_processed_path(src, 800, "webp", 90, self.cache_dir),
+        )
+
+    def test_colour_profile_is_converted_to_srgb(self):
+        src = os.path.join(self.src_dir, "p3.jpg")
+        srgb = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+        Image.new("RGB", (3000, 1500), (200, 100, 50)).save(src, format="JPEG", icc_profile=srgb)
+
+        paths = preprocess_images([src], max_edge=1000, cache_dir=self.cache_dir, callback=Mock())
+
+        with Image.open(paths[0]) as img:
+            self.assertIsNone(img.info.get("icc_profile"))
+            for channel, expected in zip(img.convert("RGB").getpixel((500, 250)), (200, 100, 50)):
+                self.assertAlmostEqual(channel, expected, delta=3)
+
+    def test_unreadable_colour_profile_is_kept(self):
+        src = os.path.join(self.src_dir, "odd.jpg")
+        Image.new("RGB", (3000, 1500), (200, 100, 50)).save(src, format="JPEG", icc_profile=b"not a profile")
+
+        paths = preprocess_images([src], max_edge=1000, cache_dir=self.cache_dir, callback=Mock())
+
+        with Image.open(paths[0]) as img:
+            self.assertEqual(img.info.get("icc_profile"), b"not a profile")
+
+    def test_original_is_kept_when_the_copy_is_bigger(self):
+        src = os.path.join(self.src_dir, "small.jpg")
+        Image.frombytes("RGB", (300, 200), os.urandom(300 * 200 * 3)).save(src, format="JPEG", quality=10)
+        callback = Mock()
+
+        paths = preprocess_images([src], max_edge=1000, img_format="jpeg", quality=100, cache_dir=self.cache_dir, callback=callback)
+
+        self.assertEqual(paths, [src])
+        self.assertIn("Saved 0.0 MB", callback.call_args_list[-1][0][0])
+
+    def test_unsupported_files_are_passed_through(self):
+        src = os.path.join(self.src_dir, "anim.gif")
+        Image.new("P", (10, 10)).save(src)
+
+        self.assertEqual(preprocess_images([src], cache_dir=self.cache_dir, callback=Mock()), [src])
+
+    def test_worker_processes_keep_input_order(self):
+        srcs = [self._make_jpeg(f"{idx:03d}.jpg", size=(400, 300)) for idx in range(3)]
+
+        paths = preprocess_images(srcs, max_edge=200, cache_dir=self.cache_dir, max_workers=2, callback=Mock())
+
+        self.assertEqual([os.path.basename(p) for p in paths], ["000.webp", "001.webp", "002.webp"])
+        for path in paths:
+            self.assertTrue(os.path.exists(path))
+
+    def test_threads_processing_the_same_image_do_not_collide(self):
+        src = self._make_jpeg("001.jpg", size=(1200, 800))
+        errors = []
+
+        def run():
+            try:
+                preprocess_images([src], max_edge=600, cache_dir=self.cache_dir, max_workers=1, callback=Mock())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        target_dir = os.path.dirname(get_processed_path(src, 600, "webp", 82, self.cache_dir))
+        self.assertEqual(os.listdir(target_dir), ["001.webp"])
+
+    def test_unknown_format_raises(self):
+        with self.assertRaises(ValueError):
+            preprocess_images([], img_format="avif", cache_dir=self.cache_dir, callback=Mock())
+
+
+if __name__ == '__main__':
+    unittest.main()
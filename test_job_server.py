@@ -0,0 +1,213 @@
+"""
+Unit tests for job_server.py
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from job_server import (
+    JobQueue,
+    JobServer,
+    JobClient,
+    JOB_TYPE_WRITE_POST,
+    JOB_TYPE_CHECK,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_DONE,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_CANCELLED,
+    JOB_SERVER_TOKEN_HEADER,
+    load_job_token,
+)
+
+TOKEN = "test-token"
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test ordering, persistence and URL exclusivity of the queue"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "queue", "jobs.jsonl")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_jobs_run_in_submission_order(self):
+        queue = JobQueue(path=None)
+        first = queue.submit(JOB_TYPE_WRITE_POST, ["url-1"])
+        second = queue.submit(JOB_TYPE_CHECK, ["url-2"])
+        self.assertEqual(queue.next(timeout=0)["id"], first["id"])
+        self.assertEqual(queue.next(timeout=0)["id"], second["id"])
+        self.assertIsNone(queue.next(timeout=0))
+
+    def test_invalid_jobs_are_rejected(self):
+        queue = JobQueue(path=None)
+        with self.assertRaises(ValueError):
+            queue.submit("unknown", ["url-1"])
+        with self.assertRaises(ValueError):
+            queue.submit(JOB_TYPE_WRITE_POST, [" ", None])
+        with self.assertRaises(ValueError):
+            queue.submit(JOB_TYPE_WRITE_POST, "https://www.notion.so/page")
+
+    def test_job_sharing_a_running_url_waits(self):
+        queue = JobQueue(path=None)
+        running = queue.submit(JOB_TYPE_WRITE_POST, ["url-1", "url-2"])
+        blocked = queue.submit(JOB_TYPE_WRITE_POST, ["url-2"])
+        free = queue.submit(JOB_TYPE_CHECK, ["url-3"])
+
+        self.assertEqual(queue.next(timeout=0)["id"], running["id"])
+        self.assertEqual(queue.next(timeout=0)["id"], free["id"])
+        self.assertIsNone(queue.next(timeout=0))
+        queue.finish(running["id"], result={"results": []})
+        self.assertEqual(queue.next(timeout=0)["id"], blocked["id"])
+
+    def test_state_survives_restart_and_running_jobs_are_requeued(self):
+        queue = JobQueue(path=self.path, callback=lambda msg: None)
+        done = queue.submit(JOB_TYPE_CHECK, ["url-1"])
+        interrupted = queue.submit(JOB_TYPE_WRITE_POST, ["url-2"])
+        queue.next(timeout=0)
+        queue.finish(done["id"], result={"report": "ok"})
+        queue.next(timeout=0)
+
+        reloaded = JobQueue(path=self.path, callback=lambda msg: None)
+        self.assertEqual(reloaded.get(done["id"])["status"], JOB_STATUS_DONE)
+        self.assertEqual(reloaded.get(done["id"])["result"], {"report": "ok"})
+        self.assertEqual(reloaded.get(interrupted["id"])["status"], JOB_STATUS_QUEUED)
+        self.assertEqual(reloaded.next(timeout=0)["id"], interrupted["id"])
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 3)  # Compacted, plus the new running state
+
+    def test_old_finished_jobs_are_dropped_on_reload(self):
+        queue = JobQueue(path=self.path)
+        for idx in range(3):
+            job = queue.submit(JOB_TYPE_CHECK, [f"url-{idx}"])
+            queue.next(timeout=0)
+            queue.finish(job["id"], error="boom")
+        reloaded = JobQueue(path=self.path, keep_finished=1)
+        self.assertEqual([job["urls"] for job in reloaded.list()], [["url-2"]])
+
+    def test_cancel_only_queued_jobs(self):
+        queue = JobQueue(path=None)
+        started = queue.submit(JOB_TYPE_CHECK, ["url-1"])
+        waiting = queue.submit(JOB_TYPE_CHECK, ["url-2"])
+        queue.next(timeout=0)
+        self.assertFalse(queue.cancel(started["id"]))
+        self.assertTrue(queue.cancel(waiting["id"]))
+        self.assertEqual(queue.get(waiting["id"])["status"], JOB_STATUS_CANCELLED)
+        self.assertIsNone(queue.next(timeout=0))
+
+    def test_close_wakes_waiting_workers(self):
+        queue = JobQueue(path=None)
+        results = []
+        worker = threading.Thread(target=lambda: results.append(queue.next()))
+        worker.start()
+        queue.close()
+        worker.join(5)
+        self.assertEqual(results, [None])
+
+
+class TestJobServer(unittest.TestCase):
+    """Test the HTTP API and the workers with stand-in handlers"""
+
+    def setUp(self):
+        self.release = threading.Event()
+
+        def write_post(urls, test, callback):
+            callback(f"Writing {len(urls)} post(s)")
+            self.release.wait(5)
+            return {"results": [{f"Title {url}": f"https://wp/{url}"} for url in urls], "test": test}
+
+        def check(urls, test, callback):
+            raise RuntimeError("Notion is down")
+
+        self.server = JobServer(
+            JobQueue(path=None),
+            {JOB_TYPE_WRITE_POST: write_post, JOB_TYPE_CHECK: check},
+            workers=1,
+            port=0,
+            token=TOKEN,
+            callback=lambda msg: None,
+        ).start()
+        self.client = JobClient(self.server.base_url, token=TOKEN)
+
+    def tearDown(self):
+        self.release.set()
+        self.server.stop(timeout=5)
+
+    def test_submit_and_wait(self):
+        job = self.client.submit(JOB_TYPE_WRITE_POST, ["url-1"], test=True)
+        self.assertIn(self.client.get(job["id"])["status"], (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING))
+        self.release.set()
+
+        finished = self.client.wait(job["id"], poll_seconds=0.01, timeout=5)
+        self.assertEqual(finished["status"], JOB_STATUS_DONE)
+        self.assertEqual(finished["result"], {"results": [{"Title url-1": "https://wp/url-1"}], "test": True})
+        self.assertEqual(finished["log"], ["Writing 1 post(s)"])
+        self.assertEqual(self.client.health()["jobs"], {JOB_STATUS_DONE: 1})
+
+    def test_failed_job_and_cancel(self):
+        blocking = self.client.submit(JOB_TYPE_WRITE_POST, ["url-1"])
+        failing = self.client.submit(JOB_TYPE_CHECK, ["url-2"])
+        cancelled = self.client.submit(JOB_TYPE_CHECK, ["url-3"])
+        self.assertTrue(self.client.cancel(cancelled["id"]))
+        self.release.set()
+
+        self.client.wait(blocking["id"], poll_seconds=0.01, timeout=5)
+        failed = self.client.wait(failing["id"], poll_seconds=0.01, timeout=5)
+        self.assertEqual(failed["status"], JOB_STATUS_FAILED)
+        self.assertEqual(failed["error"], "RuntimeError: Notion is down")
+        self.assertEqual(self.client.get(cancelled["id"])["status"], JOB_STATUS_CANCELLED)
+        self.assertEqual(len(self.client.list()), 3)
+
+    def test_bad_requests(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self.client.submit("unknown", ["url-1"])
+        self.assertEqual(ctx.exception.code, 400)
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self.client.get("missing")
+        self.assertEqual(ctx.exception.code, 404)
+
+    def _raw_post(self, headers):
+        data = b'{"type": "write_post", "urls": ["url-1"], "test": false}'
+        request = urllib.request.Request(f"{self.server.base_url}/jobs", data=data, method="POST", headers=headers)
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(request, timeout=5)
+        return ctx.exception.code
+
+    def test_requests_from_outside_the_install_are_rejected(self):
+        json_headers = {"Content-Type": "application/json"}
+        self.assertEqual(self._raw_post(json_headers), 401)
+        self.assertEqual(self._raw_post(dict(json_headers, **{JOB_SERVER_TOKEN_HEADER: "wrong"})), 401)
+        # A simple cross-site form/fetch POST, even with the token
+        self.assertEqual(self._raw_post({"Content-Type": "text/plain", JOB_SERVER_TOKEN_HEADER: TOKEN}), 415)
+        # DNS rebinding: the browser sends the attacker's host name
+        self.assertEqual(self._raw_post(dict(json_headers, Host="evil.example", **{JOB_SERVER_TOKEN_HEADER: TOKEN})), 403)
+        self.assertEqual(self.client.list(), [])
+
+    def test_unexpected_errors_return_500(self):
+        self.server.queue.counts = lambda: 1 / 0
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self.client.health()
+        self.assertEqual(ctx.exception.code, 500)
+
+
+class TestJobToken(unittest.TestCase):
+    """Test the per-install token file"""
+
+    def test_token_is_created_once(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "app", "token")
+            self.assertIsNone(load_job_token(path))
+            token = load_job_token(path, create=True)
+            self.assertTrue(token)
+            self.assertEqual(load_job_token(path), token)
+            self.assertEqual(load_job_token(path, create=True), token)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,10 +2,12 @@
 Unit tests for koala_main.py functions
 """
 
+import asyncio
 import unittest
 import sys
 import os
-from unittest.mock import Mock, MagicMock, patch, call
+import tempfile
+from unittest.mock import AsyncMock, Mock, MagicMock, patch, call
 
 # Add parent directory to path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -14,7 +16,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'N
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'NotionUtils')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'WordPress')))
 
-from koala_main import write_post, add_wp_imgs, _update_page_ai_img_prompt, print_results_pretty
+from koala_main import write_post, write_post_batch, add_wp_imgs, _update_page_ai_img_prompt, print_results_pretty
 from notion_config import (
     POST_POST_STATUS_SETTING_UP_ID,
     POST_POST_STATUS_DRAFT_GENERATED_ID,
@@ -22,6 +24,33 @@ from notion_config import (
     POST_AI_IMAGE_PROMPT_PROP,
 )
 from post_part_constants import POST_PART_TITLE, POST_PART_INGREDIENTS
+from prefetch_store import PrefetchStore
+from notion_write_buffer import NotionWriteBuffer
+from batch_journal import (
+    BatchJournal,
+    JOURNAL_JOB_WRITE_POST,
+    JOURNAL_STAGE_STATUS_SET_UP,
+    JOURNAL_STAGE_TEXT_GENERATED,
+)
+
+
+def make_services(update_status=None, update_to_published=None):
+    """AsyncServices stand-in whose Notion status updates are delegated to the given (sync) Mocks."""
+    update_status = update_status if update_status is not None else Mock(side_effect=lambda post, status_id, test=False: post)
+    update_to_published = update_to_published if update_to_published is not None else Mock(side_effect=lambda post, test=False: post)
+    services = Mock()
+    services.update_post_status = AsyncMock(side_effect=lambda post, status_id, test=False, callback=print: update_status(post, status_id, test=test))
+    services.update_post_status_to_published = AsyncMock(side_effect=lambda post, test=False, callback=print: update_to_published(post, test=test))
+    services.update_post_ai_img_prompt = AsyncMock(side_effect=lambda post, prompt, callback=print: post)
+    services.aclose = AsyncMock()
+    return services
+
+
+def make_post_writer():
+    """PostWriter stand-in; async_write_post returns what write_post is set up to return."""
+    post_writer = Mock()
+    post_writer.async_write_post = AsyncMock(side_effect=lambda send_prompt: post_writer.write_post())
+    return post_writer
 
 
 class TestWritePost(unittest.TestCase):
@@ -46,8 +75,6 @@ class TestWritePost(unittest.TestCase):
     @patch('koala_main.get_post_type')
     @patch('koala_main.get_page_property')
     @patch('koala_main.get_post_topic_from_cats')
-    @patch('koala_main.update_post_status')
-    @patch('koala_main.update_post_status_to_published')
     @patch('koala_main._update_page_ai_img_prompt')
     @patch('koala_main.create_wp_post')
     @patch('koala_main.report_progress')
@@ -56,8 +83,6 @@ class TestWritePost(unittest.TestCase):
         mock_report_progress,
         mock_create_wp_post,
         mock_update_ai_prompt,
-        mock_update_to_published,
-        mock_update_status,
         mock_get_topic,
         mock_get_property,
         mock_get_type,
@@ -69,12 +94,13 @@ class TestWritePost(unittest.TestCase):
         mock_dedup
     ):
         """Test successful post writing workflow"""
+        mock_update_status, mock_update_to_published = Mock(), Mock()
         # Setup mocks
         mock_dedup.return_value = ["https://notion.so/test-page-1"]
         mock_run_checks.return_value = []  # No problems
         mock_format_check.return_value = "✅ All the checks passed!"
         
-        mock_post_writer = Mock()
+        mock_post_writer = make_post_writer()
         mock_post_writer.write_post.return_value = self.mock_post_parts
         mock_post_writer_class.return_value = mock_post_writer
         
@@ -87,7 +113,7 @@ class TestWritePost(unittest.TestCase):
         mock_create_wp_post.return_value = {'link': 'https://wordpress.com/test-post'}
         
         # Execute
-        results = write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback)
+        results = write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback, services=make_services(mock_update_status, mock_update_to_published))
         
         # Verify
         self.assertEqual(len(results), 1)
@@ -101,6 +127,65 @@ class TestWritePost(unittest.TestCase):
         mock_create_wp_post.assert_called_once()
         mock_update_ai_prompt.assert_called_once()
     
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.run_checks')
+    @patch('koala_main.format_check_res')
+    @patch('koala_main.PostWriter')
+    @patch('koala_main.get_post_title_website_from_url')
+    @patch('koala_main.get_post_type')
+    @patch('koala_main.get_page_property')
+    @patch('koala_main.get_post_topic_from_cats')
+    @patch('koala_main._update_page_ai_img_prompt')
+    @patch('koala_main.create_wp_post')
+    @patch('koala_main.report_progress')
+    def test_write_post_defers_publish_to_end_of_run(
+        self,
+        mock_report_progress,
+        mock_create_wp_post,
+        mock_update_ai_prompt,
+        mock_get_topic,
+        mock_get_property,
+        mock_get_type,
+        mock_get_post_title,
+        mock_post_writer_class,
+        mock_format_check,
+        mock_run_checks,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that deferred "Published" updates are sent once every post is written"""
+        mock_update_status, mock_update_to_published = Mock(), Mock()
+        mock_dedup.return_value = self.test_urls
+        mock_post_writer = make_post_writer()
+        mock_post_writer.write_post.return_value = self.mock_post_parts
+        mock_post_writer_class.return_value = mock_post_writer
+        mock_get_post_title.side_effect = lambda url: ({'id': url}, 'Test Title', 'test_site')
+        mock_get_type.return_value = 'recipe'
+        mock_get_property.return_value = 'value'
+        mock_get_topic.return_value = 'recipes'
+        mock_update_status.side_effect = lambda post, status, test=False: post
+        published_before_second_post = []
+        mock_create_wp_post.side_effect = lambda **kwargs: (
+            published_before_second_post.append(mock_update_to_published.call_count),
+            {'link': f"https://wordpress.com/{kwargs['notion_post']['id']}"},
+        )[1]
+        mock_update_to_published.side_effect = [None, {'id': self.test_urls[1]}]
+
+        failures = []
+        write_buffer = NotionWriteBuffer(defer_publish=True, callback=self.callback)
+        results = write_post(self.test_urls, do_run_checks=False, callback=self.callback, failures=failures, write_buffer=write_buffer, services=make_services(mock_update_status, mock_update_to_published))
+
+        # The post whose "Published" update failed is not reported as written
+        self.assertEqual(len(results), 1)
+        self.assertEqual(list(results[0].values()), [f"https://wordpress.com/{url}" for url in self.test_urls if url != failures[0]["url"]])
+        self.assertEqual(published_before_second_post, [0, 0])
+        self.assertEqual(mock_update_to_published.call_count, 2)
+        self.assertEqual(mock_update_ai_prompt.call_count, 2)
+        self.assertEqual(len(failures), 1)
+        self.assertIn("Post status #3 was not updated", failures[0]["error"])
+        self.assertEqual(write_buffer.pending_deferred(), 0)
+    
     @patch('koala_main.dedup_and_trim')
     @patch('koala_main.reset_report_progress')
     @patch('koala_main.run_checks')
@@ -143,14 +228,14 @@ class TestWritePost(unittest.TestCase):
         mock_run_checks.return_value = []
         mock_format_check.return_value = "No problems"
         
-        mock_post_writer = Mock()
+        mock_post_writer = make_post_writer()
         mock_post_writer_class.return_value = mock_post_writer
         
         # Return None for post
         mock_get_post_title.return_value = (None, None, None)
         
         with self.assertRaises(ValueError) as context:
-            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback)
+            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback, services=make_services())
         
         self.assertIn('Could not resolve Notion URL', str(context.exception))
     
@@ -174,14 +259,14 @@ class TestWritePost(unittest.TestCase):
         mock_run_checks.return_value = []
         mock_format_check.return_value = "✅ All the checks passed!"
         
-        mock_post_writer = Mock()
+        mock_post_writer = make_post_writer()
         mock_post_writer_class.return_value = mock_post_writer
         
         # Return post but no website
         mock_get_post_title.return_value = (self.mock_post, 'Test Title', None)
         
         with self.assertRaises(ValueError) as context:
-            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback)
+            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback, services=make_services())
         
         self.assertIn('Could not determine website', str(context.exception))
     
@@ -194,10 +279,8 @@ class TestWritePost(unittest.TestCase):
     @patch('koala_main.get_post_type')
     @patch('koala_main.get_page_property')
     @patch('koala_main.get_post_topic_from_cats')
-    @patch('koala_main.update_post_status')
     def test_write_post_status_update_fails(
         self,
-        mock_update_status,
         mock_get_topic,
         mock_get_property,
         mock_get_type,
@@ -209,11 +292,12 @@ class TestWritePost(unittest.TestCase):
         mock_dedup
     ):
         """Test error handling when status update fails"""
+        mock_update_status = Mock()
         mock_dedup.return_value = ["https://notion.so/test-page-1"]
         mock_run_checks.return_value = []
         mock_format_check.return_value = "✅ All the checks passed!"
         
-        mock_post_writer = Mock()
+        mock_post_writer = make_post_writer()
         mock_post_writer_class.return_value = mock_post_writer
         
         mock_get_post_title.return_value = (self.mock_post, 'Test Title', 'test_site')
@@ -225,7 +309,7 @@ class TestWritePost(unittest.TestCase):
         mock_update_status.return_value = None
         
         with self.assertRaises(ValueError) as context:
-            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback)
+            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback, services=make_services(mock_update_status))
         
         self.assertIn('Post status #1 was not updated', str(context.exception))
     
@@ -238,14 +322,12 @@ class TestWritePost(unittest.TestCase):
     @patch('koala_main.get_post_type')
     @patch('koala_main.get_page_property')
     @patch('koala_main.get_post_topic_from_cats')
-    @patch('koala_main.update_post_status')
     @patch('koala_main._update_page_ai_img_prompt')
     @patch('koala_main.create_wp_post')
     def test_write_post_wp_creation_fails(
         self,
         mock_create_wp_post,
         mock_update_ai_prompt,
-        mock_update_status,
         mock_get_topic,
         mock_get_property,
         mock_get_type,
@@ -257,11 +339,12 @@ class TestWritePost(unittest.TestCase):
         mock_dedup
     ):
         """Test error handling when WordPress post creation fails"""
+        mock_update_status = Mock()
         mock_dedup.return_value = ["https://notion.so/test-page-1"]
         mock_run_checks.return_value = []
         mock_format_check.return_value = "✅ All the checks passed!"
         
-        mock_post_writer = Mock()
+        mock_post_writer = make_post_writer()
         mock_post_writer.write_post.return_value = self.mock_post_parts
         mock_post_writer_class.return_value = mock_post_writer
         
@@ -275,7 +358,7 @@ class TestWritePost(unittest.TestCase):
         mock_create_wp_post.return_value = {}
         
         with self.assertRaises(ValueError) as context:
-            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback)
+            write_post(self.test_urls, do_run_checks=True, test=False, callback=self.callback, services=make_services(mock_update_status))
         
         self.assertIn('WordPress post was not created', str(context.exception))
     
@@ -298,6 +381,28 @@ class TestWritePost(unittest.TestCase):
         write_post([], do_run_checks=False, test=True, callback=self.callback)
         
         self.callback.assert_any_call('\n[INFO][write_post] Running in TEST mode!\n')
+
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.AsyncServices')
+    @patch('koala_main._write_single_post')
+    def test_write_post_closes_the_services_it_created(
+        self,
+        mock_write_single_post,
+        mock_services_class,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that the AsyncServices created for a run is closed at its end, even after a failure"""
+        mock_dedup.return_value = ["url1"]
+        mock_services_class.return_value = make_services()
+        mock_write_single_post.side_effect = ValueError("[ERROR][write_post] WordPress post was not created!")
+        
+        with self.assertRaises(ValueError):
+            write_post(["url1"], do_run_checks=False, callback=self.callback)
+        
+        self.assertIs(mock_write_single_post.call_args.args[1], mock_services_class.return_value)
+        mock_services_class.return_value.aclose.assert_awaited_once()
     
     @patch('koala_main.dedup_and_trim')
     @patch('koala_main.reset_report_progress')
@@ -308,8 +413,6 @@ class TestWritePost(unittest.TestCase):
     @patch('koala_main.get_post_type')
     @patch('koala_main.get_page_property')
     @patch('koala_main.get_post_topic_from_cats')
-    @patch('koala_main.update_post_status')
-    @patch('koala_main.update_post_status_to_published')
     @patch('koala_main._update_page_ai_img_prompt')
     @patch('koala_main.create_wp_post')
     @patch('koala_main.report_progress')
@@ -318,8 +421,6 @@ class TestWritePost(unittest.TestCase):
         mock_report_progress,
         mock_create_wp_post,
         mock_update_ai_prompt,
-        mock_update_to_published,
-        mock_update_status,
         mock_get_topic,
         mock_get_property,
         mock_get_type,
@@ -331,11 +432,12 @@ class TestWritePost(unittest.TestCase):
         mock_dedup
     ):
         """Test processing multiple URLs"""
+        mock_update_status, mock_update_to_published = Mock(), Mock()
         mock_dedup.return_value = ["https://notion.so/page-1", "https://notion.so/page-2"]
         mock_run_checks.return_value = []
         mock_format_check.return_value = "✅ All the checks passed!"
         
-        mock_post_writer = Mock()
+        mock_post_writer = make_post_writer()
         mock_post_writer.write_post.return_value = self.mock_post_parts
         mock_post_writer_class.return_value = mock_post_writer
         
@@ -353,12 +455,214 @@ class TestWritePost(unittest.TestCase):
             {'link': 'https://wp.com/post2'}
         ]
         
-        results = write_post(["url1", "url2"], do_run_checks=True, test=False, callback=self.callback)
+        results = write_post(["url1", "url2"], do_run_checks=True, test=False, callback=self.callback, services=make_services(mock_update_status, mock_update_to_published))
         
         self.assertEqual(len(results), 2)
         self.assertEqual(mock_post_writer.write_post.call_count, 2)
         self.assertEqual(mock_create_wp_post.call_count, 2)
 
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.PostWriter')
+    @patch('koala_main.get_post_title_website_from_url')
+    @patch('koala_main.get_post_type')
+    @patch('koala_main.get_page_property')
+    @patch('koala_main.get_post_topic_from_cats')
+    @patch('koala_main._update_page_ai_img_prompt')
+    @patch('koala_main.create_wp_post')
+    @patch('koala_main.report_progress')
+    def test_write_post_uses_prefetched_notion_data(
+        self,
+        mock_report_progress,
+        mock_create_wp_post,
+        mock_update_ai_prompt,
+        mock_get_topic,
+        mock_get_property,
+        mock_get_type,
+        mock_get_post_title,
+        mock_post_writer_class,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that Notion data recorded by the checks is not fetched again"""
+        mock_update_status, mock_update_to_published = Mock(), Mock()
+        url = "https://notion.so/test-page-1"
+        mock_dedup.return_value = [url]
+        
+        prefetch = PrefetchStore()
+        prefetch.put(url, self.mock_post, 'Test Title', 'test_site')
+        prefetch.update(url, categories='Recipes / Dinner', post_type='roundup', post_slug='test-slug', roundup_items=[{'Image Title': 'Item'}])
+        
+        mock_post_writer = make_post_writer()
+        mock_post_writer.write_post.return_value = self.mock_post_parts
+        mock_post_writer_class.return_value = mock_post_writer
+        mock_get_topic.return_value = 'recipes'
+        mock_update_status.return_value = self.mock_post
+        mock_update_to_published.return_value = self.mock_post
+        mock_create_wp_post.return_value = {'link': 'https://wordpress.com/test-post'}
+        
+        results = write_post([url], do_run_checks=False, test=False, callback=self.callback, prefetch=prefetch, services=make_services(mock_update_status, mock_update_to_published))
+        
+        self.assertEqual(results, [{'Test Recipe Title': 'https://wordpress.com/test-post'}])
+        mock_get_post_title.assert_not_called()
+        mock_get_type.assert_not_called()
+        mock_get_property.assert_not_called()
+        self.assertEqual(mock_post_writer.roundup_items, [{'Image Title': 'Item'}])
+        self.assertEqual(mock_create_wp_post.call_args.kwargs['post_type'], 'roundup')
+        self.assertEqual(mock_create_wp_post.call_args.kwargs['post_slug'], 'test-slug')
+    
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.run_checks')
+    @patch('koala_main.format_check_res')
+    @patch('koala_main.PostWriter')
+    @patch('koala_main.get_post_title_website_from_url')
+    @patch('koala_main.get_post_type')
+    @patch('koala_main.get_page_property')
+    @patch('koala_main.get_post_topic_from_cats')
+    @patch('koala_main._update_page_ai_img_prompt')
+    @patch('koala_main.create_wp_post')
+    @patch('koala_main.report_progress')
+    def test_write_post_resumes_from_journal(
+        self,
+        mock_report_progress,
+        mock_create_wp_post,
+        mock_update_ai_prompt,
+        mock_get_topic,
+        mock_get_property,
+        mock_get_type,
+        mock_get_post_title,
+        mock_post_writer_class,
+        mock_format_check,
+        mock_run_checks,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that stages committed by an interrupted run are not repeated"""
+        mock_update_status, mock_update_to_published = Mock(), Mock()
+        url = "https://notion.so/test-page-1"
+        mock_dedup.return_value = [url]
+        mock_run_checks.return_value = []
+        mock_format_check.return_value = "✅ All the checks passed!"
+        
+        mock_post_writer = make_post_writer()
+        mock_post_writer_class.return_value = mock_post_writer
+        mock_get_post_title.return_value = (self.mock_post, 'Test Title', 'test_site')
+        mock_get_type.return_value = 'recipe'
+        mock_get_property.side_effect = ['Category / Subcategory', 'test-slug']
+        mock_get_topic.return_value = 'recipes'
+        mock_update_status.return_value = self.mock_post
+        mock_update_to_published.return_value = self.mock_post
+        mock_create_wp_post.return_value = {'id': 7, 'link': 'https://wordpress.com/test-post', 'slug': 'test-slug'}
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            journal_path = os.path.join(tmp_dir, "journal.jsonl")
+            journal = BatchJournal(path=journal_path, callback=self.callback)
+            journal.record(JOURNAL_JOB_WRITE_POST, url, JOURNAL_STAGE_STATUS_SET_UP)
+            journal.record(JOURNAL_JOB_WRITE_POST, url, JOURNAL_STAGE_TEXT_GENERATED, self.mock_post_parts)
+            
+            results = write_post([url], test=False, callback=self.callback, journal=BatchJournal(path=journal_path, callback=self.callback), services=make_services(mock_update_status, mock_update_to_published))
+            
+            self.assertEqual(results, [{'Test Recipe Title': 'https://wordpress.com/test-post'}])
+            mock_run_checks.assert_called_once()
+            self.assertEqual(mock_run_checks.call_args.args[0], [])  # The resumed URL skips the checks
+            mock_post_writer.write_post.assert_not_called()
+            mock_update_status.assert_called_once_with(self.mock_post, POST_POST_STATUS_DRAFT_GENERATED_ID, test=False)
+            self.assertEqual(mock_create_wp_post.call_args.kwargs['post_parts'], self.mock_post_parts)
+            self.assertEqual(BatchJournal(path=journal_path).get_resumable_urls(JOURNAL_JOB_WRITE_POST, [url]), [])
+    
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.report_progress')
+    @patch('koala_main._write_single_post')
+    def test_write_post_concurrent_keeps_input_order(
+        self,
+        mock_write_single_post,
+        mock_report_progress,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that concurrent mode returns results in input order and reports progress per URL"""
+        urls = ["url1", "url2", "url3"]
+        mock_dedup.return_value = urls
+        mock_write_single_post.side_effect = lambda notion_url, services, test=False, callback=print, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, write_buffer=None: {f"Title {notion_url}": f"https://wp.com/{notion_url}"}
+        
+        results = write_post(urls, do_run_checks=False, test=False, callback=self.callback, max_workers=3, services=make_services())
+        
+        self.assertEqual(results, [
+            {'Title url1': 'https://wp.com/url1'},
+            {'Title url2': 'https://wp.com/url2'},
+            {'Title url3': 'https://wp.com/url3'},
+        ])
+        self.assertEqual(mock_write_single_post.call_count, 3)
+        self.assertEqual(mock_report_progress.call_count, 3)
+    
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.report_progress')
+    @patch('koala_main._write_single_post')
+    def test_write_post_concurrent_collects_failures(
+        self,
+        mock_write_single_post,
+        mock_report_progress,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that a failing URL does not abort the other URLs in concurrent mode"""
+        urls = ["url1", "url2", "url3"]
+        mock_dedup.return_value = urls
+        
+        def fake_write_single_post(notion_url, services, test=False, callback=print, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, write_buffer=None):
+            if notion_url == "url2":
+                raise ValueError("[ERROR][write_post] Post status #1 was not updated!")
+            return {f"Title {notion_url}": f"https://wp.com/{notion_url}"}
+        mock_write_single_post.side_effect = fake_write_single_post
+        
+        failures = []
+        results = write_post(urls, do_run_checks=False, test=False, callback=self.callback, max_workers=2, failures=failures, services=make_services())
+        
+        self.assertEqual(results, [
+            {'Title url1': 'https://wp.com/url1'},
+            {'Title url3': 'https://wp.com/url3'},
+        ])
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]['url'], 'url2')
+        self.assertIn('Post status #1 was not updated', failures[0]['error'])
+        self.assertEqual(mock_report_progress.call_count, 3)
+
+    
+    @patch('koala_main.dedup_and_trim')
+    @patch('koala_main.reset_report_progress')
+    @patch('koala_main.report_progress')
+    @patch('koala_main._write_single_post')
+    def test_write_post_bounds_urls_in_flight(
+        self,
+        mock_write_single_post,
+        mock_report_progress,
+        mock_reset_progress,
+        mock_dedup
+    ):
+        """Test that no more than max_workers URLs are processed at the same time"""
+        urls = [f"url{idx}" for idx in range(8)]
+        mock_dedup.return_value = urls
+        in_flight = 0
+        max_in_flight = 0
+        
+        async def fake_write_single_post(notion_url, services, test=False, callback=print, ai_cache=None, prefetch=None, journal=None, wp_pool=None, timer=None, usage=None, write_buffer=None):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            return {f"Title {notion_url}": f"https://wp.com/{notion_url}"}
+        mock_write_single_post.side_effect = fake_write_single_post
+        
+        results = write_post(urls, do_run_checks=False, callback=self.callback, max_workers=3, services=make_services())
+        
+        self.assertEqual(results, [{f"Title {url}": f"https://wp.com/{url}"} for url in urls])
+        self.assertEqual(max_in_flight, 3)
+        self.assertGreater(max_in_flight, 1)
+
 
 class TestUpdatePageAiImgPrompt(unittest.TestCase):
     """Test _update_page_ai_img_prompt function"""
@@ -366,111 +670,116 @@ class TestUpdatePageAiImgPrompt(unittest.TestCase):
     def setUp(self):
         self.callback = Mock()
         self.mock_post = {'id': 'test-post-id'}
+        self.services = make_services()
+        self.mock_update = self.services.update_post_ai_img_prompt
     
-    @patch('koala_main.update_post_ai_img_prompt')
-    def test_update_prompt_success(self, mock_update):
+    def test_update_prompt_success(self):
         """Test successful prompt update"""
-        mock_update.return_value = self.mock_post
         
-        result = _update_page_ai_img_prompt(
+        result = asyncio.run(_update_page_ai_img_prompt(
+            self.services,
             self.mock_post,
             "flour, sugar, eggs",
             test=False,
             callback=self.callback
-        )
+        ))
         
         self.assertEqual(result, self.mock_post)
-        mock_update.assert_called_once_with(self.mock_post, "flour, sugar, eggs")
+        self.mock_update.assert_awaited_once_with(self.mock_post, "flour, sugar, eggs", callback=self.callback)
         self.callback.assert_any_call(f"[INFO][_update_page_ai_img_prompt] '{POST_AI_IMAGE_PROMPT_PROP}' updated successfully.")
     
-    @patch('koala_main.update_post_ai_img_prompt')
-    def test_update_prompt_test_mode(self, mock_update):
+    def test_update_prompt_test_mode(self):
         """Test prompt update in test mode"""
-        result = _update_page_ai_img_prompt(
+        result = asyncio.run(_update_page_ai_img_prompt(
+            self.services,
             self.mock_post,
             "flour, sugar, eggs",
             test=True,
             callback=self.callback
-        )
+        ))
         
-        mock_update.assert_not_called()
+        self.mock_update.assert_not_awaited()
         self.callback.assert_any_call('[TEST][_update_page_ai_img_prompt] No update is made. Would set to: flour, sugar, eggs')
     
     def test_update_prompt_empty_string(self):
         """Test that empty prompt skips update"""
-        result = _update_page_ai_img_prompt(
+        result = asyncio.run(_update_page_ai_img_prompt(
+            self.services,
             self.mock_post,
             "",
             test=False,
             callback=self.callback
-        )
+        ))
         
         self.assertIsNone(result)
         self.callback.assert_any_call('[WARNING][_update_page_ai_img_prompt] New prompt is empty, skipping update.')
     
     def test_update_prompt_whitespace_only(self):
         """Test that whitespace-only prompt skips update"""
-        result = _update_page_ai_img_prompt(
+        result = asyncio.run(_update_page_ai_img_prompt(
+            self.services,
             self.mock_post,
             "   \n\t  ",
             test=False,
             callback=self.callback
-        )
+        ))
         
         self.assertIsNone(result)
         self.callback.assert_any_call('[WARNING][_update_page_ai_img_prompt] New prompt is empty, skipping update.')
     
-    @patch('koala_main.update_post_ai_img_prompt')
-    def test_update_prompt_list_input(self, mock_update):
+    def test_update_prompt_list_input(self):
         """Test that list input is joined into string"""
-        mock_update.return_value = self.mock_post
         
-        result = _update_page_ai_img_prompt(
+        result = asyncio.run(_update_page_ai_img_prompt(
+            self.services,
             self.mock_post,
             ["flour", "sugar", "eggs"],
             test=False,
             callback=self.callback
-        )
+        ))
         
         # Should join list with spaces
-        mock_update.assert_called_once_with(self.mock_post, "flour sugar eggs")
+        self.mock_update.assert_awaited_once_with(self.mock_post, "flour sugar eggs", callback=self.callback)
     
     def test_update_prompt_invalid_type(self):
         """Test error when prompt is not string or list"""
         with self.assertRaises(ValueError) as context:
-            _update_page_ai_img_prompt(
+            asyncio.run(_update_page_ai_img_prompt(
+                self.services,
                 self.mock_post,
                 123,  # Invalid type (int)
                 test=False,
                 callback=self.callback
-            )
+            ))
         
         self.assertIn('must be a string or list', str(context.exception))
     
     def test_update_prompt_invalid_type_dict(self):
         """Test error when prompt is a dict"""
         with self.assertRaises(ValueError) as context:
-            _update_page_ai_img_prompt(
+            asyncio.run(_update_page_ai_img_prompt(
+                self.services,
                 self.mock_post,
                 {"key": "value"},  # Invalid type (dict)
                 test=False,
                 callback=self.callback
-            )
+            ))
         
         self.assertIn('must be a string or list', str(context.exception))
     
-    @patch('koala_main.update_post_ai_img_prompt')
-    def test_update_prompt_update_fails(self, mock_update):
+    def test_update_prompt_update_fails(self):
         """Test error handling when update fails"""
-        mock_update.return_value = None
+        self.mock_update.side_effect = None
+        self.mock_update.return_value = None
         
         with self.assertRaises(ValueError) as context:
-            _update_page_ai_img_prompt(
+            asyncio.run(_update_page_ai_img_prompt(
+                self.services,
                 self.mock_post,
                 "flour, sugar, eggs",
                 test=False,
                 callback=self.callback
-            )
+            ))
         
         self.assertIn('Failed to update', str(context.exception))
 
@@ -486,12 +795,16 @@ class TestAddWpImgs(unittest.TestCase):
     @patch('koala_main.dedup_and_trim')
     @patch('koala_main.reset_report_progress')
     @patch('koala_main.get_post_title_website_from_url')
+    @patch('koala_main.get_page_property')
     @patch('koala_main.add_images_to_wp_post')
+    @patch('koala_main.async_set_post_status_imgs_added')
     @patch('koala_main.report_progress')
     def test_add_wp_imgs_success(
         self,
         mock_report_progress,
+        mock_set_imgs_added,
         mock_add_images,
+        mock_get_property,
         mock_get_post_title,
         mock_reset_progress,
         mock_dedup
@@ -500,12 +813,18 @@ class TestAddWpImgs(unittest.TestCase):
         mock_dedup.return_value = ["https://notion.so/test-page"]
         mock_get_post_title.return_value = (self.mock_post, 'Test Post', 'test_site')
         mock_add_images.return_value = 'https://wordpress.com/test-post'
+        mock_get_property.return_value = 'test-slug'
+        services = make_services()
         
-        results = add_wp_imgs(self.test_urls, do_run_checks=False, test=True, callback=self.callback)
+        results = add_wp_imgs(self.test_urls, do_run_checks=False, test=True, callback=self.callback, services=services)
         
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]['Test Post'], 'https://wordpress.com/test-post')
         mock_add_images.assert_called_once()
+        # The "images added" status goes through the event loop, not from the worker thread
+        self.assertFalse(mock_add_images.call_args.kwargs['update_notion_status'])
+        mock_set_imgs_added.assert_awaited_once_with(services, self.mock_post, 'test-slug', callback=self.callback, test=True)
+        services.aclose.assert_not_awaited()
     
     @patch('koala_main.dedup_and_trim')
     @patch('koala_main.reset_report_progress')
@@ -521,7 +840,7 @@ class TestAddWpImgs(unittest.TestCase):
         mock_get_post_title.return_value = (None, None, None)
         
         with self.assertRaises(ValueError) as context:
-            add_wp_imgs(self.test_urls, do_run_checks=False, test=False, callback=self.callback)
+            add_wp_imgs(self.test_urls, do_run_checks=False, test=False, callback=self.callback, services=make_services())
         
         self.assertIn('Could not resolve Notion URL', str(context.exception))
     
@@ -539,11 +858,94 @@ class TestAddWpImgs(unittest.TestCase):
         mock_get_post_title.return_value = (self.mock_post, 'Test Post', None)
         
         with self.assertRaises(ValueError) as context:
-            add_wp_imgs(self.test_urls, do_run_checks=False, test=False, callback=self.callback)
+            add_wp_imgs(self.test_urls, do_run_checks=False, test=False, callback=self.callback, services=make_services())
         
         self.assertIn('Could not determine website', str(context.exception))
 
 
+class TestWritePostBatch(unittest.TestCase):
+    """Test write_post_batch function"""
+    
+    def setUp(self):
+        self.callback = Mock()
+        self.ai_cache = Mock()
+        self.body_prompt = {"config": Mock(name="body"), "name": "post_body", "url": "url1", "topic": "recipes"}
+        self.title_prompt = {"config": Mock(name="title"), "name": "title", "url": "url1", "topic": "recipes"}
+    
+    @patch('koala_main.dedup_and_trim', side_effect=lambda urls: urls)
+    @patch('koala_main.write_post')
+    @patch('koala_main._collect_post_prompts')
+    @patch('koala_main.run_checks')
+    def test_batches_dependent_prompts_in_rounds(self, mock_run_checks, mock_collect, mock_write_post, mock_dedup):
+        """Test that the title prompt is batched in a second round once the body is answered"""
+        mock_run_checks.return_value = []
+        mock_collect.side_effect = [{"body-key": self.body_prompt}, {"title-key": self.title_prompt}, {}]
+        batch_runner = Mock()
+        batch_runner.run.side_effect = [
+            {"body-key": {"message": "{}", "error": ""}},
+            {"title-key": {"message": "Title", "error": ""}},
+        ]
+        mock_write_post.return_value = [{"Title": "https://wp.com/post"}]
+        
+        results = write_post_batch(["url1"], callback=self.callback, ai_cache=self.ai_cache, batch_runner=batch_runner)
+        
+        self.assertEqual(results, [{"Title": "https://wp.com/post"}])
+        self.assertEqual(batch_runner.run.call_count, 2)
+        self.assertEqual(batch_runner.run.call_args_list[0].args[0], {"body-key": self.body_prompt["config"]})
+        self.ai_cache.put.assert_has_calls([
+            call(self.body_prompt["config"], {"message": "{}", "error": ""}),
+            call(self.title_prompt["config"], {"message": "Title", "error": ""}),
+        ])
+        self.assertFalse(mock_write_post.call_args.kwargs['do_run_checks'])
+        self.assertIs(mock_write_post.call_args.kwargs['ai_cache'], self.ai_cache)
+    
+    @patch('koala_main.dedup_and_trim', side_effect=lambda urls: urls)
+    @patch('koala_main.write_post')
+    @patch('koala_main._collect_post_prompts')
+    @patch('koala_main.run_checks')
+    def test_failed_batch_prompts_are_not_resubmitted(self, mock_run_checks, mock_collect, mock_write_post, mock_dedup):
+        """Test that a prompt the batch could not answer is left for the interactive run"""
+        mock_run_checks.return_value = []
+        mock_collect.return_value = {"body-key": self.body_prompt}
+        batch_runner = Mock()
+        batch_runner.run.return_value = {"body-key": {"message": "Rate limited", "error": "429"}}
+        mock_write_post.return_value = []
+        
+        write_post_batch(["url1"], callback=self.callback, ai_cache=self.ai_cache, batch_runner=batch_runner)
+        
+        batch_runner.run.assert_called_once()
+        self.ai_cache.put.assert_not_called()
+        mock_write_post.assert_called_once()
+    
+    @patch('koala_main.dedup_and_trim', side_effect=lambda urls: urls)
+    @patch('koala_main.write_post')
+    @patch('koala_main._collect_post_prompts')
+    @patch('koala_main.run_checks')
+    def test_check_problems_stop_the_batch(self, mock_run_checks, mock_collect, mock_write_post, mock_dedup):
+        """Test that nothing is batched or written when the checks fail"""
+        mock_run_checks.return_value = [{'url': 'url1', 'title': 'Title', 'website': 'site', 'issues': ['Missing slug']}]
+        batch_runner = Mock()
+        
+        results = write_post_batch(["url1"], callback=self.callback, ai_cache=self.ai_cache, batch_runner=batch_runner)
+        
+        self.assertEqual(results, [])
+        mock_collect.assert_not_called()
+        batch_runner.run.assert_not_called()
+        mock_write_post.assert_not_called()
+
+    @patch('koala_main.dedup_and_trim', side_effect=lambda urls: urls)
+    @patch('koala_main.write_post')
+    @patch('koala_main.run_checks')
+    @patch('koala_main.get_openai_client', side_effect=ValueError("no OPENAI_API_KEY"))
+    def test_missing_openai_config_fails_before_the_checks(self, mock_get_client, mock_run_checks, mock_write_post, mock_dedup):
+        """Test that the default batch client is configured before any Notion call"""
+        with self.assertRaisesRegex(ValueError, "no OPENAI_API_KEY"):
+            write_post_batch(["url1"], callback=self.callback, ai_cache=self.ai_cache)
+
+        mock_run_checks.assert_not_called()
+        mock_write_post.assert_not_called()
+
+
 class TestPrintResultsPretty(unittest.TestCase):
     """Test print_results_pretty function"""
     
@@ -583,6 +985,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestWritePost))
     suite.addTests(loader.loadTestsFromTestCase(TestUpdatePageAiImgPrompt))
     suite.addTests(loader.loadTestsFromTestCase(TestAddWpImgs))
+    suite.addTests(loader.loadTestsFromTestCase(TestWritePostBatch))
     suite.addTests(loader.loadTestsFromTestCase(TestPrintResultsPretty))
     
     runner = unittest.TextTestRunner(verbosity=2)
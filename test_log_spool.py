@@ -0,0 +1,82 @@
+"""
+Unit tests for log_spool.py
+"""
+
+import os
+import queue
+import tempfile
+import unittest
+
+from log_spool import LogSpool
+
+
+def make_queue(messages):
+    log_queue = queue.Queue()
+    for msg in messages:
+        log_queue.put(msg)
+    return log_queue
+
+
+class TestLogSpool(unittest.TestCase):
+    """Test batching, the line cap of the view and the log file"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.log_dir = os.path.join(self.folder.name, "logs")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _read_log(self, spool):
+        spool.close()
+        with open(spool.log_path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_queued_messages_are_joined_into_one_text(self):
+        spool = LogSpool(max_lines=100, log_dir=None)
+        text, trim_lines = spool.drain(make_queue(["first", ["a", 1], "last"]))
+        self.assertEqual(text, "first\na\n1\nlast\n")
+        self.assertEqual(trim_lines, 0)
+        self.assertEqual(spool.visible_lines, 4)
+        self.assertEqual(spool.drain(make_queue([])), ("", 0))
+
+    def test_view_keeps_the_last_lines_and_the_file_keeps_everything(self):
+        spool = LogSpool(max_lines=10, log_dir=self.log_dir)
+        text, trim_lines = spool.drain(make_queue([f"line {idx}" for idx in range(8)]))
+        self.assertEqual(trim_lines, 0)
+
+        text, trim_lines = spool.drain(make_queue([f"line {idx}" for idx in range(8, 20)]))
+        self.assertTrue(text.startswith("[INFO][log] Only the last 10 lines are shown"))
+        self.assertIn(spool.log_path, text)
+        self.assertEqual(trim_lines, 11)  # 8 + the note + 12 new lines, down to 10
+        self.assertEqual(spool.visible_lines, 10)
+
+        self.assertEqual(self._read_log(spool), "".join(f"line {idx}\n" for idx in range(20)))
+
+    def test_long_messages_are_cut_in_the_view_only(self):
+        spool = LogSpool(max_message_chars=5, log_dir=self.log_dir)
+        text, _ = spool.drain(make_queue(["0123456789"]))
+        self.assertEqual(text, "01234… (5 more characters in the log file)\n")
+        self.assertEqual(self._read_log(spool), "0123456789\n")
+
+    def test_drain_takes_at_most_the_tick_limit(self):
+        spool = LogSpool(max_messages_per_tick=2, log_dir=None)
+        log_queue = make_queue(["a", "b", "c"])
+        self.assertEqual(spool.drain(log_queue)[0], "a\nb\n")
+        self.assertEqual(spool.drain(log_queue)[0], "c\n")
+
+    def test_old_log_files_are_removed(self):
+        os.makedirs(self.log_dir)
+        for idx in range(3):
+            path = os.path.join(self.log_dir, f"gui_old_{idx}.log")
+            open(path, "w").close()
+            os.utime(path, (idx, idx))
+
+        spool = LogSpool(log_dir=self.log_dir, keep_files=2)
+        spool.drain(make_queue(["new"]))
+        spool.close()
+        self.assertEqual(sorted(os.listdir(self.log_dir)), sorted(["gui_old_2.log", os.path.basename(spool.log_path)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Unit tests for notion_watcher.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from job_server import JobQueue, JOB_TYPE_WRITE_POST, JOB_TYPE_ADD_WP_IMGS
+from notion_watcher import NotionWatcher, NotionDatabaseQuery, parse_notion_time, format_notion_time
+
+START = "2024-05-01T10:00:00.000Z"
+T0 = parse_notion_time(START)
+
+
+class FakeDatabase:
+    """query_pages over an in-memory list of pages"""
+
+    def __init__(self):
+        self.pages = {}
+        self.queries = []
+
+    def edit(self, page_id: str, status: str, minutes: int):
+        self.pages[page_id] = {
+            "id": page_id,
+            "url": f"https://www.notion.so/{page_id}",
+            "status": status,
+            "last_edited_time": format_notion_time(T0 + minutes * 60),
+        }
+
+    def __call__(self, edited_after):
+        self.queries.append(edited_after)
+        pages = [page for page in self.pages.values() if edited_after is None or page["last_edited_time"] >= edited_after]
+        return sorted(pages, key=lambda page: page["last_edited_time"])
+
+
+class TestNotionWatcher(unittest.TestCase):
+    """Test incremental polling and job creation"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.folder.name, "watch.json")
+        self.database = FakeDatabase()
+        self.queue = JobQueue(path=None)
+        self.watcher = self._make_watcher()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _make_watcher(self):
+        return NotionWatcher(
+            self.queue,
+            query_pages=self.database,
+            read_status=lambda page: page["status"],
+            write_statuses=["not-started"],
+            img_statuses=["done"],
+            state_path=self.state_path,
+            settle_seconds=120,
+            callback=Mock(),
+        )
+
+    def test_first_poll_only_sets_the_cursor(self):
+        self.database.edit("old", "not-started", minutes=-60)
+        self.assertEqual(self.watcher.poll_once(now=T0), {})
+        self.assertEqual(self.database.queries, [])
+        self.assertEqual(self.watcher.cursor, START)
+
+    def test_ready_pages_are_queued_once(self):
+        self.watcher.poll_once(now=T0)
+        self.database.edit("write-me", "not-started", minutes=1)
+        self.database.edit("add-images", "done", minutes=2)
+        self.database.edit("ignored", "archived", minutes=2)
+
+        jobs = self.watcher.poll_once(now=T0 + 10 * 60)
+        self.assertEqual(jobs[JOB_TYPE_WRITE_POST]["urls"], ["https://www.notion.so/write-me"])
+        self.assertEqual(jobs[JOB_TYPE_ADD_WP_IMGS]["urls"], ["https://www.notion.so/add-images"])
+        self.assertEqual(self.database.queries[-1], START)
+
+        # The cursor moved to the newest change; unchanged pages are not queued again
+        self.assertEqual(self.watcher.poll_once(now=T0 + 11 * 60), {})
+        self.assertEqual(self.database.queries[-1], format_notion_time(T0 + 2 * 60))
+        self.assertEqual(len(self.queue.list()), 2)
+
+    def test_unsettled_pages_wait_for_a_later_poll(self):
+        self.watcher.poll_once(now=T0)
+        self.database.edit("settled", "not-started", minutes=1)
+        self.database.edit("fresh", "not-started", minutes=5)
+
+        jobs = self.watcher.poll_once(now=T0 + 6 * 60)
+        self.assertEqual(jobs[JOB_TYPE_WRITE_POST]["urls"], ["https://www.notion.so/settled"])
+
+        jobs = self.watcher.poll_once(now=T0 + 8 * 60)
+        self.assertEqual(jobs[JOB_TYPE_WRITE_POST]["urls"], ["https://www.notion.so/fresh"])
+
+    def test_page_with_unreadable_status_is_read_again(self):
+        statuses = {"flaky": [RuntimeError("Notion is down"), "not-started"]}
+
+        def read_status(page):
+            if page["id"] in statuses:
+                result = statuses[page["id"]].pop(0)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            return page["status"]
+
+        self.watcher.read_status = read_status
+        self.watcher.poll_once(now=T0)
+        self.database.edit("flaky", "not-started", minutes=1)
+        self.database.edit("other", "not-started", minutes=2)
+
+        jobs = self.watcher.poll_once(now=T0 + 10 * 60)
+        self.assertEqual(jobs[JOB_TYPE_WRITE_POST]["urls"], ["https://www.notion.so/other"])
+        self.assertEqual(self.watcher.cursor, format_notion_time(T0 + 60))
+
+        jobs = self.watcher.poll_once(now=T0 + 11 * 60)
+        self.assertEqual(jobs[JOB_TYPE_WRITE_POST]["urls"], ["https://www.notion.so/flaky"])
+
+    def test_urls_of_active_jobs_are_skipped(self):
+        self.watcher.poll_once(now=T0)
+        self.queue.submit(JOB_TYPE_WRITE_POST, ["https://www.notion.so/busy"])
+        self.database.edit("busy", "not-started", minutes=1)
+        self.assertEqual(self.watcher.poll_once(now=T0 + 10 * 60), {})
+
+    def test_cursor_survives_restart(self):
+        self.watcher.poll_once(now=T0)
+        self.database.edit("write-me", "not-started", minutes=1)
+        self.watcher.poll_once(now=T0 + 10 * 60)
+
+        restarted = self._make_watcher()
+        self.assertEqual(restarted.cursor, self.watcher.cursor)
+        self.assertEqual(restarted.poll_once(now=T0 + 11 * 60), {})
+
+    def test_new_edit_of_a_handled_page_is_queued_again(self):
+        self.watcher.poll_once(now=T0)
+        self.database.edit("page", "not-started", minutes=1)
+        self.watcher.poll_once(now=T0 + 10 * 60)
+        self.queue.finish(self.queue.next(timeout=0)["id"], result={})
+
+        self.database.edit("page", "done", minutes=20)
+        jobs = self.watcher.poll_once(now=T0 + 30 * 60)
+        self.assertEqual(jobs[JOB_TYPE_ADD_WP_IMGS]["urls"], ["https://www.notion.so/page"])
+
+
+class TestNotionDatabaseQuery(unittest.TestCase):
+    """Test the query and its pagination"""
+
+    def test_pages_follow_the_cursor(self):
+        client = Mock()
+        client.databases.query.side_effect = [
+            {"results": [{"id": "a"}], "has_more": True, "next_cursor": "next"},
+            {"results": [{"id": "b"}], "has_more": False},
+        ]
+        pages = NotionDatabaseQuery("db", "token", client=client)(START)
+
+        self.assertEqual([page["id"] for page in pages], ["a", "b"])
+        first, second = client.databases.query.call_args_list
+        self.assertEqual(first.kwargs["filter"], {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": START}})
+        self.assertEqual(second.kwargs["start_cursor"], "next")
+
+
+if __name__ == '__main__':
+    unittest.main()
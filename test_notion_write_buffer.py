@@ -0,0 +1,57 @@
+"""
+Unit tests for notion_write_buffer.py
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from notion_write_buffer import NotionWriteBuffer
+
+
+class TestDeferred(unittest.TestCase):
+    """Test the end-of-run flush"""
+
+    def setUp(self):
+        self.buffer = NotionWriteBuffer(max_workers=2, defer_publish=True, callback=Mock())
+
+    def test_flush_deferred_reports_failures(self):
+        on_done = Mock()
+        self.buffer.defer({"id": "page-1"}, AsyncMock(return_value="published"), on_done=on_done, label="url-1")
+        self.buffer.defer({"id": "page-2"}, AsyncMock(side_effect=ValueError("not updated")), on_done=on_done, label="url-2")
+        self.assertEqual(self.buffer.pending_deferred(), 2)
+
+        failures = []
+        self.assertEqual(asyncio.run(self.buffer.flush_deferred(failures)), ["url-2"])
+        on_done.assert_called_once_with("published")
+        self.assertEqual(failures, [{"url": "url-2", "error": "not updated"}])
+        self.assertEqual(self.buffer.pending_deferred(), 0)
+        self.assertEqual(asyncio.run(self.buffer.flush_deferred()), [])
+
+    def test_later_deferral_of_page_replaces_earlier(self):
+        first, second = AsyncMock(return_value="a"), AsyncMock(return_value="b")
+        self.buffer.defer({"id": "page-1"}, first)
+        self.buffer.defer({"id": "page-1"}, second)
+        self.assertEqual(asyncio.run(self.buffer.flush_deferred()), [])
+        first.assert_not_called()
+        second.assert_awaited_once()
+
+    def test_flush_deferred_bounds_writes_in_flight(self):
+        in_flight, peak = 0, 0
+
+        async def write():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "published"
+
+        for idx in range(5):
+            self.buffer.defer({"id": f"page-{idx}"}, write)
+        self.assertEqual(asyncio.run(self.buffer.flush_deferred()), [])
+        self.assertEqual(peak, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for openai_batch.py
+"""
+
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from openai_batch import OpenAIBatchRunner, OpenAIBatchError
+
+
+class FakeBatchEndpoint:
+    """Local stand-in for the files/batches part of the OpenAI client"""
+
+    def __init__(self, answer, statuses=("in_progress", "completed"), fail_ids=()):
+        self.answer = answer
+        self.statuses = list(statuses)
+        self.fail_ids = set(fail_ids)
+        self.requests = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve, cancel=Mock())
+        self._contents = {}
+
+    def _create_file(self, file, purpose):
+        _, data = file
+        self.requests = [json.loads(line) for line in data.getvalue().decode("utf-8").splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window, metadata):
+        output, errors = [], []
+        for request in self.requests:
+            if request["custom_id"] in self.fail_ids:
+                errors.append({"custom_id": request["custom_id"], "response": {"status_code": 500, "body": {"error": {"message": "boom"}}}})
+            else:
+                body = {"choices": [{"message": {"content": self.answer(request["body"])}}], "usage": {"prompt_tokens": 10, "completion_tokens": 2}}
+                output.append({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}})
+        self._contents = {
+            "file-out": "\n".join(json.dumps(line) for line in output),
+            "file-err": "\n".join(json.dumps(line) for line in errors),
+        }
+        return self._batch(self.statuses.pop(0))
+
+    def _retrieve(self, batch_id):
+        return self._batch(self.statuses.pop(0))
+
+    def _batch(self, status):
+        done = status == "completed"
+        return SimpleNamespace(
+            id="batch-1",
+            status=status,
+            output_file_id="file-out" if done else None,
+            error_file_id="file-err" if done and self.fail_ids else None,
+            request_counts=SimpleNamespace(completed=len(self.requests) if done else 0, total=len(self.requests)),
+        )
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._contents[file_id])
+
+
+def make_prompt_config(user_prompt, response_format=""):
+    return SimpleNamespace(ai_model="gpt-test", verbosity="high", system_prompt="sys", user_prompt=user_prompt, response_format=response_format)
+
+
+class TestOpenAIBatchRunner(unittest.TestCase):
+    """Test submitting a batch and mapping its results back"""
+
+    def setUp(self):
+        self.callback = Mock()
+
+    @patch('openai_batch.time.sleep')
+    def test_results_are_mapped_to_custom_ids(self, mock_sleep):
+        endpoint = FakeBatchEndpoint(answer=lambda body: f"answer to {body['messages'][1]['content']}")
+        runner = OpenAIBatchRunner(client=endpoint, poll_seconds=1, callback=self.callback)
+
+        responses = runner.run({
+            "a": make_prompt_config("first", response_format={"intro": {"type": "string"}}),
+            "b": make_prompt_config("second"),
+        })
+
+        self.assertEqual(responses["a"]["message"], "answer to first")
+        self.assertEqual(responses["b"]["error"], "")
+        self.assertEqual(responses["b"]["usage"]["prompt_tokens"], 10)
+        self.assertEqual(mock_sleep.call_count, 1)
+        # Structured prompts ask for a strict JSON schema; plain prompts do not
+        self.assertEqual(endpoint.requests[0]["body"]["response_format"]["json_schema"]["schema"]["required"], ["intro"])
+        self.assertNotIn("response_format", endpoint.requests[1]["body"])
+
+    @patch('openai_batch.time.sleep')
+    def test_failed_requests_come_back_as_errors(self, mock_sleep):
+        endpoint = FakeBatchEndpoint(answer=lambda body: "ok", fail_ids={"b"})
+        runner = OpenAIBatchRunner(client=endpoint, poll_seconds=1, callback=self.callback)
+
+        responses = runner.run({"a": make_prompt_config("first"), "b": make_prompt_config("second")})
+
+        self.assertEqual(responses["a"]["error"], "")
+        self.assertEqual(responses["b"]["error"], "500")
+        self.assertEqual(responses["b"]["message"], "boom")
+
+    @patch('openai_batch.time.sleep')
+    def test_batch_without_results_raises(self, mock_sleep):
+        endpoint = FakeBatchEndpoint(answer=lambda body: "ok", statuses=("in_progress", "failed"))
+        runner = OpenAIBatchRunner(client=endpoint, poll_seconds=1, callback=self.callback)
+
+        with self.assertRaises(OpenAIBatchError):
+            runner.run({"a": make_prompt_config("first")})
+
+    @patch('openai_batch.time.sleep')
+    def test_timeout_cancels_the_batch(self, mock_sleep):
+        endpoint = FakeBatchEndpoint(answer=lambda body: "ok", statuses=("in_progress",) * 10)
+        runner = OpenAIBatchRunner(client=endpoint, poll_seconds=1, timeout_seconds=0, callback=self.callback)
+
+        with self.assertRaises(OpenAIBatchError):
+            runner.run({"a": make_prompt_config("first")})
+        endpoint.batches.cancel.assert_called_once_with("batch-1")
+
+    @patch('openai_batch.time.sleep')
+    @patch('openai_batch.get_openai_client')
+    def test_default_client_is_configured_like_chatgpt_api(self, mock_get_client, mock_sleep):
+        endpoint = FakeBatchEndpoint(answer=lambda body: "ok")
+        mock_get_client.return_value = endpoint
+
+        responses = OpenAIBatchRunner(poll_seconds=1, callback=self.callback).run({"a": make_prompt_config("first")})
+
+        mock_get_client.assert_called_once_with()
+        self.assertEqual(responses["a"]["message"], "ok")
+
+    def test_empty_run_submits_nothing(self):
+        endpoint = Mock()
+        self.assertEqual(OpenAIBatchRunner(client=endpoint).run({}), {})
+        endpoint.files.create.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Unit tests for pipeline_timing.py
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from pipeline_timing import (
+    StageTimer,
+    timed,
+    TIMING_STAGE_AI_BODY,
+    TIMING_STAGE_WP_CREATE,
+)
+
+
+class TestStageTimer(unittest.TestCase):
+    """Test span recording, export and the per-stage summary"""
+
+    def test_span_records_stage_and_url(self):
+        timer = StageTimer()
+        with timer.span(TIMING_STAGE_AI_BODY, "url-1"):
+            pass
+
+        spans = timer.get_spans()
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]["stage"], TIMING_STAGE_AI_BODY)
+        self.assertEqual(spans[0]["url"], "url-1")
+        self.assertTrue(spans[0]["ok"])
+        self.assertGreaterEqual(spans[0]["duration"], 0)
+
+    def test_span_is_recorded_when_block_raises(self):
+        timer = StageTimer()
+        with self.assertRaises(RuntimeError):
+            with timer.span(TIMING_STAGE_WP_CREATE, "url-1"):
+                raise RuntimeError("boom")
+
+        spans = timer.get_spans()
+        self.assertEqual(len(spans), 1)
+        self.assertFalse(spans[0]["ok"])
+
+    def test_summary_percentiles(self):
+        timer = StageTimer()
+        for duration in range(1, 21):
+            timer.record(TIMING_STAGE_AI_BODY, float(duration))
+        timer.record(TIMING_STAGE_WP_CREATE, 3.0)
+
+        summary = timer.summarize()
+        self.assertEqual(list(summary), [TIMING_STAGE_AI_BODY, TIMING_STAGE_WP_CREATE])
+        self.assertEqual(summary[TIMING_STAGE_AI_BODY]["count"], 20)
+        self.assertEqual(summary[TIMING_STAGE_AI_BODY]["p50"], 10.0)
+        self.assertEqual(summary[TIMING_STAGE_AI_BODY]["p95"], 19.0)
+        self.assertEqual(summary[TIMING_STAGE_AI_BODY]["max"], 20.0)
+        self.assertEqual(summary[TIMING_STAGE_AI_BODY]["total"], 210.0)
+        self.assertEqual(summary[TIMING_STAGE_WP_CREATE]["p95"], 3.0)
+        self.assertIn(TIMING_STAGE_WP_CREATE, timer.format_summary())
+
+    def test_export_jsonl(self):
+        timer = StageTimer()
+        timer.record(TIMING_STAGE_AI_BODY, 1.5, notion_url="url-1")
+        timer.record(TIMING_STAGE_WP_CREATE, 0.5, notion_url="url-1")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sub", "timings.jsonl")
+            timer.export_jsonl(path)
+            with open(path, "r", encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+
+        self.assertEqual([line["stage"] for line in lines], [TIMING_STAGE_AI_BODY, TIMING_STAGE_WP_CREATE])
+        self.assertEqual(lines[0]["duration"], 1.5)
+
+    def test_concurrent_spans(self):
+        timer = StageTimer()
+
+        def work(idx):
+            for _ in range(50):
+                with timer.span(TIMING_STAGE_AI_BODY, f"url-{idx}"):
+                    pass
+
+        threads = [threading.Thread(target=work, args=(idx,)) for idx in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(timer.summarize()[TIMING_STAGE_AI_BODY]["count"], 400)
+
+    def test_timed_without_timer_is_noop(self):
+        with timed(None, TIMING_STAGE_AI_BODY, "url-1"):
+            pass
+        self.assertEqual(StageTimer().format_summary(), "[INFO][StageTimer] No timings recorded.")
+
+
+if __name__ == '__main__':
+    unittest.main()
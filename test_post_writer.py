@@ -2,11 +2,12 @@
 Unit tests for post_writer.py
 """
 
+import asyncio
 import unittest
 import sys
 import os
 import json
-from unittest.mock import Mock, MagicMock, patch, call
+from unittest.mock import AsyncMock, Mock, MagicMock, patch, call
 
 # Add parent directory to path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -204,6 +205,56 @@ class TestPostWriterSingleRecipePost(unittest.TestCase):
         self.assertEqual(len(result[POST_PART_INGREDIENTS]), 2)
         self.assertEqual(len(result[POST_PART_INSTRUCTIONS]), 2)
     
+    @patch('post_writer.send_prompt_to_openai')
+    @patch.object(PostWriter, '_generate_title_with_ai')
+    def test_get_single_recipe_post_title_from_body_response(self, mock_gen_title, mock_send_prompt):
+        """Test that the title comes from the body response without a second AI call"""
+        self.writer.test = False
+        self.writer.title_with_body = True
+        
+        mock_send_prompt.return_value = {
+            'error': '',
+            'message': '''{
+                "intro": "This is a great recipe.",
+                "equipment_must_haves": ["Bowl", "Oven"],
+                "equipment_nice_to_haves": ["Mixer"],
+                "ingredients": ["2 cups flour", "1 cup sugar"],
+                "instructions": ["Mix ingredients", "Bake"],
+                "good_to_know": "Store in airtight container.",
+                "title": "Chocolate Cake Recipe That Steals The Show"
+            }'''
+        }
+        
+        result = self.writer._get_single_recipe_post()
+        
+        mock_send_prompt.assert_called_once()
+        mock_gen_title.assert_not_called()
+        self.assertEqual(result[POST_PART_TITLE], "Chocolate Cake Recipe That Steals The Show")
+        
+        prompt_config = mock_send_prompt.call_args[0][0]
+        self.assertIn(POST_PART_TITLE, prompt_config.response_format)
+        self.assertIn(POST_PART_TITLE, prompt_config.system_prompt)
+    
+    @patch('post_writer.send_prompt_to_openai')
+    @patch.object(PostWriter, '_generate_title_with_ai')
+    def test_get_single_recipe_post_title_with_body_disabled(self, mock_gen_title, mock_send_prompt):
+        """Test that the separate title call is used when title_with_body is off"""
+        self.writer.test = False
+        self.writer.title_with_body = False
+        
+        mock_send_prompt.return_value = {
+            'error': '',
+            'message': '{"intro": "Intro.", "ingredients": ["flour"], "instructions": ["Bake"]}'
+        }
+        mock_gen_title.return_value = "Separate Title"
+        
+        result = self.writer._get_single_recipe_post()
+        
+        mock_gen_title.assert_called_once()
+        self.assertEqual(result[POST_PART_TITLE], "Separate Title")
+        prompt_config = mock_send_prompt.call_args[0][0]
+        self.assertNotIn(POST_PART_TITLE, prompt_config.response_format)
+    
     @patch('post_writer.send_prompt_to_openai')
     def test_get_single_recipe_post_ai_error(self, mock_send_prompt):
         """Test error handling when AI returns error"""
@@ -284,6 +335,25 @@ class TestPostWriterRoundupPost(unittest.TestCase):
         self.assertEqual(result[POST_PART_ITEMS][0][WP_FORMAT_ITEM_LINK_KEY], 'https://example.com/recipe1')
         self.assertEqual(result[POST_PART_ITEMS][1][WP_FORMAT_ITEM_LINK_KEY], 'https://example.com/recipe2')
     
+    @patch('post_writer.get_post_images_for_blog_url')
+    @patch.object(PostWriter, '_generate_title_intro_conclusion_with_ai')
+    def test_get_roundup_post_uses_prefetched_items(self, mock_gen_content, mock_get_images):
+        """Test that items fetched during the checks are not fetched again"""
+        self.writer.roundup_items = [
+            {
+                'Image Title': 'Recipe 1',
+                'Image Description': 'https://example.com/recipe1',
+                'Notes': 'This is a great recipe for beginners.'
+            }
+        ]
+        mock_gen_content.return_value = ("Title", "Intro", "Conclusion")
+        
+        result = self.writer._get_roundup_post()
+        
+        mock_get_images.assert_not_called()
+        self.assertEqual(len(result[POST_PART_ITEMS]), 1)
+        self.assertEqual(result[POST_PART_ITEMS][0][WP_FORMAT_ITEM_TITLE_KEY], 'Recipe 1')
+    
     @patch('post_writer.get_post_images_for_blog_url')
     def test_get_roundup_post_no_items(self, mock_get_images):
         """Test error when no roundup items found"""
@@ -449,6 +519,149 @@ class TestPostWriterTitleIntroConclusion(unittest.TestCase):
         self.assertIn('Failed to parse AI response as JSON', str(context.exception))
 
 
+class TestPostWriterSendPrompt(unittest.TestCase):
+    """Test _send_prompt and its AI response cache handling"""
+    
+    def setUp(self):
+        self.callback = Mock()
+        self.ai_cache = Mock()
+        self.writer = PostWriter(test=False, callback=self.callback, ai_cache=self.ai_cache)
+        self.prompt_config = Mock()
+    
+    @patch('post_writer.send_prompt_to_openai')
+    def test_send_prompt_uses_cached_response(self, mock_send_prompt):
+        """Test that a cache hit skips the OpenAI call"""
+        self.ai_cache.get.return_value = {'error': '', 'message': 'cached'}
+        
+        result = self.writer._send_prompt(self.prompt_config)
+        
+        self.assertEqual(result['message'], 'cached')
+        mock_send_prompt.assert_not_called()
+        self.ai_cache.put.assert_not_called()
+    
+    @patch('post_writer.send_prompt_to_openai')
+    def test_send_prompt_stores_fresh_response(self, mock_send_prompt):
+        """Test that a cache miss calls OpenAI and stores the response"""
+        self.ai_cache.get.return_value = None
+        mock_send_prompt.return_value = {'error': '', 'message': 'fresh'}
+        
+        result = self.writer._send_prompt(self.prompt_config)
+        
+        self.assertEqual(result['message'], 'fresh')
+        mock_send_prompt.assert_called_once_with(self.prompt_config, False)
+        self.ai_cache.put.assert_called_once_with(self.prompt_config, mock_send_prompt.return_value)
+    
+    @patch('post_writer.send_prompt_to_openai')
+    def test_send_prompt_without_cache(self, mock_send_prompt):
+        """Test that no cache is used by default"""
+        writer = PostWriter(test=False, callback=self.callback)
+        mock_send_prompt.return_value = {'error': '', 'message': 'fresh'}
+        
+        result = writer._send_prompt(self.prompt_config)
+        
+        self.assertEqual(result['message'], 'fresh')
+        mock_send_prompt.assert_called_once()
+    
+    @patch('post_writer.send_prompt_to_openai')
+    def test_send_prompt_records_usage(self, mock_send_prompt):
+        """Test that fresh and cached responses are both recorded with the prompt name"""
+        usage = Mock()
+        usage.take_primed.return_value = False
+        writer = PostWriter(test=False, callback=self.callback, ai_cache=self.ai_cache, usage=usage)
+        writer.notion_url = "https://notion.so/page"
+        writer.post_topic = POST_TOPIC_RECIPES
+        self.ai_cache.get.side_effect = [None, {'error': '', 'message': 'cached'}]
+        mock_send_prompt.return_value = {'error': '', 'message': 'fresh'}
+        
+        writer._send_prompt(self.prompt_config, prompt_name="title")
+        writer._send_prompt(self.prompt_config, prompt_name="title")
+        
+        self.assertEqual(usage.record.call_count, 2)
+        first_call, second_call = usage.record.call_args_list
+        self.assertEqual(first_call.args[1], mock_send_prompt.return_value)
+        self.assertEqual(first_call.kwargs['prompt_name'], "title")
+        self.assertEqual(first_call.kwargs['topic'], POST_TOPIC_RECIPES)
+        self.assertEqual(first_call.kwargs['notion_url'], "https://notion.so/page")
+        self.assertFalse(first_call.kwargs['from_cache'])
+        self.assertTrue(second_call.kwargs['from_cache'])
+    
+    @patch('post_writer.send_prompt_to_openai')
+    def test_send_prompt_skips_usage_of_batch_answers(self, mock_send_prompt):
+        """Test that a cache hit the batch already recorded is not recorded again"""
+        usage = Mock()
+        usage.take_primed.return_value = True
+        writer = PostWriter(test=False, callback=self.callback, ai_cache=self.ai_cache, usage=usage)
+        self.ai_cache.get.return_value = {'error': '', 'message': 'batched'}
+        
+        writer._send_prompt(self.prompt_config)
+        
+        usage.take_primed.assert_called_once_with(self.ai_cache.make_key.return_value)
+        usage.record.assert_not_called()
+    
+    @patch('post_writer.send_prompt_to_openai')
+    @patch('post_writer.stream_prompt_to_openai')
+    def test_send_prompt_streams_structured_response(self, mock_stream, mock_send_prompt):
+        """Test that streaming logs each part once it is complete"""
+        def fake_stream(prompt_config, on_delta):
+            for delta in ['{"intro": "Hi', ' there", "ingredients": ["flour",', ' "eggs"]}']:
+                on_delta(delta)
+            return {'error': '', 'message': '{"intro": "Hi there", "ingredients": ["flour", "eggs"]}'}
+        mock_stream.side_effect = fake_stream
+        self.ai_cache.get.return_value = None
+        self.writer.stream = True
+        self.prompt_config.response_format = {'intro': {'type': 'string'}}
+        
+        result = self.writer._send_prompt(self.prompt_config)
+        
+        self.assertEqual(result['message'], '{"intro": "Hi there", "ingredients": ["flour", "eggs"]}')
+        mock_send_prompt.assert_not_called()
+        logged = [c.args[0] for c in self.callback.call_args_list]
+        self.assertIn("[PostWriter._stream_prompt] 'intro' ready: Hi there", logged)
+        self.assertIn("[PostWriter._stream_prompt] 'ingredients' ready: 2 item(s)", logged)
+    
+    @patch('post_writer.stream_prompt_to_openai')
+    def test_send_prompt_stream_fails_fast_on_malformed_json(self, mock_stream):
+        """Test that a malformed stream raises and is not cached"""
+        def fake_stream(prompt_config, on_delta):
+            on_delta('Sorry, I cannot')
+            self.fail("The stream should have been aborted")
+        mock_stream.side_effect = fake_stream
+        self.ai_cache.get.return_value = None
+        self.writer.stream = True
+        self.prompt_config.response_format = {'intro': {'type': 'string'}}
+        
+        with self.assertRaises(ValueError) as context:
+            self.writer._send_prompt(self.prompt_config)
+        
+        self.assertIn('Failed to parse AI response as JSON', str(context.exception))
+        self.ai_cache.put.assert_not_called()
+
+    @patch('post_writer.send_prompt_to_openai')
+    def test_async_write_post_awaits_each_prompt_once(self, mock_send_prompt):
+        """Test that async_write_post answers the prompts on the loop and reruns write_post until it completes"""
+        body_config, title_config = Mock(), Mock()
+        self.ai_cache.get.return_value = None
+        runs = []
+        
+        def fake_write_post():
+            runs.append(1)
+            body = self.writer._send_prompt(body_config, prompt_name="post_body")
+            title = self.writer._send_prompt(title_config, prompt_name="title")
+            return {POST_PART_INTRO: body['message'], POST_PART_TITLE: title['message']}
+        send_prompt = AsyncMock(side_effect=lambda prompt_config: {'error': '', 'message': 'body' if prompt_config is body_config else 'title'})
+        
+        with patch.object(self.writer, 'write_post', side_effect=fake_write_post):
+            result = asyncio.run(self.writer.async_write_post(send_prompt))
+        
+        self.assertEqual(result, {POST_PART_INTRO: 'body', POST_PART_TITLE: 'title'})
+        self.assertEqual(len(runs), 3)
+        self.assertEqual([c.args[0] for c in send_prompt.await_args_list], [body_config, title_config])
+        mock_send_prompt.assert_not_called()
+        self.assertEqual(self.ai_cache.put.call_count, 2)
+        self.assertIsNone(self.writer.prompt_collector)
+        self.assertIsNone(self.writer._answers)
+
+
 class TestPostWriterHelperMethods(unittest.TestCase):
     """Test helper methods"""
     
@@ -499,6 +712,11 @@ class TestPostWriterHelperMethods(unittest.TestCase):
         self.assertIn('target="_blank"', result)
         self.assertIn('rel="noopener"', result)
     
+    def test_get_cta_with_link_is_stable_per_url(self):
+        """Test that the same URL always gets the same CTA so retried prompts stay identical"""
+        url = "https://example.com/recipe"
+        self.assertEqual(self.writer._get_cta_with_link(url), self.writer._get_cta_with_link(url))
+    
     def test_append_cta(self):
         """Test appending CTA to body text"""
         body = "This is a great recipe."
@@ -703,6 +921,23 @@ class TestPostWriterPrompts(unittest.TestCase):
         
         # Verify it returns the config
         self.assertIsInstance(result, AIPromptConfig)
+    
+    @patch.object(PostWriter, '_get_single_plural_subj', return_value="a single item and not plurals")
+    def test_body_system_prompt_is_identical_across_posts(self, mock_single_plural):
+        """Test that post-specific text stays out of the cacheable system prompt"""
+        from chatgpt_api import AIPromptConfig
+        
+        system_prompts = []
+        for title in ("Apple Pie", "Beef Stew"):
+            self.writer.post_title = title
+            prompt_config = AIPromptConfig(system_prompt="", user_prompt="", response_format={}, ai_model="test-model", verbosity=1)
+            prompt_config = self.writer._get_single_recipe_post_body_prompts(prompt_config)
+            prompt_config = self.writer._add_title_to_body_prompts(prompt_config)
+            self.assertNotIn(title, prompt_config.system_prompt)
+            self.assertTrue(prompt_config.user_prompt.rstrip().endswith("a single item and not plurals."))
+            system_prompts.append(prompt_config.system_prompt)
+        
+        self.assertEqual(system_prompts[0], system_prompts[1])
 
 
 class TestPostWriterGeneratePostUsingOur(unittest.TestCase):
@@ -1247,6 +1482,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestPostWriterRoundupPost))
     suite.addTests(loader.loadTestsFromTestCase(TestPostWriterTitleGeneration))
     suite.addTests(loader.loadTestsFromTestCase(TestPostWriterTitleIntroConclusion))
+    suite.addTests(loader.loadTestsFromTestCase(TestPostWriterSendPrompt))
     suite.addTests(loader.loadTestsFromTestCase(TestPostWriterHelperMethods))
     suite.addTests(loader.loadTestsFromTestCase(TestPostWriterPrompts))
     suite.addTests(loader.loadTestsFromTestCase(TestPostWriterGeneratePostUsingOur))
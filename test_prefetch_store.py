@@ -0,0 +1,54 @@
+"""
+Unit tests for prefetch_store.py
+"""
+
+import unittest
+
+from prefetch_store import PrefetchStore
+
+
+class TestPrefetchStore(unittest.TestCase):
+    """Test storing and updating prefetched Notion data"""
+
+    def test_get_unknown_url_returns_none(self):
+        store = PrefetchStore()
+        self.assertIsNone(store.get("https://notion.so/unknown"))
+        self.assertNotIn("https://notion.so/unknown", store)
+
+    def test_put_then_get(self):
+        store = PrefetchStore()
+        post = {'id': 'page-id'}
+        store.put("https://notion.so/page", post, "Title", "site")
+
+        entry = store.get("https://notion.so/page")
+        self.assertIs(entry.post, post)
+        self.assertEqual(entry.title, "Title")
+        self.assertEqual(entry.website, "site")
+        self.assertIsNone(entry.categories)
+        self.assertIsNone(entry.roundup_items)
+        self.assertEqual(len(store), 1)
+
+    def test_update_sets_fields(self):
+        store = PrefetchStore()
+        store.put("https://notion.so/page", {}, "Title", "site")
+        store.update("https://notion.so/page", categories="Recipes / Dinner", post_type="roundup", roundup_items=[{"a": 1}])
+
+        entry = store.get("https://notion.so/page")
+        self.assertEqual(entry.categories, "Recipes / Dinner")
+        self.assertEqual(entry.post_type, "roundup")
+        self.assertEqual(entry.roundup_items, [{"a": 1}])
+
+    def test_update_unknown_url_is_ignored(self):
+        store = PrefetchStore()
+        store.update("https://notion.so/missing", categories="Recipes")
+        self.assertIsNone(store.get("https://notion.so/missing"))
+
+    def test_update_unknown_field_raises(self):
+        store = PrefetchStore()
+        store.put("https://notion.so/page", {}, "Title", "site")
+        with self.assertRaises(AttributeError):
+            store.update("https://notion.so/page", not_a_field=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+"""
+Unit tests for rate_limiter.py
+"""
+
+import asyncio
+import time
+import unittest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import rate_limiter
+from rate_limiter import (
+    RateLimiter,
+    call_limited,
+    acall_limited,
+    get_retry_after,
+    is_openai_throttled,
+    get_limiter,
+    get_limiter_metrics,
+    format_limiter_metrics,
+    RATE_LIMIT_WORDPRESS,
+)
+
+
+class FakeHTTPError(Exception):
+    """Stand-in for a requests/openai HTTP error"""
+
+    def __init__(self, status_code, headers=None, code=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.code = code
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test the token bucket, the AIMD concurrency limit and the metrics"""
+
+    def test_burst_then_paced_by_rate(self):
+        limiter = RateLimiter("test", rate=20, burst=2, max_concurrency=10)
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+            limiter.release()
+        elapsed = time.monotonic() - start
+
+        # 2 calls from the burst, 2 more at 20/s
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertEqual(limiter.get_metrics()["calls"], 4)
+
+    def test_throttle_halves_concurrency_and_success_raises_it(self):
+        limiter = RateLimiter("test", rate=0, burst=1, max_concurrency=8)
+        limiter.acquire()
+        limiter.release(retry_after=0)
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertEqual(limiter.get_metrics()["throttles"], 1)
+
+        limiter.acquire()
+        limiter.release()
+        self.assertGreater(limiter.concurrency, 4)
+        self.assertLessEqual(limiter.concurrency, 8)
+
+    def test_failed_call_leaves_concurrency_unchanged(self):
+        limiter = RateLimiter("test", rate=0, burst=1, max_concurrency=8)
+        limiter.concurrency = 4
+        limiter.acquire()
+        limiter.release(success=False)
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertEqual(limiter.get_metrics()["throttles"], 0)
+
+    def test_concurrency_never_below_minimum(self):
+        limiter = RateLimiter("test", rate=0, burst=1, max_concurrency=2)
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(retry_after=0)
+        self.assertEqual(limiter.concurrency, 1)
+
+    def test_retry_after_pauses_limiter(self):
+        limiter = RateLimiter("test", rate=0, burst=1, max_concurrency=2)
+        limiter.acquire()
+        limiter.release(retry_after=0.1)
+        waited = limiter.acquire()
+        self.assertGreaterEqual(waited, 0.05)
+        self.assertGreaterEqual(limiter.get_metrics()["wait_max"], 0.05)
+
+
+class TestGetRetryAfter(unittest.TestCase):
+    """Test detection of throttling errors and Retry-After parsing"""
+
+    def test_retry_after_seconds(self):
+        self.assertEqual(get_retry_after(FakeHTTPError(429, {"Retry-After": "7"})), 7.0)
+
+    def test_retry_after_http_date(self):
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        seconds = get_retry_after(FakeHTTPError(503, {"Retry-After": format_datetime(when, usegmt=True)}))
+        self.assertGreater(seconds, 20)
+        self.assertLessEqual(seconds, 30)
+
+    @patch.object(rate_limiter, "RATE_LIMIT_DEFAULT_RETRY_AFTER_SECONDS", 2)
+    def test_exponential_backoff_without_header(self):
+        self.assertEqual(get_retry_after(FakeHTTPError(429), attempt=0), 2)
+        self.assertEqual(get_retry_after(FakeHTTPError(429), attempt=2), 8)
+
+    def test_other_errors_are_not_throttling(self):
+        self.assertIsNone(get_retry_after(FakeHTTPError(500)))
+        self.assertIsNone(get_retry_after(ValueError("bad data")))
+        # A Retry-After header alone does not make an error a throttle
+        self.assertIsNone(get_retry_after(FakeHTTPError(500, {"Retry-After": "5"})))
+
+    def test_exhausted_quota_is_not_throttling(self):
+        self.assertIsNone(get_retry_after(FakeHTTPError(429, {"Retry-After": "5"}, code="insufficient_quota")))
+
+    def test_is_openai_throttled(self):
+        self.assertTrue(is_openai_throttled({"message": "Error code: 429 - {'error': {'code': 'rate_limit_exceeded'}}", "error": "RateLimitError"}))
+        self.assertTrue(is_openai_throttled({"message": "Error code: 503", "error": "InternalServerError"}))
+        self.assertFalse(is_openai_throttled({"message": "{}", "error": ""}))
+        self.assertFalse(is_openai_throttled({"message": "bad", "error": "BadRequestError"}))
+        self.assertFalse(is_openai_throttled({"message": "Error code: 429 - {'error': {'code': 'insufficient_quota'}}", "error": "RateLimitError"}))
+        self.assertFalse(is_openai_throttled({"message": "Request 4291 failed", "error": "RateLimitError"}))
+
+
+@patch.object(rate_limiter, "RATE_LIMIT_DEFAULT_RETRY_AFTER_SECONDS", 0)
+class TestCallLimited(unittest.TestCase):
+    """Test retries of throttled calls"""
+
+    def setUp(self):
+        self.key = self.id()
+        self.logs = []
+
+    def test_retries_throttled_call(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise FakeHTTPError(429, {"Retry-After": "0"})
+            return "ok"
+
+        result = call_limited(RATE_LIMIT_WORDPRESS, flaky, limiter_key=self.key, limiter_callback=self.logs.append)
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(len(self.logs), 2)
+        self.assertEqual(get_limiter(RATE_LIMIT_WORDPRESS, self.key).get_metrics()["throttles"], 2)
+
+    def test_other_errors_are_raised_at_once(self):
+        attempts = []
+
+        def broken():
+            attempts.append(1)
+            raise ValueError("bad data")
+
+        with self.assertRaises(ValueError):
+            call_limited(RATE_LIMIT_WORDPRESS, broken, limiter_key=self.key, limiter_callback=self.logs.append)
+        self.assertEqual(len(attempts), 1)
+
+    def test_non_idempotent_calls_are_retried_after_429_only(self):
+        attempts = []
+
+        def create(status_code):
+            attempts.append(status_code)
+            if len(attempts) == 1:
+                raise FakeHTTPError(status_code, {"Retry-After": "0"})
+            return "created"
+
+        self.assertEqual(call_limited(RATE_LIMIT_WORDPRESS, create, 429, limiter_key=self.key, limiter_callback=self.logs.append, idempotent=False), "created")
+        attempts.clear()
+        with self.assertRaises(FakeHTTPError):
+            call_limited(RATE_LIMIT_WORDPRESS, create, 503, limiter_key=self.key, limiter_callback=self.logs.append, idempotent=False)
+        self.assertEqual(attempts, [503])
+
+    @patch.object(rate_limiter, "RATE_LIMIT_THROTTLE_RETRIES", 1)
+    def test_gives_up_after_retries(self):
+        with self.assertRaises(FakeHTTPError):
+            call_limited(RATE_LIMIT_WORDPRESS, self._always_throttled, limiter_key=self.key, limiter_callback=self.logs.append)
+
+    def test_throttled_response_is_retried(self):
+        responses = [{"message": "Error code: 429", "error": "RateLimitError"}, {"message": "{}", "error": ""}]
+        result = call_limited(RATE_LIMIT_WORDPRESS, responses.pop, 0, limiter_key=self.key,
+                              limiter_callback=self.logs.append, is_throttled=is_openai_throttled)
+        self.assertEqual(result, {"message": "{}", "error": ""})
+
+    def test_metrics_are_reported_per_website(self):
+        call_limited(RATE_LIMIT_WORDPRESS, lambda: None, limiter_key=self.key)
+        self.assertEqual(get_limiter_metrics()[f"{RATE_LIMIT_WORDPRESS}:{self.key}"]["calls"], 1)
+        self.assertIn(self.key, format_limiter_metrics())
+
+    @patch.object(rate_limiter, "RATE_LIMIT_ENABLED", False)
+    def test_disabled_calls_directly(self):
+        self.assertEqual(call_limited(RATE_LIMIT_WORDPRESS, lambda x: x * 2, 21, limiter_key=self.key), 42)
+        self.assertNotIn(f"{RATE_LIMIT_WORDPRESS}:{self.key}", get_limiter_metrics())
+
+    def test_async_retries_throttled_call(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise FakeHTTPError(429, {"Retry-After": "0"})
+            return "ok"
+
+        result = asyncio.run(acall_limited(RATE_LIMIT_WORDPRESS, flaky, limiter_key=self.key, limiter_callback=self.logs.append))
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(get_limiter(RATE_LIMIT_WORDPRESS, self.key).get_metrics()["throttles"], 1)
+
+    def test_async_waits_for_a_slot_without_blocking_the_loop(self):
+        limiter = get_limiter(RATE_LIMIT_WORDPRESS, self.key)
+        limiter.concurrency = limiter.max_concurrency = 1
+        in_flight = []
+
+        async def call():
+            in_flight.append(1)
+            await asyncio.sleep(0.02)
+            self.assertEqual(len(in_flight), 1)
+            in_flight.pop()
+
+        async def run():
+            await asyncio.gather(*(acall_limited(RATE_LIMIT_WORDPRESS, call, limiter_key=self.key) for _ in range(3)))
+
+        asyncio.run(run())
+        self.assertEqual(limiter.get_metrics()["calls"], 3)
+
+    @staticmethod
+    def _always_throttled():
+        raise FakeHTTPError(429)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Unit tests for startup_profile.py
+"""
+
+import builtins
+import os
+import sys
+import tempfile
+import unittest
+
+from startup_profile import ImportProfiler
+
+
+class TestImportProfiler(unittest.TestCase):
+    """Test import recording and the report"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.folder.name, "profiled_parent.py"), "w") as f:
+            f.write("import profiled_child\n")
+        with open(os.path.join(self.folder.name, "profiled_child.py"), "w") as f:
+            f.write("VALUE = 1\n")
+        sys.path.insert(0, self.folder.name)
+        self.original_import = builtins.__import__
+
+    def tearDown(self):
+        builtins.__import__ = self.original_import
+        sys.path.remove(self.folder.name)
+        for name in ("profiled_parent", "profiled_child"):
+            sys.modules.pop(name, None)
+        self.folder.cleanup()
+
+    def test_records_new_modules_with_nesting(self):
+        profiler = ImportProfiler().start()
+        try:
+            import profiled_parent  # noqa: F401
+            import profiled_parent  # noqa: F401,F811 - already loaded, not recorded again
+        finally:
+            profiler.stop()
+
+        records = {name: (self_seconds, cumulative, depth) for name, self_seconds, cumulative, depth in profiler.records}
+        self.assertEqual(set(records), {"profiled_parent", "profiled_child"})
+        self.assertEqual(records["profiled_parent"][2], 0)
+        self.assertEqual(records["profiled_child"][2], 1)
+        self.assertGreaterEqual(records["profiled_parent"][1], records["profiled_child"][1])
+        self.assertAlmostEqual(profiler.total_seconds(), records["profiled_parent"][1])
+
+    def test_stop_restores_import(self):
+        profiler = ImportProfiler().start()
+        self.assertIsNot(builtins.__import__, self.original_import)
+        profiler.stop()
+        self.assertIs(builtins.__import__, self.original_import)
+        import profiled_child  # noqa: F401
+        self.assertEqual(profiler.records, [])
+
+    def test_report_lists_slowest(self):
+        profiler = ImportProfiler()
+        profiler.started_at = 0.0
+        profiler.records = [("fast", 0.001, 0.001, 1), ("slow", 0.002, 0.010, 0), ("medium", 0.005, 0.005, 0)]
+        self.assertEqual([record[0] for record in profiler.slowest(2)], ["slow", "medium"])
+
+        report = profiler.format_report(limit=2)
+        self.assertIn("3 import(s) took 0.015s", report)
+        self.assertIn("slow", report)
+        self.assertNotIn("fast", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Unit tests for streaming_json.py
+"""
+
+import json
+import unittest
+from unittest.mock import Mock
+
+from streaming_json import StreamingJSONObjectParser, StreamingJSONError
+
+
+def feed_in_chunks(parser, text, size=3):
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+
+
+class TestStreamingJSONObjectParser(unittest.TestCase):
+    """Test incremental parsing of a streamed JSON object"""
+
+    def setUp(self):
+        self.data = {
+            "intro": "Hello \"there\",\nfriend }]",
+            "ingredients": ["2 cups flour", "1 [big] egg"],
+            "nested": {"a": [1, {"b": None}]},
+            "count": 12,
+            "ok": True,
+        }
+
+    def test_parses_whole_object_across_chunks(self):
+        parser = StreamingJSONObjectParser()
+        feed_in_chunks(parser, json.dumps(self.data, indent=2))
+
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.close(), self.data)
+
+    def test_fields_are_reported_as_soon_as_they_close(self):
+        on_field = Mock()
+        parser = StreamingJSONObjectParser(on_field=on_field)
+        text = json.dumps(self.data)
+
+        # Everything up to the closing quote of the intro value
+        intro_end = text.index(', "ingredients"')
+        parser.feed(text[:intro_end])
+        on_field.assert_called_once_with("intro", self.data["intro"])
+
+        parser.feed(text[intro_end:])
+        self.assertEqual([c.args[0] for c in on_field.call_args_list], list(self.data))
+
+    def test_empty_object(self):
+        parser = StreamingJSONObjectParser()
+        parser.feed(" {} ")
+        self.assertEqual(parser.close(), {})
+
+    def test_non_json_fails_on_first_char(self):
+        parser = StreamingJSONObjectParser()
+        with self.assertRaises(StreamingJSONError):
+            parser.feed("Sure! Here is your recipe")
+
+    def test_invalid_value_fails_before_the_end(self):
+        parser = StreamingJSONObjectParser()
+        with self.assertRaises(StreamingJSONError):
+            parser.feed('{"count": tru, "intro": "')
+
+    def test_mismatched_brackets(self):
+        parser = StreamingJSONObjectParser()
+        with self.assertRaises(StreamingJSONError):
+            parser.feed('{"items": [1, 2}')
+
+    def test_truncated_response_fails_on_close(self):
+        parser = StreamingJSONObjectParser()
+        parser.feed('{"intro": "Hello", "ingredients": ["flour"')
+        with self.assertRaises(StreamingJSONError):
+            parser.close()
+
+    def test_trailing_garbage(self):
+        parser = StreamingJSONObjectParser()
+        with self.assertRaises(StreamingJSONError):
+            parser.feed('{"intro": "Hello"} extra')
+
+
+if __name__ == '__main__':
+    unittest.main()
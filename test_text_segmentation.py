@@ -0,0 +1,89 @@
+"""
+Unit tests for text_segmentation.py
+"""
+
+import os
+import sys
+import unittest
+
+from text_segmentation import (
+    split_sentences,
+    split_into_paragraphs,
+    split_into_paragraphs_batch,
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+from bench_text_segmentation import legacy_split_into_paragraphs, make_items
+
+
+class TestSplitSentences(unittest.TestCase):
+    """Test sentence boundaries"""
+
+    def test_basic_punctuation(self):
+        self.assertEqual(
+            split_sentences("What is this? It's a question! Now a statement. And another one."),
+            ["What is this?", "It's a question!", "Now a statement.", "And another one."],
+        )
+
+    def test_abbreviations(self):
+        self.assertEqual(
+            split_sentences("Dr. Smith likes fruit, e.g. apples. Mrs. Doe does not."),
+            ["Dr. Smith likes fruit, e.g. apples.", "Mrs. Doe does not."],
+        )
+
+    def test_trailing_abbreviations(self):
+        self.assertEqual(
+            split_sentences("Add 1 tsp. salt and 2 oz. butter. Stir for 5 min. Serve with bread, jam, etc. Enjoy!"),
+            ["Add 1 tsp. salt and 2 oz. butter.", "Stir for 5 min.", "Serve with bread, jam, etc.", "Enjoy!"],
+        )
+
+    def test_decimals(self):
+        self.assertEqual(
+            split_sentences("Use 2.5 cups of flour. Bake at 180.5 degrees."),
+            ["Use 2.5 cups of flour.", "Bake at 180.5 degrees."],
+        )
+
+    def test_ellipses(self):
+        self.assertEqual(
+            split_sentences("Wait for it... then flip. It's done… Serve warm."),
+            ["Wait for it... then flip.", "It's done…", "Serve warm."],
+        )
+
+    def test_empty(self):
+        self.assertEqual(split_sentences(""), [])
+        self.assertEqual(split_sentences("   "), [])
+        self.assertEqual(split_sentences(None), [])
+
+
+class TestSplitIntoParagraphs(unittest.TestCase):
+    """Test paragraph grouping and the batch API"""
+
+    def test_groups_sentences(self):
+        text = "First sentence. Second sentence. Third sentence. Fourth sentence. Fifth."
+        self.assertEqual(
+            split_into_paragraphs(text),
+            "First sentence. Second sentence.\nThird sentence. Fourth sentence.\nFifth.",
+        )
+        self.assertEqual(split_into_paragraphs(text, sentences_per_paragraph=3).count("\n"), 1)
+
+    def test_blank_text_unchanged(self):
+        self.assertEqual(split_into_paragraphs(""), "")
+        self.assertEqual(split_into_paragraphs("  "), "  ")
+        self.assertIsNone(split_into_paragraphs(None))
+
+    def test_matches_legacy_splitter_on_plain_text(self):
+        texts = [
+            "Baked salmon is healthy. It's packed with protein!  Serve it warm?\nEnjoy it.",
+            "  Leading spaces. Trailing spaces.   ",
+            "No punctuation at the end",
+        ]
+        for text in texts:
+            self.assertEqual(split_into_paragraphs(text), legacy_split_into_paragraphs(text))
+
+    def test_batch_matches_single(self):
+        items = make_items(200) + ["", "One."]
+        self.assertEqual(split_into_paragraphs_batch(items), [split_into_paragraphs(text) for text in items])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,8 @@
 
 import os
 import sys
+import tempfile
+import threading
 import unittest
 from unittest.mock import Mock, call, patch
 
@@ -10,8 +12,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ConfigKeeper')))
 
 from ai_gen_config import POST_TOPIC_RECIPES
-from update_wp_content import add_images_to_wp_post
+from update_wp_content import add_images_to_wp_post, _upload_images
 from wp_formatter import WP_FORMAT_ALT_TXT_FIELD
+from wp_media_index import WPMediaIndex
 
 
 class TestAddImagesToWpPost(unittest.TestCase):
@@ -102,7 +105,7 @@ class TestAddImagesToWpPost(unittest.TestCase):
             call(os.path.join(post_folder, '001_cover.jpg'), title='001_cover'),
             call(os.path.join(post_folder, '002_image.jpg'), title='002_image'),
         ]
-        mock_wp.upload_media.assert_has_calls(expected_calls)
+        mock_wp.upload_media.assert_has_calls(expected_calls, any_order=True)
         # Check list contains 2 items
         self.assertEqual(len(mock_wp.media_for_post), 2)
         # Check media objects are stored with alt text
@@ -111,8 +114,9 @@ class TestAddImagesToWpPost(unittest.TestCase):
         self.assertEqual(stored_media['source_url'], 'https://cdn/001_cover.jpg')
         mock_wp.set_featured_image_from_media.assert_called_once()
         featured_call_args = mock_wp.set_featured_image_from_media.call_args[0]
-        # Featured image should be the last uploaded media object
-        self.assertEqual(featured_call_args, (321, uploaded_media_list[-1]))
+        # Featured image should be the media of the last image in sorted order
+        self.assertEqual(featured_call_args, (321, mock_wp.media_for_post[-1]))
+        self.assertEqual(featured_call_args[1]['source_url'], 'https://cdn/002_image.jpg')
         mock_wp.update_post_content.assert_called_once_with(321, mock_formatter.add_imgs_to_single_recipe, unittest.mock.ANY)
         mock_wp.client.posts.get.assert_called_once_with(id=321)
         mock_post_statuses_cls.assert_called_once()
@@ -599,9 +603,97 @@ class TestAddImagesToWpPost(unittest.TestCase):
         self.assertNotIn('link_url', mock_wp.media_for_post[2])
 
 
+class TestUploadImages(unittest.TestCase):
+    """Exercises the parallel upload helper."""
+
+    def test_results_keep_input_order(self):
+        uploads = [(f'/img/{idx:03d}.jpg', f'{idx:03d}') for idx in range(6)]
+        first_upload_started = threading.Event()
+
+        def upload_side_effect(path, title):
+            # The first image finishes last
+            if title == '000':
+                first_upload_started.wait(1)
+            else:
+                first_upload_started.set()
+            return {'source_url': path}
+
+        mock_wp = Mock()
+        mock_wp.upload_media.side_effect = upload_side_effect
+
+        media = _upload_images(mock_wp, uploads, max_workers=3, callback=Mock())
+
+        self.assertEqual([m['source_url'] for m in media], [path for path, _ in uploads])
+
+    @patch('update_wp_content.time.sleep')
+    def test_failed_upload_is_retried(self, mock_sleep):
+        mock_wp = Mock()
+        mock_wp.upload_media.side_effect = [ConnectionError('reset'), {'id': 1}]
+        callback = Mock()
+
+        media = _upload_images(mock_wp, [('/img/001.jpg', '001')], callback=callback)
+
+        self.assertEqual(media, [{'id': 1}])
+        self.assertEqual(mock_wp.upload_media.call_count, 2)
+        mock_sleep.assert_called_once()
+        callback.assert_called_once()
+
+    @patch('update_wp_content.time.sleep')
+    def test_upload_fails_after_retries(self, mock_sleep):
+        mock_wp = Mock()
+        mock_wp.upload_media.side_effect = ConnectionError('reset')
+
+        with self.assertRaises(ConnectionError):
+            _upload_images(mock_wp, [('/img/001.jpg', '001'), ('/img/002.jpg', '002')], callback=Mock())
+
+    @patch('update_wp_content.time.sleep')
+    def test_only_connection_and_server_errors_are_retried(self, mock_sleep):
+        class ReadTimeout(OSError):
+            pass
+
+        class HTTPError(Exception):
+            def __init__(self, status_code):
+                super().__init__(f"HTTP {status_code}")
+                self.status_code = status_code
+
+        for error, expected_calls in ((ReadTimeout('read timed out'), 1), (HTTPError(400), 1), (HTTPError(502), 2)):
+            mock_wp = Mock()
+            mock_wp.upload_media.side_effect = [error, {'id': 1}]
+            try:
+                _upload_images(mock_wp, [('/img/001.jpg', '001')], callback=Mock())
+            except type(error):
+                pass
+            self.assertEqual(mock_wp.upload_media.call_count, expected_calls, error)
+
+    def test_indexed_media_is_reused(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            uploads = []
+            for name, content in (('001', b'first'), ('002', b'second')):
+                path = os.path.join(tmp_dir, f'{name}.jpg')
+                with open(path, 'wb') as f:
+                    f.write(content)
+                uploads.append((path, name))
+            media_index = WPMediaIndex(path=os.path.join(tmp_dir, 'index.json'))
+
+            mock_wp = Mock()
+            mock_wp.upload_media.side_effect = lambda path, title: {'id': title, 'source_url': path}
+            first = _upload_images(mock_wp, uploads, website='FoodSite', media_index=media_index, callback=Mock())
+
+            mock_wp.upload_media.reset_mock()
+            second = _upload_images(mock_wp, uploads, website='FoodSite', media_index=media_index, callback=Mock())
+
+            mock_wp.upload_media.assert_not_called()
+            self.assertEqual(first, second)
+
+            # Another website has its own media library
+            _upload_images(mock_wp, uploads[:1], website='OtherSite', media_index=media_index, callback=Mock())
+            mock_wp.upload_media.assert_called_once()
+
+
 def run_tests():
     loader = unittest.TestLoader()
     suite = loader.loadTestsFromTestCase(TestAddImagesToWpPost)
+    suite.addTests(loader.loadTestsFromTestCase(TestUploadImages))
     runner = unittest.TextTestRunner(verbosity=2)
     return runner.run(suite)
 
@@ -0,0 +1,82 @@
+"""
+Unit tests for wp_client_pool.py
+"""
+
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'WordPress')))
+
+from wp_client_pool import WPClientPool
+
+
+class FakeWordPressClient:
+    def __init__(self, website, callback):
+        self.website = website
+        self.callback = callback
+        self.session = object()
+        self.media_for_post = []
+
+
+class TestWPClientPool(unittest.TestCase):
+    """Test sharing WordPress clients per website"""
+
+    @patch('wp_client_pool.WordPressClient', side_effect=FakeWordPressClient)
+    def test_one_client_per_website(self, mock_client_cls):
+        pool = WPClientPool()
+
+        first = pool.get('FoodSite')
+        second = pool.get('FoodSite')
+        other = pool.get('StyleSite')
+
+        self.assertEqual(mock_client_cls.call_count, 2)
+        self.assertIs(first.session, second.session)
+        self.assertIsNot(first.session, other.session)
+        self.assertIn('FoodSite', pool)
+
+    @patch('wp_client_pool.WordPressClient', side_effect=FakeWordPressClient)
+    def test_each_lease_has_its_own_media_and_callback(self, mock_client_cls):
+        pool = WPClientPool()
+        callback_a, callback_b = Mock(), Mock()
+
+        lease_a = pool.get('FoodSite', callback_a)
+        lease_b = pool.get('FoodSite', callback_b)
+        lease_a.media_for_post.append({'id': 1})
+
+        self.assertEqual(lease_b.media_for_post, [])
+        self.assertIs(lease_a.callback, callback_a)
+        self.assertIs(lease_b.callback, callback_b)
+
+    @patch('wp_client_pool.WordPressClient')
+    def test_concurrent_gets_create_the_client_once(self, mock_client_cls):
+        created = threading.Event()
+
+        def slow_client(website, callback):
+            created.wait(0.1)
+            return FakeWordPressClient(website, callback)
+
+        mock_client_cls.side_effect = slow_client
+        pool = WPClientPool()
+        threads = [threading.Thread(target=pool.get, args=('FoodSite',)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_client_cls.assert_called_once()
+
+    @patch('wp_client_pool.WordPressClient', side_effect=FakeWordPressClient)
+    def test_discard_recreates_client(self, mock_client_cls):
+        pool = WPClientPool()
+        pool.get('FoodSite')
+        pool.discard('FoodSite')
+        pool.get('FoodSite')
+
+        self.assertEqual(mock_client_cls.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
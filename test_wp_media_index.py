@@ -0,0 +1,71 @@
+"""
+Unit tests for wp_media_index.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from wp_media_index import WPMediaIndex, hash_file
+
+
+class TestWPMediaIndex(unittest.TestCase):
+    """Test storing and reloading indexed WordPress media"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "sub", "index.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hash_file_depends_on_content_only(self):
+        path_a = os.path.join(self.tmp_dir.name, "a.jpg")
+        path_b = os.path.join(self.tmp_dir.name, "b.jpg")
+        for path in (path_a, path_b):
+            with open(path, "wb") as f:
+                f.write(b"same bytes")
+        self.assertEqual(hash_file(path_a), hash_file(path_b))
+
+    def test_put_get_survives_reload(self):
+        index = WPMediaIndex(path=self.path)
+        index.put("FoodSite", "abc", {"id": 5, "source_url": "https://cdn/a.jpg"})
+
+        reloaded = WPMediaIndex(path=self.path)
+        self.assertEqual(reloaded.get("FoodSite", "abc"), {"id": 5, "source_url": "https://cdn/a.jpg"})
+        self.assertIsNone(reloaded.get("OtherSite", "abc"))
+        self.assertEqual(len(reloaded), 1)
+
+    def test_get_returns_a_copy(self):
+        index = WPMediaIndex(path=self.path)
+        index.put("FoodSite", "abc", {"id": 5})
+
+        index.get("FoodSite", "abc")["alt_text"] = "changed"
+        self.assertEqual(index.get("FoodSite", "abc"), {"id": 5})
+
+    def test_media_without_id_is_not_indexed(self):
+        index = WPMediaIndex(path=self.path)
+        index.put("FoodSite", "abc", {})
+        self.assertIsNone(index.get("FoodSite", "abc"))
+
+    def test_forget(self):
+        index = WPMediaIndex(path=self.path)
+        index.put("FoodSite", "abc", {"id": 5})
+        index.forget("FoodSite", "abc")
+        self.assertIsNone(WPMediaIndex(path=self.path).get("FoodSite", "abc"))
+
+    def test_unreadable_index_starts_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        callback = Mock()
+
+        index = WPMediaIndex(path=self.path, callback=callback)
+
+        self.assertEqual(len(index), 0)
+        callback.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -160,6 +160,79 @@ class TestCreateWpPostRecipe(unittest.TestCase):
         # Verify test mode logging
         self.callback.assert_any_call('\n[TEST MODE][create_wp_post] Post Title:\nDelicious Chocolate Cake\n')
     
+    @patch('wp_post_gen.get_post_type')
+    @patch('wp_post_gen.PostTypes')
+    @patch('wp_post_gen.get_post_topic_from_cats')
+    @patch('wp_post_gen.WPFormatter')
+    def test_create_recipe_post_uses_given_post_type(
+        self,
+        mock_formatter_class,
+        mock_get_topic,
+        mock_post_types_class,
+        mock_get_type
+    ):
+        """Test that a known post type is not read from Notion again"""
+        mock_post_types = Mock()
+        mock_post_types.is_singular.return_value = True
+        mock_post_types_class.return_value = mock_post_types
+        mock_get_topic.return_value = POST_TOPIC_RECIPES
+        
+        mock_formatter = Mock()
+        mock_formatter.generate_recipe.return_value = '<h2>Recipe content</h2>'
+        mock_formatter_class.return_value = mock_formatter
+        
+        result = create_wp_post(
+            self.notion_post,
+            self.website,
+            self.recipe_post_parts,
+            self.post_slug,
+            self.categories,
+            callback=self.callback,
+            test=True,
+            post_type='single_recipe'
+        )
+        
+        mock_get_type.assert_not_called()
+        mock_post_types.is_singular.assert_called_once_with('single_recipe')
+        self.assertEqual(result['slug'], 'test-recipe-slug')
+    
+    @patch('wp_post_gen.PostTypes')
+    @patch('wp_post_gen.get_post_topic_from_cats')
+    @patch('wp_post_gen.WPFormatter')
+    @patch('wp_post_gen.WordPressClient')
+    def test_create_recipe_post_uses_pooled_client(
+        self,
+        mock_wp_client_class,
+        mock_formatter_class,
+        mock_get_topic,
+        mock_post_types_class
+    ):
+        """Test that the website's pooled WordPress client is used when a pool is given"""
+        mock_post_types = Mock()
+        mock_post_types.is_singular.return_value = True
+        mock_post_types_class.return_value = mock_post_types
+        mock_get_topic.return_value = POST_TOPIC_RECIPES
+        mock_formatter_class.return_value.generate_recipe.return_value = '<h2>Recipe content</h2>'
+        
+        mock_pool = Mock()
+        mock_pool.get.return_value.create_post.return_value = {'id': 123, 'link': 'https://test.com/cake'}
+        
+        result = create_wp_post(
+            self.notion_post,
+            self.website,
+            self.recipe_post_parts,
+            self.post_slug,
+            self.categories,
+            callback=self.callback,
+            test=False,
+            post_type='single_recipe',
+            wp_pool=mock_pool
+        )
+        
+        self.assertEqual(result['link'], 'https://test.com/cake')
+        mock_pool.get.assert_called_once_with(self.website, self.callback)
+        mock_wp_client_class.assert_not_called()
+    
     @patch('wp_post_gen.get_post_type')
     @patch('wp_post_gen.PostTypes')
     @patch('wp_post_gen.get_post_topic_from_cats')
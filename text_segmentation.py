@@ -0,0 +1,72 @@
+import re
+from typing import Iterable, List
+
+# Abbreviations whose dot never ends a sentence ("Dr. Smith", "e.g. apples")
+SENTENCE_ABBREVIATIONS = ("mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "e.g", "i.e", "cf", "approx")
+# Abbreviations that often end a sentence too, so they only hold it together before a lowercase word ("1 tsp. salt")
+SENTENCE_TRAILING_ABBREVIATIONS = ("etc", "no", "tsp", "tbsp", "oz", "fl", "lb", "lbs", "pt", "qt", "pkg", "min", "hr", "hrs", "sec")
+
+
+def _not_after(words) -> str:
+    """Negative lookbehinds for "<word>." (one per word length, as lookbehinds need a fixed width)."""
+    by_length = {}
+    for word in words:
+        by_length.setdefault(len(word), []).append(re.escape(word))
+    return "".join(rf"(?<!\b(?i:{'|'.join(group)})\.)" for _, group in sorted(by_length.items()))
+
+
+# Whitespace that ends a sentence. All the rules are lookarounds, so splitting a text is a
+# single re.split pass in the regex engine:
+# - the whitespace follows ".", "!", "?" or an ellipsis;
+# - a dot after an abbreviation does not end a sentence;
+# - an ellipsis or a "trailing" abbreviation ends one only before a non-lowercase word.
+# Decimals such as "3.5" never split because the dot is not followed by whitespace.
+# The cheap checks come first, so the abbreviation lookbehinds only run at likely sentence
+# ends and the trailing ones only before a lowercase word.
+_SENTENCE_BREAK_RE = re.compile(
+    r'(?<=[.!?…])(?=\s)'
+    + _not_after(SENTENCE_ABBREVIATIONS)
+    + r'(?:\s+(?![a-z\s])|(?<!\.\.)(?<!…)' + _not_after(SENTENCE_TRAILING_ABBREVIATIONS) + r'\s+)'
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, keeping each sentence's punctuation.
+
+    Abbreviations and an ellipsis followed by a lowercase word do not end a sentence.
+    """
+    text = text.strip() if text else ""
+    return _SENTENCE_BREAK_RE.split(text) if text else []
+
+
+def split_into_paragraphs(text: str, sentences_per_paragraph: int = 2) -> str:
+    """Group the sentences of text into paragraphs of `sentences_per_paragraph`, one per line.
+
+    Empty or blank text is returned unchanged.
+    """
+    return split_into_paragraphs_batch((text,), sentences_per_paragraph)[0]
+
+
+def split_into_paragraphs_batch(texts: Iterable[str], sentences_per_paragraph: int = 2) -> List[str]:
+    """split_into_paragraphs for many texts at once, e.g. all item bodies of a roundup.
+
+    Splits every text in one loop with the regex and join methods bound once, instead of
+    paying the call and lookup overhead per text.
+    """
+    split = _SENTENCE_BREAK_RE.split
+    join_sentences = " ".join
+    join_paragraphs = "\n".join
+    step = sentences_per_paragraph
+    results = []
+    append = results.append
+    for text in texts:
+        stripped = text.strip() if text else ""
+        if not stripped:
+            append(text)
+            continue
+        sentences = split(stripped)
+        if len(sentences) <= step:
+            append(join_sentences(sentences))
+        else:
+            append(join_paragraphs([join_sentences(sentences[i:i + step]) for i in range(0, len(sentences), step)]))
+    return results
@@ -1,6 +1,8 @@
 import os
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ConfigKeeper')))
@@ -22,7 +24,17 @@ from notion_config import (
     PostTypes, 
     PostStatuses,
 )
+from img_preprocess import preprocess_images
+from settings import (
+    IMG_PREPROCESS_ENABLED,
+    WP_UPLOAD_MAX_WORKERS,
+    WP_UPLOAD_RETRIES,
+    WP_UPLOAD_RETRY_DELAY_SECONDS,
+)
 from wp_client import WordPressClient
+from wp_client_pool import WPClientPool
+from wp_media_index import WPMediaIndex, hash_file
+from rate_limiter import call_limited, get_status_code, THROTTLE_STATUS_CODES, RATE_LIMIT_NOTION, RATE_LIMIT_WORDPRESS
 from wp_formatter import (
     WPFormatter, 
     WP_FORMAT_ALT_TXT_FIELD
@@ -85,6 +97,94 @@ def _sanitize_image_filename(img_name: str, post_folder: str) -> str:
     return sanitized_img_name
 
 
+def _upload_media_with_retry(
+    wp: WordPressClient,
+    img_path: str,
+    title: str,
+    retries: int = WP_UPLOAD_RETRIES,
+    retry_delay: float = WP_UPLOAD_RETRY_DELAY_SECONDS,
+    callback=print,
+    website: str = "",
+) -> dict:
+    """Upload one image, retrying connection failures and server errors with exponential backoff; re-raises the last error.
+
+    Throttled uploads (429/503) are only retried by the website's rate limiter, after Retry-After.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return call_limited(RATE_LIMIT_WORDPRESS, wp.upload_media, img_path, title=title, limiter_key=website, limiter_callback=callback)
+        except Exception as e:
+            if attempt == retries or not _is_retryable_upload_error(e):
+                raise
+            delay = retry_delay * (2 ** attempt)
+            callback(
+                f"[WARNING][add_images_to_wp_post] Upload of '{os.path.basename(img_path)}' failed ({e}); "
+                f"retrying in {delay}s ({attempt + 1}/{retries})."
+            )
+            time.sleep(delay)
+
+
+def _is_retryable_upload_error(error: Exception) -> bool:
+    """Connection failures and 5xx errors other than throttling.
+
+    A read timeout is not retried: the server may have created the media already, and a
+    second upload would add a duplicate to the media library.
+    """
+    error_classes = {cls.__name__ for cls in type(error).__mro__}
+    if "ReadTimeout" in error_classes:
+        return False
+    if isinstance(error, ConnectionError) or "ConnectionError" in error_classes:  # Also requests.ConnectionError
+        return True
+    status = get_status_code(error)
+    return isinstance(status, int) and 500 <= status < 600 and status not in THROTTLE_STATUS_CODES
+
+
+def _upload_images(
+    wp: WordPressClient,
+    uploads: List[tuple],
+    max_workers: int = WP_UPLOAD_MAX_WORKERS,
+    callback=print,
+    website: str = "",
+    media_index: Optional[WPMediaIndex] = None,
+) -> List[dict]:
+    """Upload (img_path, title) pairs on a bounded thread pool.
+
+    With a media index, files already uploaded to `website` reuse their indexed media
+    object instead of being uploaded again, and new uploads are added to the index.
+
+    Returns:
+        The uploaded media objects in the order of `uploads`, whatever order the uploads finish in.
+    """
+    media_list = [None] * len(uploads)
+    file_hashes = [None] * len(uploads)
+    if media_index is not None:
+        for idx, (img_path, _) in enumerate(uploads):
+            file_hashes[idx] = hash_file(img_path)
+            media_list[idx] = media_index.get(website, file_hashes[idx])
+        reused_count = sum(1 for media in media_list if media is not None)
+        if reused_count:
+            callback(f"[INFO][add_images_to_wp_post] Reusing {reused_count} image(s) already uploaded to WordPress.")
+
+    def upload(idx):
+        img_path, title = uploads[idx]
+        media = _upload_media_with_retry(wp, img_path, title, callback=callback, website=website)
+        if media_index is not None:
+            media_index.put(website, file_hashes[idx], media)
+        return media
+
+    pending = [idx for idx, media in enumerate(media_list) if media is None]
+    if max_workers <= 1 or len(pending) <= 1:
+        for idx in pending:
+            media_list[idx] = upload(idx)
+        return media_list
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        futures = {idx: executor.submit(upload, idx) for idx in pending}
+        for idx, future in futures.items():
+            media_list[idx] = future.result()
+    return media_list
+
+
 def add_images_to_wp_post(
     website: str,
     notion_post: object,
@@ -94,6 +194,9 @@ def add_images_to_wp_post(
     imgs: Optional[List[str]] = None,
     callback=print,
     test: bool = False,
+    update_notion_status: bool = True,
+    media_index: Optional[WPMediaIndex] = None,
+    wp_pool: Optional[WPClientPool] = None,
 ) -> Optional[str]:
     """Upload images for a Notion post to WordPress and insert them into the content.
 
@@ -107,6 +210,10 @@ def add_images_to_wp_post(
         imgs: Optional explicit list of image filenames to upload.
         callback: Logging callback.
         test: When True, no network actions are performed.
+        update_notion_status: When False, the caller sets the "images added" Notion status
+            itself (see set_post_status_imgs_added).
+        media_index: Optional WPMediaIndex; images already uploaded to the website are reused.
+        wp_pool: Optional WPClientPool providing the website's shared WordPress client.
 
     Returns:
         The WordPress post hyperlink if images were inserted, None when no images found.
@@ -155,13 +262,13 @@ def add_images_to_wp_post(
 
     
 
-    wp = WordPressClient(website, callback)
-    post_id = wp.get_post_id_by_slug(slug)
+    wp = wp_pool.get(website, callback) if wp_pool is not None else WordPressClient(website, callback)
+    post_id = call_limited(RATE_LIMIT_WORDPRESS, wp.get_post_id_by_slug, slug, limiter_key=website, limiter_callback=callback)
     callback(f"[INFO][add_images_to_wp_post] Found post ID {post_id} for slug '{slug}'.")
 
     heading_urls = []
     if is_recipes_roundup:
-        h2_headings = wp.get_h2_headings(post_id)
+        h2_headings = call_limited(RATE_LIMIT_WORDPRESS, wp.get_h2_headings, post_id, limiter_key=website, limiter_callback=callback)
         if not h2_headings:
             raise ValueError(
                 f"[ERROR][add_images_to_wp_post] No H2 headings found in roundup post '{slug}', cannot insert images."
@@ -182,13 +289,15 @@ def add_images_to_wp_post(
 
     formatter = WPFormatter()
 
-    for idx, img_name in enumerate(imgs):
+    # Renaming files and building alt texts stays sequential so a bad name fails before any upload
+    uploads = []
+    alt_texts = []
+    for img_name in imgs:
         img_name = _sanitize_image_filename(img_name, post_folder)
         img_path = os.path.join(post_folder, img_name)
         
         img_name_without_ext = os.path.splitext(img_name)[0]
         
-        media = wp.upload_media(img_path, title=img_name_without_ext)
         alt_text = f"{post_title} - {img_name_without_ext}" if post_title else img_name_without_ext
         
         try:
@@ -201,7 +310,19 @@ def add_images_to_wp_post(
             callback(f"[DEBUG] post_title: {repr(post_title)}")
             callback(f"[DEBUG] img_name: {repr(img_name)}")
             raise
-        
+
+        uploads.append((img_path, img_name_without_ext))
+        alt_texts.append(alt_text)
+
+    if IMG_PREPROCESS_ENABLED:
+        # The media title stays the original file name; only the uploaded file changes
+        upload_paths = preprocess_images([img_path for img_path, _ in uploads], callback=callback)
+        uploads = [(upload_path, title) for upload_path, (_, title) in zip(upload_paths, uploads)]
+
+    uploaded_media = _upload_images(wp, uploads, callback=callback, website=website, media_index=media_index)
+
+    # Appending in the sorted image order keeps the heading links and the featured image deterministic
+    for idx, (media, alt_text) in enumerate(zip(uploaded_media, alt_texts)):
         media[WP_FORMAT_ALT_TXT_FIELD] = alt_text
         
         # Add link URL to media object if available for this image
@@ -218,7 +339,7 @@ def add_images_to_wp_post(
         if is_singular:
             if wp.media_for_post:
                 featured_img = wp.media_for_post[-1]
-                wp.set_featured_image_from_media(post_id, featured_img)
+                call_limited(RATE_LIMIT_WORDPRESS, wp.set_featured_image_from_media, post_id, featured_img, limiter_key=website, limiter_callback=callback)
             callback(f"[INFO][add_images_to_wp_post] Set featured image for post '{slug}'.")
             modify_content_func = formatter.add_imgs_to_single_recipe
         elif is_roundup:
@@ -232,23 +353,52 @@ def add_images_to_wp_post(
             )
         modify_content_func = formatter.add_imgs_generic
 
-    wp.update_post_content(post_id, modify_content_func, callback)
+    call_limited(RATE_LIMIT_WORDPRESS, wp.update_post_content, post_id, modify_content_func, callback, limiter_key=website, limiter_callback=callback)
 
-    updated_post = wp.client.posts.get(id=post_id)
+    updated_post = call_limited(RATE_LIMIT_WORDPRESS, wp.client.posts.get, id=post_id, limiter_key=website, limiter_callback=callback)
     wp_link = updated_post.get('link') if isinstance(updated_post, dict) else None
     if not wp_link:
         raise ValueError("[ERROR][add_images_to_wp_post] Unable to retrieve updated WordPress post link.")
 
     callback(f"[INFO][add_images_to_wp_post] Inserted images into post content for post '{slug}'.")
     
+    if update_notion_status:
+        set_post_status_imgs_added(notion_post, slug, callback=callback, test=test)
+    return wp_link
+
+
+def set_post_status_imgs_added(notion_post: object, slug: str, callback=print, test: bool = False):
+    """Set the Notion post status to "published with images added".
+
+    Raises:
+        ValueError: If the status could not be updated.
+    """
     statuses = PostStatuses()
     published_imgs_id = statuses.published_imgs_added_id
     status_name = statuses.get_status_name(published_imgs_id)
-    updated_notion_post = update_post_status(notion_post, published_imgs_id, test=test)
+    updated_notion_post = call_limited(RATE_LIMIT_NOTION, update_post_status, notion_post, published_imgs_id, test=test, limiter_callback=callback)
     if updated_notion_post is None:
         raise ValueError(
             f"[ERROR][add_images_to_wp_post] Failed to update Notion post status to '{status_name}' for post '{slug}'."
         )
     callback(f"[INFO][add_images_to_wp_post] Updated Notion post status to '{status_name}' for post '{slug}'.")
-    return wp_link
+    return updated_notion_post
+
+
+async def async_set_post_status_imgs_added(services, notion_post: object, slug: str, callback=print, test: bool = False):
+    """Coroutine version of set_post_status_imgs_added, sending the update through an AsyncServices.
+
+    Raises:
+        ValueError: If the status could not be updated.
+    """
+    statuses = PostStatuses()
+    published_imgs_id = statuses.published_imgs_added_id
+    status_name = statuses.get_status_name(published_imgs_id)
+    updated_notion_post = await services.update_post_status(notion_post, published_imgs_id, test=test, callback=callback)
+    if updated_notion_post is None:
+        raise ValueError(
+            f"[ERROR][add_images_to_wp_post] Failed to update Notion post status to '{status_name}' for post '{slug}'."
+        )
+    callback(f"[INFO][add_images_to_wp_post] Updated Notion post status to '{status_name}' for post '{slug}'.")
+    return updated_notion_post
 
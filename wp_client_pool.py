@@ -0,0 +1,62 @@
+import copy
+import threading
+from typing import Dict
+
+WordPressClient = None  # wp_client.WordPressClient, imported by the first `get` so the app starts without it
+
+
+def _client_class():
+    global WordPressClient
+    if WordPressClient is None:
+        from wp_client import WordPressClient as client_class
+
+        WordPressClient = client_class
+    return WordPressClient
+
+
+class WPClientPool:
+    """Registry of one WordPressClient per website, shared for the lifetime of the app.
+
+    Creating a client authenticates and loads the site settings, so doing it once per
+    website (instead of once per post) also lets the client's HTTP session keep its
+    connections alive across checks, post creation and image insertion.
+
+    `get` hands out a shallow copy of the shared client: the copy reuses the underlying
+    connection and settings but gets its own `media_for_post` list, so posts processed
+    at the same time do not see each other's uploaded media.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, "WordPressClient"] = {}
+        self._website_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, website: str, callback=print) -> "WordPressClient":
+        """Return a client for the website, creating the shared one on first use."""
+        with self._lock:
+            website_lock = self._website_locks.setdefault(website, threading.Lock())
+        # Other websites are not blocked while this one connects
+        with website_lock:
+            client = self._clients.get(website)
+            if client is None:
+                client = _client_class()(website, callback)
+                self._clients[website] = client
+
+        lease = copy.copy(client)
+        lease.media_for_post = []
+        if hasattr(lease, "callback"):
+            lease.callback = callback
+        return lease
+
+    def discard(self, website: str):
+        """Drop the shared client of a website, e.g. after its credentials changed."""
+        with self._lock:
+            self._clients.pop(website, None)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __contains__(self, website: str) -> bool:
+        with self._lock:
+            return website in self._clients
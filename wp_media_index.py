@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from settings import WP_MEDIA_INDEX_PATH
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """Return the sha256 hex digest of a file's content."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class WPMediaIndex:
+    """Local JSON index of media already uploaded to WordPress.
+
+    Maps (website, image content hash) to the media object WordPress returned for the
+    upload, so uploading the same file to the same website again can reuse it.
+    Media deleted on the WordPress side are not detected; call `forget` (or delete the
+    index file) if that happens.
+    """
+
+    def __init__(self, path: str = WP_MEDIA_INDEX_PATH, callback=print):
+        self.path = path
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._media = self._load()  # website -> {content hash: media}
+
+    def get(self, website: str, file_hash: str) -> Optional[dict]:
+        """Return a copy of the indexed media object, or None if the file was not uploaded yet."""
+        with self._lock:
+            media = self._media.get(website, {}).get(file_hash)
+            return dict(media) if media is not None else None
+
+    def put(self, website: str, file_hash: str, media: dict):
+        """Index a freshly uploaded media object and save the index."""
+        if not media or media.get("id") is None:
+            return
+        with self._lock:
+            self._media.setdefault(website, {})[file_hash] = dict(media)
+            self._save()
+
+    def forget(self, website: str, file_hash: str):
+        with self._lock:
+            if self._media.get(website, {}).pop(file_hash, None) is not None:
+                self._save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(website_media) for website_media in self._media.values())
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("not a JSON object")
+            return data
+        except (OSError, ValueError) as e:
+            self.callback(f"[WARNING][WPMediaIndex] Ignoring unreadable media index '{self.path}': {e}")
+            return {}
+
+    def _save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._media, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
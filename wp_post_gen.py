@@ -8,13 +8,15 @@ import json
 
 from config_utils import *
 from wp_client import WordPressClient
+from wp_client_pool import WPClientPool
+from rate_limiter import call_limited, RATE_LIMIT_WORDPRESS
 from wp_formatter import WPFormatter
 from post_part_constants import *
 from notion_api import (
     get_post_type,
 )
 
-def create_wp_post(notion_post: dict, website: str, post_parts: dict, post_slug: str, categories: str, callback=print, test=False):
+def create_wp_post(notion_post: dict, website: str, post_parts: dict, post_slug: str, categories: str, callback=print, test=False, post_type: str = None, wp_pool: WPClientPool = None):
 
     callback(f"\n[INFO][create_wp_post] Creating post on WordPress site: {website}")
 
@@ -30,7 +32,8 @@ def create_wp_post(notion_post: dict, website: str, post_parts: dict, post_slug:
     if not post_slug or post_slug.strip() == "":
         raise ValueError("[ERROR][create_wp_post] post_slug cannot be None or empty")
 
-    post_type = get_post_type(notion_post)
+    if post_type is None:
+        post_type = get_post_type(notion_post)
     if not post_type or post_type.strip() == "":
         raise ValueError("[ERROR][create_wp_post] post_type cannot be None or empty")
 
@@ -68,8 +71,14 @@ def create_wp_post(notion_post: dict, website: str, post_parts: dict, post_slug:
             "slug": post_slug
         }
     
-    wp = WordPressClient(website, callback)
-    wp_post = wp.create_post(
+    wp = wp_pool.get(website, callback) if wp_pool is not None else WordPressClient(website, callback)
+    # Not idempotent: a create the server completed but answered 503 must not be sent again (duplicate drafts)
+    wp_post = call_limited(
+        RATE_LIMIT_WORDPRESS,
+        wp.create_post,
+        limiter_key=website,
+        limiter_callback=callback,
+        idempotent=False,
         title=post_title,
         content=post_content,
         featured_image_path="",